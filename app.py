@@ -1,11 +1,12 @@
 """
 TTS-Story - Web-based TTS application
 """
-from flask import Flask, render_template, request, jsonify, send_file
+from flask import Flask, Response, abort, render_template, request, jsonify, send_file, stream_with_context
+from werkzeug.security import safe_join
 from flask_cors import CORS
 import base64
-import hashlib
 import copy
+import hashlib
 import inspect
 import io
 import json
@@ -21,8 +22,8 @@ import tempfile
 import threading
 import time
 import uuid
-from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from contextlib import contextmanager
 from datetime import datetime
 from functools import lru_cache
@@ -43,14 +44,28 @@ from src.custom_voice_store import (
     replace_custom_voice,
     save_custom_voice,
 )
-from src.document_extractor import extract_text_from_file, get_supported_formats
+from src.document_extractor import extract_document_from_file, get_supported_formats
 from src.gemini_processor import GeminiProcessor, GeminiProcessorError
+from src.llm_cache import get_llm_cache
+from src.llm_clients import clear_clients
+from src.section_pipeline import (
+    DEFAULT_SECTION_TOKEN_BUDGET,
+    ParagraphAssembler,
+    SectionPipeline,
+    pack_sections,
+)
 from src.replicate_api import ReplicateAPI
+from src.zip_stream import stream_zip
 from src.text_processor import TextProcessor
 from src.engines import TtsEngineBase
 from src.engines.chatterbox_turbo_local_engine import (
     CHATTERBOX_TURBO_AVAILABLE,
 )
+from src.engines.kokoro_engine import (
+    custom_voice_pack_key,
+    precompute_custom_voice_pack,
+    remove_custom_voice_pack,
+)
 from src.engines.voxcpm_local_engine import VOXCPM_AVAILABLE
 from src.engines.qwen3_custom_voice_engine import QWEN3_AVAILABLE
 from src.engines.qwen3_voice_clone_engine import QWEN3_AVAILABLE as QWEN3_CLONE_AVAILABLE
@@ -58,6 +73,7 @@ from src.engines.chatterbox_turbo_replicate_engine import (
     DEFAULT_CHATTERBOX_TURBO_REPLICATE_MODEL,
     DEFAULT_CHATTERBOX_TURBO_REPLICATE_VOICE,
 )
+from src.transcription_service import SENSEVOICE_AVAILABLE, get_transcription_service
 from src.tts_engine import (
     TTSEngine,
     KOKORO_AVAILABLE,
@@ -78,6 +94,8 @@ logger = logging.getLogger(__name__)
 # Initialize Flask app
 app = Flask(__name__)
 CORS(app)
+# Let a front-end server (nginx X-Accel / Apache mod_xsendfile) transmit audio files directly
+app.config["USE_X_SENDFILE"] = os.environ.get("USE_X_SENDFILE", "").strip().lower() in ("1", "true", "yes")
 
 # Configuration
 CONFIG_FILE = "config.json"
@@ -87,6 +105,7 @@ VOICE_PROMPT_DIR = Path("data/voice_prompts")
 VOICE_PROMPT_DIR.mkdir(parents=True, exist_ok=True)
 VOICE_PROMPT_EXTENSIONS = {".wav", ".mp3", ".m4a", ".flac", ".ogg"}
 CHATTERBOX_VOICE_REGISTRY = Path("data/chatterbox_voices.json")
+BUNDLE_CACHE_DIR = Path("data/cache/bundles")
 JOB_METADATA_FILENAME = "metadata.json"
 DEFAULT_GEMINI_MODEL = "gemini-1.5-flash"
 LIBRARY_CACHE_TTL = 5  # seconds
@@ -105,7 +124,10 @@ DEFAULT_CONFIG = {
     "gemini_model": DEFAULT_GEMINI_MODEL,
     "gemini_prompt": "",
     "gemini_prompt_presets": [],
+    "gemini_max_concurrency": 4,
+    "gemini_section_token_budget": DEFAULT_SECTION_TOKEN_BUDGET,
     "tts_engine": "kokoro",
+    "kokoro_g2p_disk_cache": False,
     "chatterbox_turbo_local_default_prompt": "",
     "chatterbox_turbo_local_temperature": 0.8,
     "chatterbox_turbo_local_top_p": 0.95,
@@ -138,6 +160,7 @@ DEFAULT_CONFIG = {
     "qwen3_custom_attn_implementation": "flash_attention_2",
     "qwen3_custom_default_language": "Auto",
     "qwen3_custom_default_instruct": "",
+    "qwen3_custom_batch_size": 4,
     "qwen3_clone_model_id": "Qwen/Qwen3-TTS-12Hz-1.7B-Base",
     "qwen3_clone_device": "auto",
     "qwen3_clone_dtype": "bfloat16",
@@ -145,9 +168,13 @@ DEFAULT_CONFIG = {
     "qwen3_clone_default_language": "Auto",
     "qwen3_clone_default_prompt": "",
     "qwen3_clone_default_prompt_text": "",
+    "qwen3_clone_batch_size": 4,
     "qwen3_voice_design_model_id": "Qwen/Qwen3-TTS-12Hz-1.7B-VoiceDesign",
     "parallel_chunks": 3,
+    "replicate_max_parallel_chunks": 10,
     "cleanup_vram_after_job": False,
+    "group_chunks_by_speaker": False,
+    "cache_zip_bundles": False,
 }
 
 CHATTERBOX_TURBO_LOCAL_SETTING_KEYS = {
@@ -179,6 +206,7 @@ QWEN3_CUSTOM_SETTING_KEYS = {
     "qwen3_custom_attn_implementation",
     "qwen3_custom_default_language",
     "qwen3_custom_default_instruct",
+    "qwen3_custom_batch_size",
 }
 QWEN3_CLONE_SETTING_KEYS = {
     "qwen3_clone_model_id",
@@ -188,6 +216,7 @@ QWEN3_CLONE_SETTING_KEYS = {
     "qwen3_clone_default_language",
     "qwen3_clone_default_prompt",
     "qwen3_clone_default_prompt_text",
+    "qwen3_clone_batch_size",
 }
 CHATTERBOX_TURBO_LOCAL_OPTION_ALIASES = {
     "default_prompt": "chatterbox_turbo_local_default_prompt",
@@ -221,6 +250,7 @@ QWEN3_CUSTOM_OPTION_ALIASES = {
     "attn_implementation": "qwen3_custom_attn_implementation",
     "default_language": "qwen3_custom_default_language",
     "default_instruct": "qwen3_custom_default_instruct",
+    "batch_size": "qwen3_custom_batch_size",
 }
 QWEN3_CLONE_OPTION_ALIASES = {
     "model": "qwen3_clone_model_id",
@@ -231,6 +261,7 @@ QWEN3_CLONE_OPTION_ALIASES = {
     "default_language": "qwen3_clone_default_language",
     "default_prompt": "qwen3_clone_default_prompt",
     "prompt_text": "qwen3_clone_default_prompt_text",
+    "batch_size": "qwen3_clone_batch_size",
 }
 CHATTERBOX_TURBO_LOCAL_BOOLEAN_SETTINGS = {
     "chatterbox_turbo_local_norm_loudness",
@@ -526,6 +557,18 @@ gpu_inference_lock = threading.Lock()
 # Use max_workers=1 to prevent parallel GPU inference which causes contention
 # and "badcase" retry loops with VoxCPM and other GPU-based engines
 chunk_regen_executor = ThreadPoolExecutor(max_workers=1)
+# Batch FX runs off the request thread and fans its file groups out to fx_worker_executor
+fx_batch_executor = ThreadPoolExecutor(max_workers=1)
+FX_BATCH_FILES_PER_TASK = 16
+FX_BATCH_MAX_WORKERS = 8
+# Apply-FX only changes speed/pitch, so workers spend their time in Rubber Band: the
+# pylibrb study/process calls release the GIL and the CLI fallback is a subprocess per
+# file. Threads overlap that work; spawned processes would re-import this module
+# (torch and every engine) before doing any.
+fx_worker_executor = ThreadPoolExecutor(
+    max_workers=max(1, min(os.cpu_count() or 1, FX_BATCH_MAX_WORKERS)),
+    thread_name_prefix="fx",
+)
 qwen3_voice_design_model = None
 qwen3_voice_design_signature = None
 library_cache = {
@@ -972,6 +1015,7 @@ def _engine_signature(engine_name: str, config: Dict) -> str:
             (config.get("qwen3_custom_attn_implementation") or "").strip(),
             (config.get("qwen3_custom_default_language") or "").strip(),
             (config.get("qwen3_custom_default_instruct") or "").strip(),
+            str(config.get("qwen3_custom_batch_size")),
         )
         return f"{engine_name}::{'|'.join(parts)}"
     if engine_name == "qwen3_clone":
@@ -983,6 +1027,7 @@ def _engine_signature(engine_name: str, config: Dict) -> str:
             (config.get("qwen3_clone_default_language") or "").strip(),
             (config.get("qwen3_clone_default_prompt") or "").strip(),
             (config.get("qwen3_clone_default_prompt_text") or "").strip(),
+            str(config.get("qwen3_clone_batch_size")),
         )
         return f"{engine_name}::{'|'.join(parts)}"
     if engine_name == "kokoro_replicate":
@@ -990,6 +1035,8 @@ def _engine_signature(engine_name: str, config: Dict) -> str:
             (config.get("replicate_api_key") or "").strip(),
         )
         return f"{engine_name}::{'|'.join(parts)}"
+    if engine_name == "kokoro":
+        return f"{engine_name}::{bool(config.get('kokoro_g2p_disk_cache', False))}"
     return engine_name
 
 
@@ -1000,7 +1047,10 @@ def _create_engine(engine_name: str, config: Dict) -> TtsEngineBase:
         if not KOKORO_AVAILABLE:
             raise ImportError("Kokoro is not installed. Run setup to enable local mode.")
         device = config.get("device", "auto")
-        return TTSEngine(device=device)
+        return TTSEngine(
+            device=device,
+            g2p_disk_cache=bool(config.get("kokoro_g2p_disk_cache", False)),
+        )
 
     if engine_name == "chatterbox_turbo_local":
         if not CHATTERBOX_TURBO_AVAILABLE:
@@ -1073,6 +1123,7 @@ def _create_engine(engine_name: str, config: Dict) -> TtsEngineBase:
             attn_implementation=(config.get("qwen3_custom_attn_implementation") or "flash_attention_2").strip(),
             default_language=(config.get("qwen3_custom_default_language") or "Auto").strip() or "Auto",
             default_instruct=(config.get("qwen3_custom_default_instruct") or "").strip() or None,
+            batch_size=_coerce_int(config.get("qwen3_custom_batch_size"), minimum=1, maximum=16, fallback=4),
         )
 
     if engine_name == "qwen3_clone":
@@ -1088,6 +1139,7 @@ def _create_engine(engine_name: str, config: Dict) -> TtsEngineBase:
             default_language=(config.get("qwen3_clone_default_language") or "Auto").strip() or "Auto",
             default_prompt=(config.get("qwen3_clone_default_prompt") or "").strip() or None,
             default_prompt_text=(config.get("qwen3_clone_default_prompt_text") or "").strip() or None,
+            batch_size=_coerce_int(config.get("qwen3_clone_batch_size"), minimum=1, maximum=16, fallback=4),
         )
 
     if engine_name == "kokoro_replicate":
@@ -1153,6 +1205,31 @@ def get_tts_engine(engine_name: Optional[str] = None, config: Optional[Dict] = N
         return engine
 
 
+def _precompute_custom_voice_pack_async(definition: dict) -> None:
+    """Blend and persist a saved custom voice in the background."""
+    if not KOKORO_AVAILABLE:
+        return
+
+    def _run():
+        try:
+            precompute_custom_voice_pack(definition)
+        except Exception as exc:  # pragma: no cover - engine blends lazily on failure
+            logger.warning("Failed to precompute custom voice '%s': %s", definition.get("name"), exc)
+
+    threading.Thread(target=_run, name="custom-voice-precompute", daemon=True).start()
+
+
+def _discard_custom_voice_pack(components: List) -> None:
+    """Remove a persisted blend that no remaining custom voice references."""
+    if not KOKORO_AVAILABLE:
+        return
+    in_use = {
+        custom_voice_pack_key(entry.get("components") or [])
+        for entry in list_custom_voice_entries()
+    }
+    remove_custom_voice_pack(components, keep_keys=in_use)
+
+
 def clear_cached_custom_voice(voice_code: str | None = None) -> int:
     """Ensure cached blended tensors stay in sync after CRUD operations."""
     engine = tts_engine_instances.get("kokoro")
@@ -1341,36 +1418,88 @@ def split_text_into_chapters(text: str):
     return chapters
 
 
+def _chapters_from_outline(text: str, chapter_outline: Any) -> List[Dict[str, str]]:
+    """
+    Build chapter sections from structured offsets produced by document extraction.
+    Returns an empty list when the outline does not fit the supplied text.
+    """
+    if not isinstance(chapter_outline, list) or not chapter_outline:
+        return []
+
+    chapters = []
+    previous_end = 0
+    for idx, entry in enumerate(chapter_outline):
+        if not isinstance(entry, dict):
+            return []
+        try:
+            start = int(entry.get("start"))
+            end = int(entry.get("end"))
+        except (TypeError, ValueError):
+            return []
+        if start < previous_end or end <= start or end > len(text):
+            return []
+        if idx == 0 and start > 0:
+            pre_content = text[:start].strip()
+            if pre_content:
+                chapters.append({"title": "Title", "content": pre_content})
+        content = text[start:end].strip()
+        if content:
+            title = str(entry.get("title") or "").strip()
+            chapters.append({
+                "title": title or f"Chapter {idx + 1}",
+                "content": content
+            })
+        previous_end = end
+
+    return chapters
+
+
+def resolve_chapter_sections(text: str, chapter_outline: Any = None):
+    """
+    Return chapter sections, preferring the extractor's structured outline and
+    falling back to heading detection when none is supplied or it no longer matches.
+    """
+    if chapter_outline:
+        chapters = _chapters_from_outline(text, chapter_outline)
+        if chapters:
+            return chapters
+        logger.info("Ignoring stale chapter outline; falling back to heading detection")
+    return split_text_into_chapters(text)
+
+
 def build_gemini_sections(text: str, prefer_chapters: bool, config: dict):
-    """Create sections for Gemini processing based on chapters or chunks."""
-    sections = []
+    """
+    Create sections for Gemini processing, packed up to the configured token budget.
+    Chapters that fit stay whole; oversized chapters (or unchaptered text) are split
+    at paragraph boundaries.
+    """
     if not text:
-        return sections
+        return []
 
+    budget = _coerce_int(
+        config.get("gemini_section_token_budget"),
+        minimum=500,
+        maximum=200000,
+        fallback=DEFAULT_CONFIG["gemini_section_token_budget"],
+    )
     chapter_matches = list(CHAPTER_HEADING_PATTERN.finditer(text))
     if prefer_chapters and chapter_matches:
-        for chapter in split_text_into_chapters(text):
-            sections.append({
-                "title": chapter.get("title"),
-                "content": (chapter.get("content") or "").strip(),
-                "source": "chapter"
-            })
+        chapters = split_text_into_chapters(text)
     else:
-        processor = _create_text_processor_for_engine(config.get("tts_engine"), config.get('chunk_size', 500), config)
-        chunks = processor.chunk_text(text)
-        if not chunks:
-            chunks = [text]
-        for chunk in chunks:
-            clean_chunk = chunk.strip()
-            if not clean_chunk:
-                continue
-            sections.append({
-                "title": None,
-                "content": clean_chunk,
-                "source": "chunk"
-            })
+        chapters = [{"title": None, "content": text}]
+    return pack_sections(chapters, budget)
 
-    return sections
+
+def _parse_known_speakers(raw_known) -> List[str]:
+    """Normalize a client-supplied list of speaker tags."""
+    known_speakers = []
+    if isinstance(raw_known, list):
+        for entry in raw_known:
+            if isinstance(entry, str):
+                normalized = entry.strip().lower()
+                if normalized:
+                    known_speakers.append(normalized)
+    return known_speakers
 
 
 def compose_gemini_prompt(section: dict, prompt_prefix: str = "", known_speakers=None) -> str:
@@ -1420,12 +1549,13 @@ def estimate_total_chunks(
     include_full_story: bool = False,
     engine_name: Optional[str] = None,
     config: Optional[Dict] = None,
+    chapter_outline: Optional[List[Dict[str, Any]]] = None,
 ) -> int:
     """Estimate total chunk count for a job to power progress indicators."""
     processor = _create_text_processor_for_engine(engine_name or DEFAULT_CONFIG["tts_engine"], chunk_size, config)
     sections = [{"content": text}]
     if split_by_chapter:
-        detected = split_text_into_chapters(text)
+        detected = resolve_chapter_sections(text, chapter_outline)
         if detected:
             sections = detected
 
@@ -1447,6 +1577,7 @@ def save_job_metadata(job_dir: Path, metadata: dict):
     with open(metadata_path, 'w', encoding='utf-8') as f:
         json.dump(metadata, f, indent=2)
     invalidate_library_cache()
+    _forget_download_path(job_dir.name)
 
 
 def load_job_metadata(job_dir: Path):
@@ -1511,6 +1642,8 @@ def process_job_worker():
                     process_qwen3_voice_design_preview_task(job_data)
                 elif job_type == 'qwen3_voice_design_save':
                     process_qwen3_voice_design_save_task(job_data)
+                elif job_type == 'voice_prompt_transcribe':
+                    process_voice_prompt_transcribe_task(job_data)
                 else:
                     raise ValueError(f"Unsupported job type: {job_type}")
             except Exception as e:
@@ -1584,7 +1717,7 @@ def process_audio_job(job_data):
         # Determine chapter sections when requested
         chapter_sections = [{"title": "Full Story", "content": text}]
         if split_by_chapter:
-            detected = split_text_into_chapters(text)
+            detected = resolve_chapter_sections(text, job_data.get('chapter_outline'))
             if detected:
                 chapter_sections = detected
             else:
@@ -1698,6 +1831,12 @@ def process_audio_job(job_data):
                 supports_chunk_cb = True
             if "parallel_workers" in sig_params:
                 engine_kwargs["parallel_workers"] = max(1, min(10, int(config.get("parallel_chunks", 1) or 1)))
+            if "max_parallel_workers" in sig_params:
+                engine_kwargs["max_parallel_workers"] = _coerce_int(
+                    config.get("replicate_max_parallel_chunks"), minimum=1, maximum=25, fallback=10
+                )
+            if "group_by_speaker" in sig_params:
+                engine_kwargs["group_by_speaker"] = bool(config.get("group_chunks_by_speaker", False))
             audio_files = engine.generate_batch(**engine_kwargs)
 
             if not supports_chunk_cb and audio_files:
@@ -1989,6 +2128,75 @@ def process_qwen3_voice_design_save_task(job_data: Dict[str, Any]) -> None:
         raise
 
 
+def _enqueue_voice_prompt_transcribe_task(prompt_paths: List[Path]) -> str:
+    start_worker_thread()
+    job_id = str(uuid.uuid4())
+    job_entry = {
+        "status": "queued",
+        "progress": 0,
+        "created_at": datetime.now().isoformat(),
+        "job_type": "voice_prompt_transcribe",
+        "title": "Transcribe voice prompts",
+        "total_chunks": len(prompt_paths),
+        "processed_chunks": 0,
+    }
+    with queue_lock:
+        jobs[job_id] = job_entry
+    job_queue.put({
+        "job_id": job_id,
+        "job_type": "voice_prompt_transcribe",
+        "prompt_paths": [str(path) for path in prompt_paths],
+    })
+    return job_id
+
+
+def process_voice_prompt_transcribe_task(job_data: Dict[str, Any]) -> None:
+    """Transcribe every queued voice prompt with the shared ASR model."""
+    job_id = job_data["job_id"]
+    prompt_paths = [Path(path) for path in job_data.get("prompt_paths") or []]
+    transcriber = get_transcription_service()
+    transcriber.acquire()
+    transcripts: Dict[str, Optional[str]] = {}
+    try:
+        for index, path in enumerate(prompt_paths, start=1):
+            if cancel_flags.get(job_id, False):
+                raise JobCancelled()
+            with gpu_inference_lock:
+                transcripts[path.name] = transcriber.transcribe(path)
+            with queue_lock:
+                job_entry = jobs.get(job_id)
+                if job_entry:
+                    job_entry["processed_chunks"] = index
+                    job_entry["progress"] = int(index * 100 / max(1, len(prompt_paths)))
+        result = {
+            "transcripts": transcripts,
+            "transcribed": sum(1 for text in transcripts.values() if text),
+            "failed": sorted(name for name, text in transcripts.items() if not text),
+        }
+        with queue_lock:
+            job_entry = jobs.get(job_id)
+            if job_entry:
+                job_entry["status"] = "completed"
+                job_entry["progress"] = 100
+                job_entry["completed_at"] = datetime.now().isoformat()
+                job_entry["result"] = result
+    except JobCancelled:
+        with queue_lock:
+            job_entry = jobs.get(job_id)
+            if job_entry:
+                job_entry["status"] = "cancelled"
+    except Exception as exc:
+        with queue_lock:
+            job_entry = jobs.get(job_id)
+            if job_entry:
+                job_entry["status"] = "failed"
+                job_entry["error"] = str(exc)
+        raise
+    finally:
+        transcriber.release()
+        cancel_flags.pop(job_id, None)
+
+
 def start_worker_thread():
     """Start the background worker thread"""
     global worker_thread
@@ -2151,43 +2359,10 @@ def _get_audio_duration(file_path: Path) -> Optional[float]:
 
 # Cache for voice prompt durations to avoid re-reading files
 _voice_prompt_duration_cache: Dict[str, float] = {}
-_voice_prompt_transcript_cache: Optional[Dict[str, str]] = None
-
-
-def _load_voice_prompt_transcripts() -> Dict[str, str]:
-    """Load cached prompt transcripts from data/voice_prompts/transcripts.json."""
-    global _voice_prompt_transcript_cache
-    if _voice_prompt_transcript_cache is not None:
-        return _voice_prompt_transcript_cache
-    transcripts_path = VOICE_PROMPT_DIR / "transcripts.json"
-    if not transcripts_path.exists():
-        _voice_prompt_transcript_cache = {}
-        return _voice_prompt_transcript_cache
-    try:
-        with transcripts_path.open("r", encoding="utf-8") as handle:
-            data = json.load(handle)
-            _voice_prompt_transcript_cache = data.get("transcripts", {})
-            return _voice_prompt_transcript_cache
-    except Exception as exc:  # pragma: no cover - defensive
-        logger.warning("Failed to load voice prompt transcripts: %s", exc)
-        _voice_prompt_transcript_cache = {}
-        return _voice_prompt_transcript_cache
-
-
-def _save_voice_prompt_transcripts(transcripts: Dict[str, str]) -> None:
-    transcripts_path = VOICE_PROMPT_DIR / "transcripts.json"
-    transcripts_path.parent.mkdir(parents=True, exist_ok=True)
-    with transcripts_path.open("w", encoding="utf-8") as handle:
-        json.dump({"transcripts": transcripts}, handle, indent=2, ensure_ascii=False)
 
 
 def _set_voice_prompt_transcript(file_path: Path, transcript: str) -> None:
-    key = _voice_prompt_transcript_key(file_path)
-    if not key:
-        return
-    transcripts = _load_voice_prompt_transcripts()
-    transcripts[key] = transcript
-    _save_voice_prompt_transcripts(transcripts)
+    get_transcription_service().set_transcript(file_path, transcript)
 
 
 def _generate_voice_design_preview(payload: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, str]:
@@ -2274,15 +2449,6 @@ def _save_voice_design_payload(payload: Dict[str, Any]) -> Dict[str, Any]:
     return _serialize_chatterbox_voice(entry)
 
 
-def _voice_prompt_transcript_key(file_path: Path) -> Optional[str]:
-    try:
-        stat = file_path.stat()
-    except OSError:
-        return None
-    key_data = f"{file_path.name}:{stat.st_size}:{stat.st_mtime}"
-    return hashlib.md5(key_data.encode()).hexdigest()[:16]
-
-
 @app.route('/api/voice-prompts', methods=['GET'])
 def list_voice_prompts():
     """List available reference audio prompts."""
@@ -2291,7 +2457,7 @@ def list_voice_prompts():
         chatterbox_entries = _load_chatterbox_voice_entries()
         chatterbox_by_file = {e.get("file_name"): e for e in chatterbox_entries if e.get("file_name")}
         
-        transcripts = _load_voice_prompt_transcripts()
+        transcriber = get_transcription_service()
         prompts = []
         for path in sorted(VOICE_PROMPT_DIR.glob('*')):
             if not path.is_file():
@@ -2321,8 +2487,7 @@ def list_voice_prompts():
             language = registry_entry.get("language")
             display_name = registry_entry.get("name") or path.stem.replace('_', ' ').replace('-', ' ').title()
             
-            transcript_key = _voice_prompt_transcript_key(path)
-            prompt_transcript = transcripts.get(transcript_key) if transcript_key else None
+            prompt_transcript = transcriber.get_cached(path)
             prompts.append(
                 {
                     "name": path.name,
@@ -2386,6 +2551,56 @@ def upload_voice_prompt():
     ), 201
 
 
+@app.route('/api/voice-prompts/transcribe', methods=['POST'])
+def transcribe_voice_prompts():
+    """Queue a background job that transcribes voice prompts missing a transcript."""
+    if not SENSEVOICE_AVAILABLE:
+        return jsonify({
+            "success": False,
+            "error": "SenseVoice (funasr) is not installed. Install with: pip install funasr"
+        }), 400
+    payload = request.get_json(silent=True) or {}
+    requested = payload.get("names")
+    transcriber = get_transcription_service()
+
+    prompt_paths = []
+    for path in sorted(VOICE_PROMPT_DIR.glob('*')):
+        if not path.is_file() or path.suffix.lower() not in VOICE_PROMPT_EXTENSIONS:
+            continue
+        if requested and path.name not in requested:
+            continue
+        if transcriber.get_cached(path):
+            continue
+        prompt_paths.append(path)
+
+    if not prompt_paths:
+        return jsonify({"success": True, "task_id": None, "queued": 0})
+    task_id = _enqueue_voice_prompt_transcribe_task(prompt_paths)
+    return jsonify({"success": True, "task_id": task_id, "queued": len(prompt_paths)}), 202
+
+
+@app.route('/api/voice-prompts/transcribe/<task_id>', methods=['GET'])
+def voice_prompt_transcribe_status(task_id: str):
+    with queue_lock:
+        job_entry = jobs.get(task_id)
+        if not job_entry:
+            return jsonify({"success": False, "error": "Task not found."}), 404
+        if job_entry.get("job_type") != "voice_prompt_transcribe":
+            return jsonify({"success": False, "error": "Task type mismatch."}), 400
+        payload = {
+            "success": True,
+            "status": job_entry.get("status"),
+            "progress": job_entry.get("progress"),
+            "processed": job_entry.get("processed_chunks", 0),
+            "total": job_entry.get("total_chunks", 0),
+        }
+        if job_entry.get("status") == "completed":
+            payload["result"] = job_entry.get("result")
+        if job_entry.get("status") == "failed":
+            payload["error"] = job_entry.get("error")
+        return jsonify(payload)
+
+
 @app.route('/api/chatterbox-voices', methods=['GET'])
 def list_chatterbox_voices():
     entries = _load_chatterbox_voice_entries()
@@ -2944,12 +3159,182 @@ def request_full_job_regeneration(job_id: str):
         return jsonify({"success": False, "error": "Failed to queue full regeneration"}), 500
 
 
+def _collect_fx_targets(job_dir: Path, chunk_map: Dict[str, Dict[str, Any]], chunks_fx: List[Dict[str, Any]]):
+    """Resolve apply-fx request entries into audio files to process."""
+    targets: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    for fx_entry in chunks_fx:
+        chunk_id = (fx_entry.get("chunk_id") or "").strip()
+        if not chunk_id:
+            continue
+        
+        chunk = chunk_map.get(chunk_id)
+        if not chunk:
+            errors.append(f"Chunk {chunk_id} not found")
+            continue
+        
+        relative_file = chunk.get("relative_file")
+        if not relative_file:
+            errors.append(f"Chunk {chunk_id} has no audio file")
+            continue
+        
+        audio_path = job_dir / relative_file
+        if not audio_path.exists():
+            errors.append(f"Audio file not found for chunk {chunk_id}")
+            continue
+        
+        # Parse FX settings
+        speed = float(fx_entry.get("speed", 1.0) or 1.0)
+        pitch = float(fx_entry.get("pitch", 0.0) or 0.0)
+        
+        # Skip if no changes
+        if abs(speed - 1.0) < 1e-3 and abs(pitch) < 1e-3:
+            continue
+        
+        targets.append({
+            "chunk_id": chunk_id,
+            "path": str(audio_path),
+            "speed": speed,
+            "pitch": pitch,
+        })
+    return targets, errors
+
+
+def _run_fx_batch(targets: List[Dict[str, Any]], progress_cb=None, use_pool: bool = True):
+    """
+    Apply FX to every target, grouping chunks that share identical settings so each
+    worker compiles the FX chain once. Returns (processed targets, error messages).
+    """
+    from src.audio_effects import apply_fx_to_files
+    
+    groups: Dict[Tuple[float, float], List[Dict[str, Any]]] = defaultdict(list)
+    for target in targets:
+        groups[(target["speed"], target["pitch"])].append(target)
+    
+    batches = []
+    for (speed, pitch), members in groups.items():
+        for start in range(0, len(members), FX_BATCH_FILES_PER_TASK):
+            batches.append((members[start:start + FX_BATCH_FILES_PER_TASK], speed, pitch))
+    
+    def batch_args(members, speed, pitch):
+        # No blending for post-apply effects (blend_override=0 means no original mixed in)
+        return (
+            [member["path"] for member in members],
+            max(-12.0, min(12.0, pitch)),
+            max(0.5, min(2.0, speed)),
+            "neutral",
+            0.0,
+        )
+    
+    processed: List[Dict[str, Any]] = []
+    errors: List[str] = []
+    
+    def collect(members, results):
+        for member, error in zip(members, results):
+            if error:
+                errors.append(f"Failed to process chunk {member['chunk_id']}: {error}")
+            else:
+                processed.append(member)
+        if callable(progress_cb):
+            progress_cb(len(members))
+    
+    workers = max(1, min(os.cpu_count() or 1, len(batches), FX_BATCH_MAX_WORKERS))
+    if use_pool and workers > 1:
+        future_map = {
+            fx_worker_executor.submit(apply_fx_to_files, *batch_args(members, speed, pitch)): members
+            for members, speed, pitch in batches
+        }
+        for future in as_completed(future_map):
+            members = future_map[future]
+            try:
+                results = future.result()
+            except Exception as exc:  # noqa: BLE001
+                results = [str(exc)] * len(members)
+            collect(members, results)
+    else:
+        for members, speed, pitch in batches:
+            collect(members, apply_fx_to_files(*batch_args(members, speed, pitch)))
+    
+    return processed, errors
+
+
+def _record_fx_results(job_id: str, job_dir: Path, processed: List[Dict[str, Any]]):
+    """Stamp processed chunks and persist chunk metadata once."""
+    if not processed:
+        return
+    applied_at = datetime.now().isoformat()
+    by_id = {target["chunk_id"]: target for target in processed}
+    with queue_lock:
+        job_entry = jobs.get(job_id)
+        if job_entry:
+            for c in job_entry.get("chunks", []):
+                target = by_id.get(c.get("id"))
+                if target:
+                    c["fx_applied"] = {"speed": target["speed"], "pitch": target["pitch"]}
+                    c["modified_at"] = applied_at
+    _persist_chunks_metadata(job_id, job_dir)
+
+
+def _schedule_fx_batch(job_id: str, job_dir: Path, targets: List[Dict[str, Any]], errors: List[str]) -> str:
+    """Register an audio_fx_batch task in the job table and run it in the background."""
+    task_id = str(uuid.uuid4())
+    total = len(targets)
+    with queue_lock:
+        jobs[task_id] = {
+            "status": "queued",
+            "progress": 0,
+            "created_at": datetime.now().isoformat(),
+            "job_type": "audio_fx_batch",
+            "title": "Apply FX",
+            "text_preview": f"Apply FX to {total} chunk(s)",
+            "parent_job_id": job_id,
+            "total_chunks": total,
+            "processed_chunks": 0,
+        }
+    
+    def update_progress(increment: int):
+        with queue_lock:
+            task_entry = jobs.get(task_id)
+            if task_entry:
+                done = min(total, task_entry.get("processed_chunks", 0) + increment)
+                task_entry["processed_chunks"] = done
+                task_entry["progress"] = int((done / total) * 100) if total else 100
+                task_entry["last_update"] = datetime.now().isoformat()
+    
+    def task():
+        with queue_lock:
+            jobs[task_id]["status"] = "processing"
+            jobs[task_id]["started_at"] = datetime.now().isoformat()
+        try:
+            processed, batch_errors = _run_fx_batch(targets, progress_cb=update_progress)
+            _record_fx_results(job_id, job_dir, processed)
+            with queue_lock:
+                task_entry = jobs[task_id]
+                task_entry["status"] = "completed"
+                task_entry["progress"] = 100
+                task_entry["completed_at"] = datetime.now().isoformat()
+                task_entry["result"] = {
+                    "processed": len(processed),
+                    "chunk_ids": [target["chunk_id"] for target in processed],
+                    "errors": (errors + batch_errors) or None,
+                }
+        except Exception as exc:  # noqa: BLE001
+            logger.error("Batch FX failed for job %s: %s", job_id, exc, exc_info=True)
+            with queue_lock:
+                jobs[task_id]["status"] = "failed"
+                jobs[task_id]["error"] = str(exc)
+    
+    fx_batch_executor.submit(task)
+    return task_id
+
+
 @app.route('/api/jobs/<job_id>/review/apply-fx', methods=['POST'])
 def apply_chunk_audio_effects(job_id: str):
-    """Apply audio effects (speed, pitch) to one or more chunks without regenerating."""
-    from src.audio_effects import AudioPostProcessor, VoiceFXSettings
-    import soundfile as sf
-    
+    """
+    Apply audio effects (speed, pitch) to one or more chunks without regenerating.
+    A single chunk is processed inline; larger requests run as a background
+    audio_fx_batch task whose progress is available from the fx-tasks endpoint.
+    """
     data = request.json or {}
     chunks_fx = data.get("chunks") or []
     
@@ -2966,77 +3351,27 @@ def apply_chunk_audio_effects(job_id: str):
             job_chunks = job_entry.get("chunks") or []
             chunk_map = {c.get("id"): c for c in job_chunks if c.get("id")}
         
-        processor = AudioPostProcessor()
-        processed_count = 0
-        errors = []
+        targets, errors = _collect_fx_targets(job_dir, chunk_map, chunks_fx)
         
-        for fx_entry in chunks_fx:
-            chunk_id = (fx_entry.get("chunk_id") or "").strip()
-            if not chunk_id:
-                continue
-            
-            chunk = chunk_map.get(chunk_id)
-            if not chunk:
-                errors.append(f"Chunk {chunk_id} not found")
-                continue
-            
-            relative_file = chunk.get("relative_file")
-            if not relative_file:
-                errors.append(f"Chunk {chunk_id} has no audio file")
-                continue
-            
-            audio_path = job_dir / relative_file
-            if not audio_path.exists():
-                errors.append(f"Audio file not found for chunk {chunk_id}")
-                continue
-            
-            # Parse FX settings
-            speed = float(fx_entry.get("speed", 1.0) or 1.0)
-            pitch = float(fx_entry.get("pitch", 0.0) or 0.0)
-            
-            # Skip if no changes
-            if abs(speed - 1.0) < 1e-3 and abs(pitch) < 1e-3:
-                continue
-            
-            try:
-                # Load audio
-                audio_data, sample_rate = sf.read(str(audio_path), dtype='float32')
-                
-                # Create FX settings - use no blending for post-apply effects
-                fx = VoiceFXSettings(
-                    pitch_semitones=max(-12.0, min(12.0, pitch)),
-                    speed=max(0.5, min(2.0, speed)),
-                    tone="neutral"
-                )
-                
-                # Apply effects without blending (blend_override=0 means no original mixed in)
-                processed = processor.apply(audio_data, sample_rate, fx, blend_override=0.0)
-                
-                # Save back to file
-                sf.write(str(audio_path), processed, sample_rate)
-                
-                # Update chunk metadata
-                with queue_lock:
-                    job_entry = jobs.get(job_id)
-                    if job_entry:
-                        for c in job_entry.get("chunks", []):
-                            if c.get("id") == chunk_id:
-                                c["fx_applied"] = {"speed": speed, "pitch": pitch}
-                                c["modified_at"] = datetime.now().isoformat()
-                                break
-                
-                processed_count += 1
-                
-            except Exception as exc:
-                logger.error("Failed to apply FX to chunk %s: %s", chunk_id, exc, exc_info=True)
-                errors.append(f"Failed to process chunk {chunk_id}: {str(exc)}")
+        if len(targets) > 1:
+            task_id = _schedule_fx_batch(job_id, job_dir, targets, errors)
+            return jsonify({
+                "success": True,
+                "task_id": task_id,
+                "status": "queued",
+                "queued": len(targets),
+                "errors": errors if errors else None
+            }), 202
+        
+        processed, batch_errors = _run_fx_batch(targets, use_pool=False)
+        errors.extend(batch_errors)
         
         # Persist metadata changes
-        _persist_chunks_metadata(job_id, job_dir)
+        _record_fx_results(job_id, job_dir, processed)
         
         return jsonify({
             "success": True,
-            "processed": processed_count,
+            "processed": len(processed),
             "errors": errors if errors else None
         })
         
@@ -3047,6 +3382,29 @@ def apply_chunk_audio_effects(job_id: str):
         return jsonify({"success": False, "error": "Failed to apply audio effects"}), 500
 
 
+@app.route('/api/jobs/<job_id>/review/fx-tasks/<task_id>', methods=['GET'])
+def apply_fx_task_status(job_id: str, task_id: str):
+    """Report progress for a background batch FX task."""
+    with queue_lock:
+        task_entry = jobs.get(task_id)
+        if not task_entry or task_entry.get("parent_job_id") != job_id:
+            return jsonify({"success": False, "error": "Task not found."}), 404
+        if task_entry.get("job_type") != "audio_fx_batch":
+            return jsonify({"success": False, "error": "Task type mismatch."}), 400
+        payload = {
+            "success": True,
+            "status": task_entry.get("status"),
+            "progress": task_entry.get("progress"),
+            "processed_chunks": task_entry.get("processed_chunks", 0),
+            "total_chunks": task_entry.get("total_chunks"),
+        }
+        if task_entry.get("status") == "completed":
+            payload["result"] = task_entry.get("result")
+        if task_entry.get("status") == "failed":
+            payload["error"] = task_entry.get("error")
+        return jsonify(payload)
+
+
 @app.route('/api/jobs/<job_id>/review/preview-fx', methods=['POST'])
 def preview_chunk_audio_effects(job_id: str):
     """Preview audio effects on a chunk without saving. Returns the processed audio file."""
@@ -3347,7 +3705,8 @@ def custom_voices_collection():
     payload["created_at"] = now
     payload["updated_at"] = now
     saved = save_custom_voice(payload)
-    clear_cached_custom_voice()
+    clear_cached_custom_voice(f"{CUSTOM_CODE_PREFIX}{saved['id']}")
+    _precompute_custom_voice_pack_async(saved)
     return jsonify({
         "success": True,
         "voice": _to_public_custom_voice(saved),
@@ -3367,6 +3726,7 @@ def custom_voice_detail(voice_id):
     if request.method == 'DELETE':
         delete_custom_voice(raw["id"])
         clear_cached_custom_voice(f"{CUSTOM_CODE_PREFIX}{raw['id']}")
+        _discard_custom_voice_pack(raw.get("components") or [])
         return jsonify({"success": True, "deleted": True})
 
     try:
@@ -3379,6 +3739,8 @@ def custom_voice_detail(voice_id):
     payload["updated_at"] = datetime.now().isoformat()
     updated = replace_custom_voice(payload)
     clear_cached_custom_voice(f"{CUSTOM_CODE_PREFIX}{raw['id']}")
+    _discard_custom_voice_pack(raw.get("components") or [])
+    _precompute_custom_voice_pack_async(updated)
     return jsonify({"success": True, "voice": _to_public_custom_voice(updated)})
 
 
@@ -3395,8 +3757,12 @@ def settings():
         try:
             new_settings = request.json
             config = load_config()
+            previous_key = config.get('gemini_api_key')
             config.update(new_settings)
             save_config(config)
+            if config.get('gemini_api_key') != previous_key:
+                # Stop reusing SDK clients bound to the old key
+                clear_clients()
             
             return jsonify({
                 "success": True,
@@ -3535,32 +3901,51 @@ def process_text_with_gemini():
                 "error": "Unable to create sections for Gemini processing"
             }), 400
 
-        processor = GeminiProcessor(api_key=api_key, model_name=model_name)
+        processor = GeminiProcessor(
+            api_key=api_key,
+            model_name=model_name,
+            use_cache=not bool(data.get('bypass_cache', False)),
+        )
         text_processor = TextProcessor(chunk_size=config.get('chunk_size', 500))
         known_speakers = set(text_processor.extract_speakers(text))
+        max_workers = _coerce_int(
+            data.get('concurrency', config.get('gemini_max_concurrency')),
+            minimum=1,
+            maximum=16,
+            fallback=DEFAULT_CONFIG['gemini_max_concurrency'],
+        )
 
-        processed_sections = []
-        for idx, section in enumerate(sections, start=1):
-            chapter_text = section.get('content', '').strip()
-            if not chapter_text:
-                continue
-
-            combined_prompt = compose_gemini_prompt(
-                section,
-                prompt_prefix,
-                sorted(known_speakers)
+        if max_workers > 1:
+            # Discovery pass + parallel sections + tag reconciliation
+            pipeline = SectionPipeline(
+                processor,
+                lambda section, speakers: compose_gemini_prompt(section, prompt_prefix, speakers),
+                max_workers=max_workers,
             )
-            response_text = processor.generate_text(combined_prompt)
-            detected_speakers = text_processor.extract_speakers(response_text)
-            for speaker_name in detected_speakers:
-                known_speakers.add(speaker_name)
-            processed_sections.append({
-                "index": idx,
-                "title": section.get('title'),
-                "source": section.get('source'),
-                "output": response_text.strip(),
-                "speakers": detected_speakers
-            })
+            processed_sections = pipeline.run(sections, seed_speakers=sorted(known_speakers))["sections"]
+        else:
+            processed_sections = []
+            for idx, section in enumerate(sections, start=1):
+                chapter_text = section.get('content', '').strip()
+                if not chapter_text:
+                    continue
+
+                combined_prompt = compose_gemini_prompt(
+                    section,
+                    prompt_prefix,
+                    sorted(known_speakers)
+                )
+                response_text = processor.generate_text(combined_prompt)
+                detected_speakers = text_processor.extract_speakers(response_text)
+                for speaker_name in detected_speakers:
+                    known_speakers.add(speaker_name)
+                processed_sections.append({
+                    "index": idx,
+                    "title": section.get('title'),
+                    "source": section.get('source'),
+                    "output": response_text.strip(),
+                    "speakers": detected_speakers
+                })
 
         if not processed_sections:
             return jsonify({
@@ -3626,7 +4011,11 @@ def process_full_text_with_gemini():
         prompt_parts.append(text)
         combined_prompt = "\n\n".join(part.strip() for part in prompt_parts if part).strip()
 
-        processor = GeminiProcessor(api_key=api_key, model_name=model_name)
+        processor = GeminiProcessor(
+            api_key=api_key,
+            model_name=model_name,
+            use_cache=not bool(data.get('bypass_cache', False)),
+        )
         response_text = processor.generate_text(combined_prompt)
 
         return jsonify({
@@ -3712,16 +4101,13 @@ def process_gemini_section():
         model_name = config.get('gemini_model') or DEFAULT_GEMINI_MODEL
         prompt_prefix = prompt_override or (config.get('gemini_prompt') or '').strip()
 
-        raw_known = data.get('known_speakers') or []
-        known_speakers = []
-        if isinstance(raw_known, list):
-            for entry in raw_known:
-                if isinstance(entry, str):
-                    normalized = entry.strip().lower()
-                    if normalized:
-                        known_speakers.append(normalized)
+        known_speakers = _parse_known_speakers(data.get('known_speakers'))
 
-        processor = GeminiProcessor(api_key=api_key, model_name=model_name)
+        processor = GeminiProcessor(
+            api_key=api_key,
+            model_name=model_name,
+            use_cache=not bool(data.get('bypass_cache', False)),
+        )
         text_processor = TextProcessor()
         prompt = compose_gemini_prompt(
             {"content": content},
@@ -3750,6 +4136,86 @@ def process_gemini_section():
         }), 500
 
 
+@app.route('/api/gemini/process-section/stream', methods=['POST'])
+def stream_gemini_section():
+    """Process a single section via Gemini, streaming the output as Server-Sent Events.
+
+    Events: ``token`` (raw text delta), ``paragraph`` (a finished paragraph with
+    its speakers, safe to analyze or stage), ``done`` (full result) and ``error``.
+    """
+    data = request.json or {}
+    content = (data.get('content') or '').strip()
+    prompt_override = (data.get('prompt_override') or '').strip()
+
+    if not content:
+        return jsonify({
+            "success": False,
+            "error": "No section content provided"
+        }), 400
+
+    config = load_config()
+    api_key = (config.get('gemini_api_key') or '').strip()
+    if not api_key:
+        return jsonify({
+            "success": False,
+            "error": "Gemini API key not configured"
+        }), 400
+
+    model_name = config.get('gemini_model') or DEFAULT_GEMINI_MODEL
+    prompt_prefix = prompt_override or (config.get('gemini_prompt') or '').strip()
+    known_speakers = _parse_known_speakers(data.get('known_speakers'))
+    use_cache = not bool(data.get('bypass_cache', False))
+
+    def sse(event: str, payload: Dict[str, Any]) -> str:
+        return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+    def generate():
+        text_processor = TextProcessor()
+        assembler = ParagraphAssembler()
+        parts: List[str] = []
+        paragraph_index = 0
+
+        def paragraph_events(paragraphs):
+            nonlocal paragraph_index
+            for paragraph in paragraphs:
+                yield sse("paragraph", {
+                    "index": paragraph_index,
+                    "text": paragraph,
+                    "speakers": text_processor.extract_speakers(paragraph),
+                })
+                paragraph_index += 1
+
+        try:
+            processor = GeminiProcessor(api_key=api_key, model_name=model_name, use_cache=use_cache)
+            prompt = compose_gemini_prompt({"content": content}, prompt_prefix, known_speakers)
+            for delta in processor.stream_text(prompt):
+                parts.append(delta)
+                yield sse("token", {"text": delta})
+                yield from paragraph_events(assembler.feed(delta))
+            yield from paragraph_events(assembler.finish())
+
+            result_text = "".join(parts).strip()
+            yield sse("done", {
+                "success": True,
+                "result_text": result_text,
+                "speakers": text_processor.extract_speakers(result_text),
+            })
+        except GeminiProcessorError as exc:
+            yield sse("error", {"success": False, "error": str(exc)})
+        except Exception as e:  # pragma: no cover - general failure
+            logger.error(f"Error streaming Gemini section: {e}", exc_info=True)
+            yield sse("error", {"success": False, "error": "Failed to process section with Gemini"})
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+        },
+    )
+
+
 @app.route('/api/generate', methods=['POST'])
 def generate_audio():
     """Add audio generation job to queue"""
@@ -3767,6 +4233,7 @@ def generate_audio():
         requested_engine = (data.get('tts_engine') or '').strip().lower()
         engine_options = data.get('engine_options') if isinstance(data.get('engine_options'), dict) else None
         review_mode = bool(data.get('review_mode', False))
+        chapter_outline = data.get('chapters') if split_by_chapter and isinstance(data.get('chapters'), list) else None
 
         if not text:
             return jsonify({
@@ -3824,6 +4291,7 @@ def generate_audio():
             include_full_story=generate_full_story,
             engine_name=active_engine,
             config=config,
+            chapter_outline=chapter_outline,
         )
         
         merge_options = {
@@ -3865,6 +4333,7 @@ def generate_audio():
             "total_chunks": estimated_chunks,
             "review_mode": review_mode,
             "merge_options": merge_options,
+            "chapter_outline": chapter_outline,
         }
 
         # Add to queue
@@ -3886,18 +4355,112 @@ def generate_audio():
         }), 500
 
 
+AUDIO_DOWNLOAD_EXTENSIONS = ('mp3', 'wav', 'ogg', 'm4b', 'flac')
+DOWNLOAD_PATH_CACHE_SIZE = 256
+# job_id -> (resolved output file, job directory stamp it was resolved under), least recently used first
+_download_paths: "OrderedDict[str, Tuple[Path, Tuple[int, int]]]" = OrderedDict()
+_download_paths_lock = threading.Lock()
+
+
+def _job_output_stamp(job_dir: Path) -> Optional[Tuple[int, int]]:
+    """Directory and metadata mtimes; writing a new output file or metadata changes one of them."""
+    try:
+        dir_mtime = job_dir.stat().st_mtime_ns
+    except OSError:
+        return None
+    try:
+        metadata_mtime = (job_dir / JOB_METADATA_FILENAME).stat().st_mtime_ns
+    except OSError:
+        metadata_mtime = 0
+    return dir_mtime, metadata_mtime
+
+
+def _forget_download_path(job_id: Optional[str] = None) -> None:
+    """Drop the remembered output file for ``job_id`` (or for every job)."""
+    with _download_paths_lock:
+        if job_id is None:
+            _download_paths.clear()
+        else:
+            _download_paths.pop(job_id, None)
+
+
+def _audio_etag(file_path: Path, stat_result: os.stat_result) -> str:
+    """Strong validator derived from path, size and nanosecond mtime."""
+    digest = hashlib.sha1(f"{file_path.resolve()}:{stat_result.st_size}:{stat_result.st_mtime_ns}".encode())
+    return digest.hexdigest()[:24]
+
+
+def _send_audio_file(file_path: Path, *, as_attachment: bool = False, download_name: Optional[str] = None):
+    """
+    Serve an audio file with Range, strong ETag and If-None-Match/If-Range support.
+    Werkzeug streams through wsgi.file_wrapper (sendfile under gunicorn/waitress),
+    or hands the file to the front-end server when USE_X_SENDFILE is enabled.
+    """
+    stat_result = file_path.stat()
+    mimetype = mimetypes.guess_type(file_path.name)[0] or 'application/octet-stream'
+    response = send_file(
+        file_path,
+        mimetype=mimetype,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=_audio_etag(file_path, stat_result),
+        last_modified=stat_result.st_mtime,
+        max_age=0,
+    )
+    response.headers['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def _resolve_job_audio(job_id: str) -> Optional[Path]:
+    """
+    Find a job's combined output file, remembering the answer for later requests
+    until the job directory or its metadata changes.
+    """
+    job_dir = OUTPUT_DIR / job_id
+    stamp = _job_output_stamp(job_dir)
+    if stamp is None:
+        _forget_download_path(job_id)
+        return None
+    with _download_paths_lock:
+        cached = _download_paths.get(job_id)
+        if cached is not None and cached[1] == stamp and cached[0].exists():
+            _download_paths.move_to_end(job_id)
+            return cached[0]
+
+    candidates = [job_dir / f"output.{ext}" for ext in AUDIO_DOWNLOAD_EXTENSIONS]
+    existing = [path for path in candidates if path.exists()]
+    if not existing:
+        return None
+    if len(existing) > 1:
+        # Only consult settings when several formats exist side by side
+        preferred = load_config().get('output_format', 'mp3')
+        existing.sort(key=lambda path: path.suffix.lstrip('.') != preferred)
+    with _download_paths_lock:
+        _download_paths[job_id] = (existing[0], stamp)
+        _download_paths.move_to_end(job_id)
+        while len(_download_paths) > DOWNLOAD_PATH_CACHE_SIZE:
+            _download_paths.popitem(last=False)
+    return existing[0]
+
+
+@app.route('/static/audio/<job_id>/<path:filename>', methods=['GET'])
+def serve_job_audio(job_id, filename):
+    """Serve generated audio (players seek with Range requests instead of re-downloading)."""
+    job_dir = OUTPUT_DIR / job_id
+    safe_path = safe_join(str(job_dir), filename)
+    if safe_path is None or not os.path.isfile(safe_path):
+        abort(404)
+    return _send_audio_file(Path(safe_path))
+
+
 @app.route('/api/download/<job_id>', methods=['GET'])
 def download_audio(job_id):
     """Download generated audio"""
     try:
         logger.info(f"Download request for job {job_id}")
 
-        # Get output format from config
-        config = load_config()
-        output_format = config.get('output_format', 'mp3')
         requested_file = request.args.get('file') if request else None
-
-        # Try to find the file - check both mp3 and wav
         file_path = None
         job_dir = OUTPUT_DIR / job_id
 
@@ -3909,17 +4472,11 @@ def download_audio(job_id):
                     "error": "Invalid file path"
                 }), 400
             candidate_path = job_dir / safe_relative
-            if candidate_path.exists():
+            if candidate_path.is_file():
                 file_path = candidate_path
-                output_format = candidate_path.suffix.lstrip('.')
 
         if file_path is None:
-            for ext in [output_format, 'mp3', 'wav', 'ogg']:
-                test_path = job_dir / f"output.{ext}"
-                if test_path.exists():
-                    file_path = test_path
-                    output_format = ext
-                    break
+            file_path = _resolve_job_audio(job_id)
 
         if not file_path or not file_path.exists():
             logger.error(f"File not found for job {job_id} in {job_dir}")
@@ -3929,10 +4486,10 @@ def download_audio(job_id):
             }), 404
 
         logger.info(f"Sending file: {file_path}")
-        return send_file(
+        return _send_audio_file(
             file_path,
             as_attachment=True,
-            download_name=f"kokoro_story_{job_id}.{output_format}"
+            download_name=f"kokoro_story_{job_id}{file_path.suffix}"
         )
         
     except Exception as e:
@@ -3943,6 +4500,30 @@ def download_audio(job_id):
         }), 500
 
 
+def _bundle_cache_path(job_id: str, job_dir: Path, entries: List[Tuple[Path, str]]) -> Path:
+    """
+    Cached ZIP location for a job. The name changes whenever the metadata or any
+    bundled file is rewritten (batch FX edits chunk audio without touching metadata).
+    """
+    digest = hashlib.sha256()
+    metadata_path = job_dir / JOB_METADATA_FILENAME
+    for file_path, arcname in [(metadata_path, JOB_METADATA_FILENAME), *entries]:
+        stat_result = file_path.stat() if file_path.exists() else None
+        stamp = f"{stat_result.st_size}:{stat_result.st_mtime_ns}" if stat_result else "-"
+        digest.update(f"{arcname}\0{stamp}\0".encode("utf-8"))
+    return BUNDLE_CACHE_DIR / f"{job_id}-{digest.hexdigest()[:16]}.zip"
+
+
+def _remove_job_bundles(job_id: Optional[str] = None) -> None:
+    """Delete cached ZIP bundles for ``job_id`` (or for every job)."""
+    pattern = f"{job_id}-*.zip" if job_id else "*.zip"
+    for bundle in BUNDLE_CACHE_DIR.glob(pattern):
+        try:
+            bundle.unlink(missing_ok=True)
+        except OSError:
+            pass  # still being served to another client (Windows); replaced next time
+
+
 @app.route('/api/download/<job_id>/zip', methods=['GET'])
 def download_audio_bundle(job_id):
     """Download all chapter outputs for a job as a ZIP archive."""
@@ -3961,33 +4542,26 @@ def download_audio_bundle(job_id):
             # Fallback to single-file download
             return download_audio(job_id)
 
-        zip_buffer = io.BytesIO()
-        with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            for chapter in (chapters or []):
-                rel_path = chapter.get("relative_path")
-                if not rel_path:
-                    continue
-                file_path = job_dir / Path(rel_path)
-                if not file_path.exists():
-                    continue
-                arc_name = Path(rel_path).as_posix()
-                zip_file.write(file_path, arcname=arc_name)
-
-            if full_story:
-                rel_path = full_story.get("relative_path")
-                if rel_path:
-                    file_path = job_dir / Path(rel_path)
-                    if file_path.exists():
-                        arc_name = Path(rel_path).as_posix()
-                        zip_file.write(file_path, arcname=arc_name)
-
-        zip_buffer.seek(0)
-        return send_file(
-            zip_buffer,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f"kokoro_story_{job_id}.zip"
-        )
+        entries = []
+        for item in [*(chapters or []), full_story or {}]:
+            rel_path = item.get("relative_path")
+            if not rel_path:
+                continue
+            file_path = job_dir / Path(rel_path)
+            if file_path.exists():
+                entries.append((file_path, Path(rel_path).as_posix()))
+
+        download_name = f"kokoro_story_{job_id}.zip"
+        cache_path = None
+        if load_config().get("cache_zip_bundles", False):
+            cache_path = _bundle_cache_path(job_id, job_dir, entries)
+            if cache_path.exists():
+                return _send_audio_file(cache_path, as_attachment=True, download_name=download_name)
+            _remove_job_bundles(job_id)
+
+        response = Response(stream_with_context(stream_zip(entries, cache_path)), mimetype='application/zip')
+        response.headers['Content-Disposition'] = f'attachment; filename="{download_name}"'
+        return response
 
     except Exception as e:
         logger.error(f"Error generating ZIP for job {job_id}: {e}", exc_info=True)
@@ -4314,6 +4888,8 @@ def delete_library_item(job_id):
         if job_id in jobs:
             del jobs[job_id]
         invalidate_library_cache()
+        _forget_download_path(job_id)
+        _remove_job_bundles(job_id)
         
         return jsonify({
             "success": True
@@ -4339,6 +4915,8 @@ def clear_library():
         
         # Clear jobs dict
         jobs.clear()
+        _forget_download_path()
+        _remove_job_bundles()
         
         return jsonify({
             "success": True
@@ -4443,7 +5021,8 @@ def extract_document_text():
     
     try:
         file_content = file.read()
-        text, format_name = extract_text_from_file(filename, file_content)
+        document = extract_document_from_file(filename, file_content)
+        text, format_name = document.text, document.format_name
         
         if not text.strip():
             return jsonify({
@@ -4458,6 +5037,7 @@ def extract_document_text():
             "filename": filename,
             "char_count": len(text),
             "word_count": len(text.split()),
+            "chapters": [chapter.to_dict() for chapter in document.chapters],
         })
     except ValueError as e:
         return jsonify({"success": False, "error": str(e)}), 400
@@ -4506,6 +5086,13 @@ def health_check():
         "cuda_available": False if not KOKORO_AVAILABLE else __import__('torch').cuda.is_available(),
         "vram": vram_info,
         "loaded_engines": list(tts_engine_instances.keys()),
+        "engine_stats": {
+            key: instance.get_generation_stats()
+            for key, instance in list(tts_engine_instances.items())
+            if hasattr(instance, "get_generation_stats")
+        },
+        "kokoro_pipeline_memory": getattr(tts_engine_instances.get("kokoro"), "pipeline_memory", {}),
+        "llm_cache": get_llm_cache().snapshot(),
     })
 
 
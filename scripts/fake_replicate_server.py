@@ -0,0 +1,399 @@
+"""Local stand-in for the Replicate predictions and files API.
+
+Serves just enough of ``/v1/predictions`` and ``/v1/files`` for
+``src.replicate_transport`` and the Replicate engines to run whole batches
+offline: predictions are created (honouring ``Prefer: wait``), polled,
+cancelled, and their output is a short generated WAV; reference clips can be
+uploaded, inspected, downloaded and deleted. Faults can be injected at a fixed
+rate with a seed, or replayed exactly from a scenario file, so throttling,
+server errors and failed predictions are reproducible.
+
+Usage
+-----
+python scripts/fake_replicate_server.py [--port 8765] [--latency 1.5]
+    [--throttle-rate 0.1] [--error-rate 0.05] [--fail-rate 0.02] [--seed 7]
+    [--scenario faults.json] [--record requests.jsonl]
+
+Then point the app at it (the transport and the replicate client read
+different variables)::
+
+    REPLICATE_API_BASE_URL=http://127.0.0.1:8765/v1 \\
+    REPLICATE_BASE_URL=http://127.0.0.1:8765 python app.py
+
+Options
+-------
+--latency        Seconds each prediction takes to "run" (default 1.0).
+--throttle-rate  Fraction of create calls answered with HTTP 429.
+--error-rate     Fraction of create calls answered with HTTP 503.
+--fail-rate      Fraction of predictions that finish with status "failed".
+--retry-after    Retry-After header sent with 429 responses (default 1).
+--seed           Seed for the fault RNG so a run can be repeated.
+--scenario       JSON list of outcomes ("ok", "failed", or an HTTP status such
+                 as "429", "500", "503") consumed in order by create calls;
+                 overrides the rates until exhausted.
+--record         Append one JSON line per create call (input and outcome), which
+                 can be turned back into a scenario file.
+"""
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import math
+import random
+import struct
+import threading
+import time
+import uuid
+import wave
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Sequence, Tuple
+
+SAMPLE_RATE = 24000
+FILE_TTL = timedelta(hours=24)
+
+
+def _tone_wav(seconds: float = 0.5, frequency: float = 220.0) -> bytes:
+    frames = int(SAMPLE_RATE * seconds)
+    samples = (
+        int(0.2 * 32767 * math.sin(2 * math.pi * frequency * i / SAMPLE_RATE))
+        for i in range(frames)
+    )
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(SAMPLE_RATE)
+        handle.writeframes(b"".join(struct.pack("<h", sample) for sample in samples))
+    return buffer.getvalue()
+
+
+def _parse_multipart(content_type: str, body: bytes) -> Tuple[Optional[Tuple[str, str, bytes]], Dict[str, str]]:
+    """Return ``((filename, content_type, data) | None, form fields)`` from a multipart body."""
+    message = BytesParser(policy=HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode("latin-1") + body
+    )
+    upload = None
+    fields: Dict[str, str] = {}
+    if not message.is_multipart():
+        return upload, fields
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        data = part.get_payload(decode=True) or b""
+        filename = part.get_filename()
+        if filename is not None:
+            upload = (filename, part.get_content_type(), data)
+        elif name:
+            fields[name] = data.decode("utf-8", "replace")
+    return upload, fields
+
+
+class FakeReplicate:
+    """Prediction and file state shared by all handler threads."""
+
+    def __init__(
+        self,
+        *,
+        latency: float = 1.0,
+        throttle_rate: float = 0.0,
+        error_rate: float = 0.0,
+        fail_rate: float = 0.0,
+        retry_after: str = "1",
+        seed: Optional[int] = None,
+        scenario: Optional[Sequence[str]] = None,
+        record_path: Optional[str] = None,
+    ):
+        self.latency = max(0.0, latency)
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.fail_rate = fail_rate
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.scenario: List[str] = [str(item) for item in scenario or []]
+        self.record_path = record_path
+        self.predictions: Dict[str, Dict] = {}
+        self.files: Dict[str, Dict] = {}
+        self.audio = _tone_wav()
+        self.lock = threading.Lock()
+        # Counters tests and recordings can inspect
+        self.outcomes: List[str] = []
+        self.active_creates = 0
+        self.max_active_creates = 0
+
+    def next_outcome(self) -> str:
+        with self.lock:
+            if self.scenario:
+                outcome = self.scenario.pop(0)
+            else:
+                roll = self.rng.random()
+                if roll < self.throttle_rate:
+                    outcome = "429"
+                elif roll < self.throttle_rate + self.error_rate:
+                    outcome = "503"
+                elif roll < self.throttle_rate + self.error_rate + self.fail_rate:
+                    outcome = "failed"
+                else:
+                    outcome = "ok"
+            self.outcomes.append(outcome)
+            return outcome
+
+    def record(self, payload: Dict, outcome: str) -> None:
+        if not self.record_path:
+            return
+        with self.lock, open(self.record_path, "a", encoding="utf-8") as handle:
+            handle.write(json.dumps({"input": payload.get("input"), "outcome": outcome}) + "\n")
+
+    def create(self, base_url: str, outcome: str, payload: Dict) -> Dict:
+        prediction_id = uuid.uuid4().hex[:12]
+        prediction = {
+            "id": prediction_id,
+            "status": "starting",
+            "input": payload.get("input"),
+            "output": None,
+            "error": None,
+            "urls": {
+                "get": f"{base_url}/v1/predictions/{prediction_id}",
+                "cancel": f"{base_url}/v1/predictions/{prediction_id}/cancel",
+            },
+            "_ready_at": time.monotonic() + self.latency,
+            "_outcome": outcome,
+            "_output": f"{base_url}/outputs/{prediction_id}.wav",
+        }
+        with self.lock:
+            self.predictions[prediction_id] = prediction
+        return prediction
+
+    def view(self, prediction_id: str) -> Optional[Dict]:
+        with self.lock:
+            prediction = self.predictions.get(prediction_id)
+            if prediction is None:
+                return None
+            if prediction["status"] not in ("succeeded", "failed", "canceled"):
+                if time.monotonic() >= prediction["_ready_at"]:
+                    if prediction["_outcome"] == "failed":
+                        prediction["status"] = "failed"
+                        prediction["error"] = "Injected prediction failure"
+                    else:
+                        prediction["status"] = "succeeded"
+                        prediction["output"] = prediction["_output"]
+                else:
+                    prediction["status"] = "processing"
+            return {key: value for key, value in prediction.items() if not key.startswith("_")}
+
+    def cancel(self, prediction_id: str) -> Optional[Dict]:
+        with self.lock:
+            prediction = self.predictions.get(prediction_id)
+            if prediction is not None and prediction["status"] not in ("succeeded", "failed"):
+                prediction["status"] = "canceled"
+        return self.view(prediction_id)
+
+    def add_file(self, base_url: str, filename: str, content_type: str, data: bytes, metadata: Dict) -> Dict:
+        file_id = uuid.uuid4().hex[:16]
+        now = datetime.now(timezone.utc)
+        resource = {
+            "id": file_id,
+            "name": filename,
+            "content_type": content_type,
+            "size": len(data),
+            "etag": uuid.uuid4().hex,
+            "checksums": {},
+            "metadata": metadata,
+            "created_at": now.isoformat(),
+            "expires_at": (now + FILE_TTL).isoformat(),
+            "urls": {"get": f"{base_url}/v1/files/{file_id}/download"},
+        }
+        with self.lock:
+            self.files[file_id] = {"resource": resource, "data": data}
+        return resource
+
+    def get_file(self, file_id: str) -> Optional[Dict]:
+        with self.lock:
+            return self.files.get(file_id)
+
+    def delete_file(self, file_id: str) -> bool:
+        with self.lock:
+            return self.files.pop(file_id, None) is not None
+
+    def begin_create(self) -> None:
+        with self.lock:
+            self.active_creates += 1
+            self.max_active_creates = max(self.max_active_creates, self.active_creates)
+
+    def end_create(self) -> None:
+        with self.lock:
+            self.active_creates -= 1
+
+
+def make_handler(state: FakeReplicate):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, fmt, *args):  # pragma: no cover - keep the console quiet
+            return
+
+        def _base_url(self) -> str:
+            return f"http://{self.headers.get('Host') or '127.0.0.1'}"
+
+        def _parts(self) -> List[str]:
+            return [part for part in self.path.split("?", 1)[0].split("/") if part]
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _send_json(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_bytes(self, body: bytes, content_type: str) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _not_found(self) -> None:
+            self._send_json(404, {"detail": "Not found."})
+
+        def do_POST(self):
+            parts = self._parts()
+            raw = self._read_body()
+            if parts[-1:] == ["cancel"] and len(parts) == 4 and parts[1] == "predictions":
+                prediction = state.cancel(parts[2])
+                if prediction is None:
+                    self._not_found()
+                else:
+                    self._send_json(200, prediction)
+                return
+            if parts == ["v1", "files"]:
+                upload, fields = _parse_multipart(self.headers.get("Content-Type", ""), raw)
+                if upload is None:
+                    self._send_json(400, {"detail": "Missing file content."})
+                    return
+                metadata = json.loads(fields["metadata"]) if fields.get("metadata") else {}
+                self._send_json(201, state.add_file(self._base_url(), *upload, metadata))
+                return
+            if parts[-1:] != ["predictions"]:
+                self._not_found()
+                return
+
+            payload = json.loads(raw or b"{}")
+            state.begin_create()
+            try:
+                outcome = state.next_outcome()
+                state.record(payload, outcome)
+                if outcome.isdigit():
+                    status = int(outcome)
+                    headers = {"Retry-After": state.retry_after} if status == 429 else None
+                    detail = "Request was throttled." if status == 429 else "Injected server error."
+                    self._send_json(status, {"detail": detail}, headers)
+                    return
+
+                prediction = state.create(self._base_url(), outcome, payload)
+                wait = self.headers.get("Prefer", "")
+                if wait.startswith("wait="):
+                    try:
+                        wait_seconds = float(wait.split("=", 1)[1])
+                    except ValueError:
+                        wait_seconds = 0.0
+                    deadline = time.monotonic() + wait_seconds
+                    while time.monotonic() < min(deadline, prediction["_ready_at"]):
+                        time.sleep(0.01)
+                self._send_json(201, state.view(prediction["id"]))
+            finally:
+                state.end_create()
+
+        def do_GET(self):
+            parts = self._parts()
+            if parts[:1] == ["outputs"]:
+                self._send_bytes(state.audio, "audio/wav")
+                return
+            if parts[:2] == ["v1", "files"] and len(parts) in (3, 4):
+                entry = state.get_file(parts[2])
+                if entry is None:
+                    self._not_found()
+                elif len(parts) == 4 and parts[3] == "download":
+                    self._send_bytes(entry["data"], entry["resource"]["content_type"])
+                elif len(parts) == 3:
+                    self._send_json(200, entry["resource"])
+                else:
+                    self._not_found()
+                return
+            if parts[:2] == ["v1", "predictions"] and len(parts) == 3:
+                prediction = state.view(parts[2])
+                if prediction is None:
+                    self._not_found()
+                else:
+                    self._send_json(200, prediction)
+                return
+            self._not_found()
+
+        def do_DELETE(self):
+            parts = self._parts()
+            if parts[:2] == ["v1", "files"] and len(parts) == 3 and state.delete_file(parts[2]):
+                self.send_response(204)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self._not_found()
+
+    return Handler
+
+
+def serve(state: FakeReplicate, host: str = "127.0.0.1", port: int = 0) -> ThreadingHTTPServer:
+    """Build a server for ``state``; ``port=0`` picks a free port (see ``server.server_port``)."""
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    server.daemon_threads = True
+    return server
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local fake Replicate predictions and files API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=1.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--retry-after", default="1")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--scenario", default=None)
+    parser.add_argument("--record", default=None)
+    return parser.parse_args()
+
+
+def main() -> None:
+    args = parse_args()
+    scenario = None
+    if args.scenario:
+        with open(args.scenario, "r", encoding="utf-8") as handle:
+            scenario = json.load(handle)
+    state = FakeReplicate(
+        latency=args.latency,
+        throttle_rate=args.throttle_rate,
+        error_rate=args.error_rate,
+        fail_rate=args.fail_rate,
+        retry_after=args.retry_after,
+        seed=args.seed,
+        scenario=scenario,
+        record_path=args.record,
+    )
+    server = serve(state, args.host, args.port)
+    print(f"Fake Replicate API listening on http://{args.host}:{server.server_port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -176,6 +176,10 @@ pip install hf_xet
 if errorlevel 1 (
     echo WARNING: hf_xet install failed. Hugging Face downloads may be slower.
 )
+pip install pylibrb
+if errorlevel 1 (
+    echo WARNING: pylibrb install failed. Pitch/tempo FX will spawn the Rubber Band CLI per chunk.
+)
 
 call :EnsureVoicePromptFolder
 call :InstallRubberBand
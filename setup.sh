@@ -56,6 +56,9 @@ echo "[6/6] Installing other Python dependencies..."
 grep -vi "^torch" requirements.txt > temp_requirements.txt || true
 pip install -r temp_requirements.txt
 rm -f temp_requirements.txt
+if ! pip install pylibrb; then
+  echo "WARNING: pylibrb install failed. Pitch/tempo FX will spawn the Rubber Band CLI per chunk."
+fi
 
 echo
 echo "========================================"
@@ -5,11 +5,14 @@ from __future__ import annotations
 
 import math
 from dataclasses import dataclass
+from functools import lru_cache
 import logging
-from typing import Dict, Optional
+from typing import Dict, List, Optional
 
 import numpy as np
 
+from .rubberband_backend import get_rubberband_backend
+
 try:
     import librosa
     from librosa import util as librosa_util
@@ -27,7 +30,13 @@ try:  # Optional, higher-quality transformations
 except ImportError:  # pragma: no cover
     pyrb = None
 
-@dataclass
+TONE_FILTER_TAPS = 257
+TONE_TILT_STRENGTH = 0.18
+OVERLAP_ADD_BLOCK = 8192
+OVERLAP_ADD_GROUP = 32
+
+
+@dataclass(frozen=True)
 class VoiceFXSettings:
     """Container for user-defined post-processing controls."""
 
@@ -62,6 +71,129 @@ class VoiceFXSettings:
 logger = logging.getLogger(__name__)
 
 
+class ToneFilter:
+    """
+    Linear-phase FIR tilt filter (warm = high-shelf cut, bright = boost).
+
+    The kernel approximates the gain curve previously applied with a whole-signal
+    FFT and is run with block overlap-add convolution, so cost scales linearly
+    with clip length and the kernel spectrum is computed once per FFT size.
+    """
+
+    def __init__(self, profile: str, sample_rate: int, taps: int = TONE_FILTER_TAPS):
+        self.profile = profile
+        self.sample_rate = sample_rate
+        self.taps = taps | 1  # odd length keeps the delay an integer
+        self.delay = (self.taps - 1) // 2
+        self.kernel = self._design_kernel(profile, sample_rate, self.taps)
+        self._kernel_spectra: Dict[int, np.ndarray] = {}
+
+    @staticmethod
+    def _design_kernel(profile: str, sample_rate: int, taps: int) -> np.ndarray:
+        grid_size = 8192
+        freqs = np.fft.rfftfreq(grid_size, d=1.0 / sample_rate)
+        norm = freqs / (freqs[-1] or 1.0)
+        if profile == "warm":
+            gain = 1.0 - TONE_TILT_STRENGTH * norm
+        else:  # bright
+            gain = 1.0 + TONE_TILT_STRENGTH * norm
+        gain = np.clip(gain, 0.2, 1.8)
+
+        # Zero-phase impulse response, centred and windowed to the requested length
+        impulse = np.fft.irfft(gain, n=grid_size)
+        half = (taps - 1) // 2
+        kernel = np.concatenate((impulse[-half:], impulse[: half + 1]))
+        return (kernel * np.hanning(taps + 2)[1:-1]).astype(np.float64)
+
+    def _spectrum(self, n_fft: int) -> np.ndarray:
+        spectrum = self._kernel_spectra.get(n_fft)
+        if spectrum is None:
+            spectrum = np.fft.rfft(self.kernel, n=n_fft)
+            self._kernel_spectra[n_fft] = spectrum
+        return spectrum
+
+    def apply(self, audio: np.ndarray) -> np.ndarray:
+        length = audio.shape[0]
+        if length == 0:
+            return audio
+
+        tail = self.taps - 1
+        block = max(min(OVERLAP_ADD_BLOCK, length), tail)
+        n_fft = 1 << int(math.ceil(math.log2(block + tail)))
+        kernel_spectrum = self._spectrum(n_fft)
+
+        n_blocks = -(-length // block)
+        padded = np.zeros(n_blocks * block, dtype=np.float32)
+        padded[:length] = audio
+        frames = padded.reshape(n_blocks, block)
+
+        # One spare block at the end absorbs the last convolution tail
+        output = np.zeros((n_blocks + 1) * block, dtype=np.float32)
+        for start in range(0, n_blocks, OVERLAP_ADD_GROUP):
+            group = frames[start:start + OVERLAP_ADD_GROUP]
+            count = group.shape[0]
+            filtered = np.fft.irfft(np.fft.rfft(group, n=n_fft, axis=1) * kernel_spectrum, n=n_fft, axis=1)
+            output[start * block:(start + count) * block] += filtered[:, :block].ravel()
+            if tail:
+                tails = output[(start + 1) * block:(start + count + 1) * block].reshape(count, block)
+                tails[:, :tail] += filtered[:, block:block + tail]
+
+        return output[self.delay:self.delay + length]
+
+
+@lru_cache(maxsize=16)
+def get_tone_filter(profile: str, sample_rate: int) -> ToneFilter:
+    """Return the shared tone filter for a profile at a given sample rate."""
+    return ToneFilter(profile, sample_rate)
+
+
+class CompiledFXChain:
+    """VoiceFXSettings resolved for one sample rate and reused for every chunk."""
+
+    def __init__(self, fx: VoiceFXSettings, sample_rate: int):
+        self.fx = fx
+        self.sample_rate = sample_rate
+        self.speed = fx.speed if math.isfinite(fx.speed) and abs(fx.speed - 1.0) > 1e-3 else None
+        self.pitch = (
+            fx.pitch_semitones
+            if math.isfinite(fx.pitch_semitones) and abs(fx.pitch_semitones) > 1e-3
+            else None
+        )
+        self.tone_filter = get_tone_filter(fx.tone, sample_rate) if fx.tone and fx.tone != "neutral" else None
+        self.blend_mix = AudioPostProcessor._compute_blend_mix(fx)
+
+    def process(self, audio: np.ndarray, blend_override: Optional[float] = None) -> np.ndarray:
+        base_audio = audio
+        processed = audio
+
+        if self.speed is not None or self.pitch is not None:
+            processed = AudioPostProcessor._apply_time_pitch(
+                processed,
+                self.sample_rate,
+                self.speed if self.speed is not None else 1.0,
+                self.pitch if self.pitch is not None else 0.0,
+            )
+
+        if self.tone_filter is not None:
+            processed = self.tone_filter.apply(processed)
+
+        blend_mix = self.blend_mix if blend_override is None else blend_override
+        if processed is base_audio:
+            # Nothing ran, so never write into the caller's buffer
+            return np.clip(processed, -1.0, 1.0)
+
+        if blend_mix > 0.0:
+            processed = AudioPostProcessor._blend_with_original(base_audio, processed, mix=blend_mix)
+
+        return np.clip(processed, -1.0, 1.0, out=processed)
+
+
+@lru_cache(maxsize=64)
+def compile_fx_chain(fx: VoiceFXSettings, sample_rate: int) -> CompiledFXChain:
+    """Return the cached compiled chain for a settings/sample-rate pair."""
+    return CompiledFXChain(fx, sample_rate)
+
+
 class AudioPostProcessor:
     """Applies pitch, speed, and tonal shaping to generated audio arrays."""
 
@@ -85,28 +217,7 @@ class AudioPostProcessor:
             audio = np.mean(audio, axis=1)
 
         base_audio = audio.astype(np.float32, copy=False)
-        processed = base_audio.copy()
-
-        # Apply speed change first (time stretch without pitch change)
-        if math.isfinite(fx.speed) and abs(fx.speed - 1.0) > 1e-3:
-            processed = self._apply_speed(processed, sample_rate, fx.speed)
-
-        if math.isfinite(fx.pitch_semitones) and abs(fx.pitch_semitones) > 1e-3:
-            processed = self._apply_pitch(processed, sample_rate, fx.pitch_semitones)
-
-        if fx.tone and fx.tone != "neutral":
-            processed = self._apply_tone(processed, sample_rate, fx.tone)
-
-        # Use blend_override if provided, otherwise compute blend mix
-        if blend_override is not None:
-            blend_mix = blend_override
-        else:
-            blend_mix = self._compute_blend_mix(fx)
-        
-        if blend_mix > 0.0:
-            processed = self._blend_with_original(base_audio, processed, mix=blend_mix)
-
-        return np.clip(processed, -1.0, 1.0)
+        return compile_fx_chain(fx, int(sample_rate)).process(base_audio, blend_override)
 
     @staticmethod
     def _compute_blend_mix(fx: VoiceFXSettings) -> float:
@@ -120,14 +231,33 @@ class AudioPostProcessor:
         return max(0.0, 0.2 * (1.0 - severity))
 
     @staticmethod
-    def _apply_speed(audio: np.ndarray, sample_rate: int, speed: float) -> np.ndarray:
+    def _apply_time_pitch(audio: np.ndarray, sample_rate: int, speed: float, semitones: float) -> np.ndarray:
+        """
+        Apply speed and pitch together through the shared Rubber Band backend,
+        falling back to the per-effect pyrubberband/librosa paths.
+        """
+        backend = get_rubberband_backend()
+        if backend.available:
+            shifted = backend.process(audio, sample_rate, speed=speed, semitones=semitones)
+            if shifted is not None:
+                return shifted
+
+        # Apply speed change first (time stretch without pitch change)
+        if abs(speed - 1.0) > 1e-3:
+            audio = AudioPostProcessor._apply_speed(audio, sample_rate, speed, use_rubberband=not backend.cli_path)
+        if abs(semitones) > 1e-3:
+            audio = AudioPostProcessor._apply_pitch(audio, sample_rate, semitones, use_rubberband=not backend.cli_path)
+        return audio
+
+    @staticmethod
+    def _apply_speed(audio: np.ndarray, sample_rate: int, speed: float, use_rubberband: bool = True) -> np.ndarray:
         """
         Apply speed/tempo change without affecting pitch.
         speed > 1.0 = faster (shorter duration)
         speed < 1.0 = slower (longer duration)
         """
         AudioPostProcessor._require_librosa("speed")
-        if pyrb is not None:
+        if pyrb is not None and use_rubberband:
             try:
                 # Use high-quality settings for Rubber Band
                 return pyrb.time_stretch(audio, sample_rate, speed).astype(np.float32)
@@ -151,9 +281,9 @@ class AudioPostProcessor:
         return stretched.astype(np.float32, copy=False)
 
     @staticmethod
-    def _apply_pitch(audio: np.ndarray, sample_rate: int, semitones: float) -> np.ndarray:
+    def _apply_pitch(audio: np.ndarray, sample_rate: int, semitones: float, use_rubberband: bool = True) -> np.ndarray:
         AudioPostProcessor._require_librosa("pitch")
-        if pyrb is not None:
+        if pyrb is not None and use_rubberband:
             try:
                 return pyrb.pitch_shift(audio, sample_rate, semitones).astype(np.float32)
             except Exception as exc:  # pragma: no cover - graceful degradation
@@ -189,24 +319,7 @@ class AudioPostProcessor:
 
     @staticmethod
     def _apply_tone(audio: np.ndarray, sample_rate: int, profile: str) -> np.ndarray:
-        spectrum = np.fft.rfft(audio)
-        if spectrum.size == 0:
-            return audio
-
-        freqs = np.fft.rfftfreq(audio.shape[0], d=1.0 / sample_rate)
-        last_freq = freqs[-1] or 1.0
-        norm = freqs / last_freq
-
-        strength = 0.18
-        if profile == "warm":
-            gain = 1.0 - strength * norm
-        else:  # bright
-            gain = 1.0 + strength * norm
-
-        gain = np.clip(gain, 0.2, 1.8)
-        spectrum *= gain
-        shaped = np.fft.irfft(spectrum, n=audio.shape[0])
-        return shaped.astype(np.float32)
+        return get_tone_filter(profile, int(sample_rate)).apply(audio.astype(np.float32, copy=False))
 
     @staticmethod
     def _require_librosa(feature: str):
@@ -231,4 +344,36 @@ class AudioPostProcessor:
                     original
                 ).astype(np.float32)
         mix = max(0.0, min(mix, 0.4))
-        return (1.0 - mix) * processed + mix * original
+        blended = np.multiply(processed, 1.0 - mix, dtype=np.float32)
+        blended += mix * original
+        return blended
+
+
+def apply_fx_to_files(
+    file_paths: List[str],
+    pitch_semitones: float = 0.0,
+    speed: float = 1.0,
+    tone: str = "neutral",
+    blend_override: Optional[float] = None,
+) -> List[Optional[str]]:
+    """
+    Apply one FX setting to several audio files in place.
+
+    Safe to call from worker threads. Returns one entry per file: None on
+    success or the error message when that file failed.
+    """
+    import soundfile as sf
+
+    fx = VoiceFXSettings(pitch_semitones=pitch_semitones, speed=speed, tone=tone)
+    processor = AudioPostProcessor()
+    results: List[Optional[str]] = []
+    for path in file_paths:
+        try:
+            audio, sample_rate = sf.read(path, dtype="float32")
+            processed = processor.apply(audio, sample_rate, fx, blend_override=blend_override)
+            sf.write(path, processed, sample_rate)
+            results.append(None)
+        except Exception as exc:  # noqa: BLE001 - reported per file
+            logger.error("Failed to apply FX to %s: %s", path, exc)
+            results.append(str(exc))
+    return results
@@ -0,0 +1,161 @@
+"""
+Decode downloaded audio without intermediate copies or temp files.
+
+WAV responses are parsed straight off the HTTP stream: the header gives the
+exact frame count, so the PCM payload is read into one preallocated buffer and
+converted into one preallocated float32 mono array. Anything that is not plain
+PCM/float WAV falls back to soundfile.
+"""
+from __future__ import annotations
+
+import io
+import struct
+from typing import BinaryIO, Optional, Tuple
+
+import numpy as np
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+_UNKNOWN_SIZES = (0, 0xFFFFFFFF)
+_HEADER_SCAN_LIMIT = 64 * 1024
+
+
+class UnsupportedWav(ValueError):
+    """The payload is not a WAV layout this module decodes itself."""
+
+
+def _read_exact(stream: BinaryIO, size: int, consumed: bytearray) -> bytes:
+    data = b""
+    while len(data) < size:
+        block = stream.read(size - len(data))
+        if not block:
+            break
+        data += block
+    consumed += data
+    if len(data) < size:
+        raise UnsupportedWav("Unexpected end of WAV header")
+    return data
+
+
+def _read_header(stream: BinaryIO, consumed: bytearray) -> Tuple[int, int, int, int, Optional[int]]:
+    """
+    Return (format, channels, sample_rate, bits, data_size), leaving the stream at
+    the first sample. Every byte read is appended to ``consumed``.
+    """
+    riff, _, wave = struct.unpack("<4sI4s", _read_exact(stream, 12, consumed))
+    if riff not in (b"RIFF", b"RF64") or wave != b"WAVE":
+        raise UnsupportedWav("Not a RIFF/WAVE payload")
+
+    fmt = None
+    while True:
+        chunk_header = _read_exact(stream, 8, consumed)
+        chunk_id, chunk_size = struct.unpack("<4sI", chunk_header)
+        if chunk_id == b"data":
+            if fmt is None:
+                raise UnsupportedWav("WAV data chunk precedes fmt chunk")
+            data_size = None if chunk_size in _UNKNOWN_SIZES else chunk_size
+            return (*fmt, data_size)
+        body = _read_exact(stream, chunk_size + (chunk_size & 1), consumed)
+        if chunk_id == b"fmt ":
+            format_tag, channels, sample_rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+            if format_tag == WAVE_FORMAT_EXTENSIBLE and len(body) >= 26:
+                format_tag = struct.unpack("<H", body[24:26])[0]
+            fmt = (format_tag, channels, sample_rate, bits)
+
+
+def _sample_dtype(format_tag: int, bits: int) -> np.dtype:
+    if format_tag == WAVE_FORMAT_PCM and bits in (16, 32):
+        return np.dtype(f"<i{bits // 8}")
+    if format_tag == WAVE_FORMAT_PCM and bits == 8:
+        return np.dtype("u1")
+    if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits in (32, 64):
+        return np.dtype(f"<f{bits // 8}")
+    raise UnsupportedWav(f"Unsupported WAV encoding (format {format_tag}, {bits} bit)")
+
+
+def _to_mono_float32(samples: np.ndarray, channels: int, dtype: np.dtype) -> np.ndarray:
+    frames = samples.size // channels
+    samples = samples[: frames * channels]
+    out = np.empty(frames, dtype=np.float32)
+    if channels == 1:
+        np.copyto(out, samples, casting="unsafe")
+    else:
+        np.mean(samples.reshape(frames, channels), axis=1, dtype=np.float32, out=out)
+    if dtype.kind == "i":
+        out *= np.float32(1.0 / (2 ** (dtype.itemsize * 8 - 1)))
+    elif dtype.kind == "u":
+        out -= np.float32(128.0)
+        out *= np.float32(1.0 / 128.0)
+    return out
+
+
+def read_wav_stream(stream: BinaryIO) -> Tuple[np.ndarray, int]:
+    """Decode a WAV stream into float32 mono, reading the payload exactly once."""
+    header = _read_header(stream, bytearray())
+    return _read_payload(stream, header, _sample_dtype(header[0], header[3]))
+
+
+def _read_payload(
+    stream: BinaryIO,
+    header: Tuple[int, int, int, int, Optional[int]],
+    dtype: np.dtype,
+) -> Tuple[np.ndarray, int]:
+    _, channels, sample_rate, _, data_size = header
+    channels = max(1, channels)
+
+    if data_size is not None:
+        raw = np.empty(data_size // dtype.itemsize, dtype=dtype)
+        view = memoryview(raw).cast("B")
+        filled = 0
+        while filled < len(view):
+            read = stream.readinto(view[filled:])
+            if not read:
+                break
+            filled += read
+        samples = raw[: filled // dtype.itemsize]
+    else:
+        # Streaming writers may leave the size unset; read to EOF instead
+        samples = np.frombuffer(stream.read(), dtype=dtype)
+    return _to_mono_float32(samples, channels, dtype), int(sample_rate)
+
+
+def decode_audio_bytes(data: bytes | bytearray | memoryview) -> Tuple[np.ndarray, int]:
+    """Decode an in-memory download into float32 mono, viewing WAV PCM without copying it."""
+    buffer = memoryview(data)
+    try:
+        consumed = bytearray()
+        # Only the header is wrapped in a BytesIO; the samples are viewed in place
+        header_view = io.BytesIO(buffer[:_HEADER_SCAN_LIMIT])
+        format_tag, channels, sample_rate, bits, data_size = _read_header(header_view, consumed)
+        dtype = _sample_dtype(format_tag, bits)
+        start = len(consumed)
+        end = len(buffer) if data_size is None else min(len(buffer), start + data_size)
+        usable = (end - start) - (end - start) % dtype.itemsize
+        samples = np.frombuffer(buffer[start : start + usable], dtype=dtype)
+        return _to_mono_float32(samples, max(1, channels), dtype), int(sample_rate)
+    except UnsupportedWav:
+        import soundfile as sf
+
+        audio, sample_rate = sf.read(io.BytesIO(buffer), dtype="float32", always_2d=False)
+        if audio.ndim > 1:
+            audio = audio.mean(axis=1, dtype=np.float32)
+        return audio, int(sample_rate)
+
+
+def decode_audio_stream(stream: BinaryIO) -> Tuple[np.ndarray, int]:
+    """Decode a non-seekable response stream, buffering only when it is not plain WAV."""
+    consumed = bytearray()
+    try:
+        header = _read_header(stream, consumed)
+        dtype = _sample_dtype(header[0], header[3])
+    except UnsupportedWav:
+        return decode_audio_bytes(bytes(consumed) + stream.read())
+    return _read_payload(stream, header, dtype)
+
+
+__all__ = [
+    "decode_audio_bytes",
+    "decode_audio_stream",
+    "read_wav_stream",
+]
@@ -1,14 +1,67 @@
 """Document text extraction for various file formats."""
 from __future__ import annotations
 
+import hashlib
 import io
+import json
 import logging
+import os
 import re
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
+EXTRACTION_CACHE_DIR = Path("data") / "extraction_cache"
+EXTRACTION_CACHE_MEMORY_ENTRIES = 8
+EXTRACTION_CACHE_MAX_ENTRIES = 200
+EXTRACTION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+_extraction_cache: "OrderedDict[str, ExtractedDocument]" = OrderedDict()
+_extraction_cache_lock = threading.Lock()
+
+# A section is (title, body). A title starts a new chapter; None continues the current one.
+Section = Tuple[Optional[str], str]
+
+
+@dataclass
+class DocumentChapter:
+    """A chapter boundary expressed as character offsets into the extracted text."""
+
+    title: str
+    start: int
+    end: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"title": self.title, "start": self.start, "end": self.end}
+
+
+@dataclass
+class ExtractedDocument:
+    """Extracted text plus any chapter structure recovered from the source format."""
+
+    text: str
+    format_name: str
+    chapters: List[DocumentChapter] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "text": self.text,
+            "format": self.format_name,
+            "chapters": [chapter.to_dict() for chapter in self.chapters],
+        }
+
+    @classmethod
+    def from_dict(cls, payload: Dict[str, Any]) -> "ExtractedDocument":
+        chapters = [
+            DocumentChapter(title=str(entry["title"]), start=int(entry["start"]), end=int(entry["end"]))
+            for entry in payload.get("chapters") or []
+        ]
+        return cls(text=payload["text"], format_name=payload["format"], chapters=chapters)
+
 
 def extract_text_from_file(file_path: str | Path, file_content: Optional[bytes] = None) -> Tuple[str, str]:
     """
@@ -21,6 +74,21 @@ def extract_text_from_file(file_path: str | Path, file_content: Optional[bytes]
     Returns:
         Tuple of (extracted_text, format_name)
     
+    Raises:
+        ValueError: If the file format is not supported
+        Exception: If extraction fails
+    """
+    document = extract_document_from_file(file_path, file_content)
+    return document.text, document.format_name
+
+
+def extract_document_from_file(file_path: str | Path, file_content: Optional[bytes] = None) -> ExtractedDocument:
+    """
+    Extract text and chapter structure from a document file.
+    
+    EPUB chapters follow the spine and table of contents; DOCX chapters follow the
+    top-level heading style. Other formats return no chapters.
+    
     Raises:
         ValueError: If the file format is not supported
         Exception: If extraction fails
@@ -35,27 +103,147 @@ def extract_text_from_file(file_path: str | Path, file_content: Optional[bytes]
         '.txt': ('Plain Text', _extract_txt),
         '.md': ('Markdown', _extract_markdown),
         '.pdf': ('PDF', _extract_pdf),
-        '.docx': ('Word Document', _extract_docx),
+        '.docx': ('Word Document', _extract_docx_sections),
         '.doc': ('Word Document (Legacy)', _extract_doc),
         '.rtf': ('Rich Text Format', _extract_rtf),
-        '.epub': ('EPUB', _extract_epub),
+        '.epub': ('EPUB', _extract_epub_sections),
         '.odt': ('OpenDocument Text', _extract_odt),
         '.html': ('HTML', _extract_html),
         '.htm': ('HTML', _extract_html),
     }
+    structured_suffixes = {'.docx', '.epub'}
     
     if suffix not in extractors:
         raise ValueError(f"Unsupported file format: {suffix}")
     
     format_name, extractor = extractors[suffix]
     
+    cache_key = f"{hashlib.sha256(file_content).hexdigest()}{suffix}"
+    cached = _get_cached_extraction(cache_key)
+    if cached is not None:
+        logger.info("Using cached %s extraction for %s", cached.format_name, path.name)
+        return cached
+    
     try:
-        text = extractor(file_content)
-        text = _clean_extracted_text(text)
-        return text, format_name
+        if suffix in structured_suffixes:
+            text, chapters = _assemble_sections(extractor(file_content))
+        else:
+            text, chapters = _clean_extracted_text(extractor(file_content)), []
     except Exception as e:
         logger.error("Failed to extract text from %s: %s", format_name, e)
         raise
+    
+    document = ExtractedDocument(text=text, format_name=format_name, chapters=chapters)
+    _store_cached_extraction(cache_key, document)
+    return document
+
+
+def clear_extraction_cache() -> int:
+    """Drop all cached extraction results (memory and disk). Returns entries removed."""
+    with _extraction_cache_lock:
+        removed = len(_extraction_cache)
+        _extraction_cache.clear()
+        if EXTRACTION_CACHE_DIR.exists():
+            for entry in EXTRACTION_CACHE_DIR.glob("*.json"):
+                try:
+                    entry.unlink()
+                    removed += 1
+                except OSError:
+                    pass
+    return removed
+
+
+def _get_cached_extraction(cache_key: str) -> Optional[ExtractedDocument]:
+    with _extraction_cache_lock:
+        if cache_key in _extraction_cache:
+            _extraction_cache.move_to_end(cache_key)
+            return _extraction_cache[cache_key]
+
+    cache_path = EXTRACTION_CACHE_DIR / f"{cache_key}.json"
+    if not cache_path.exists():
+        return None
+    try:
+        with cache_path.open("r", encoding="utf-8") as handle:
+            document = ExtractedDocument.from_dict(json.load(handle))
+    except (OSError, ValueError, KeyError, TypeError) as exc:
+        logger.warning("Ignoring unreadable extraction cache entry %s: %s", cache_path, exc)
+        return None
+
+    try:
+        os.utime(cache_path)  # mark as recently used for eviction
+    except OSError:
+        pass
+    _remember_extraction(cache_key, document)
+    return document
+
+
+def _store_cached_extraction(cache_key: str, document: ExtractedDocument) -> None:
+    _remember_extraction(cache_key, document)
+
+    try:
+        EXTRACTION_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_path = EXTRACTION_CACHE_DIR / f"{cache_key}.json"
+        tmp_path = cache_path.with_suffix(".json.tmp")
+        with tmp_path.open("w", encoding="utf-8") as handle:
+            json.dump(document.to_dict(), handle, ensure_ascii=False)
+        os.replace(tmp_path, cache_path)
+    except OSError as exc:
+        logger.warning("Failed to persist extraction cache entry: %s", exc)
+        return
+    _evict_disk_cache()
+
+
+def _evict_disk_cache() -> None:
+    """Keep the on-disk cache within its entry and size caps, dropping least recently used files."""
+    try:
+        entries = []
+        for entry in EXTRACTION_CACHE_DIR.glob("*.json"):
+            stat_result = entry.stat()
+            entries.append((stat_result.st_mtime, stat_result.st_size, entry))
+    except OSError as exc:
+        logger.debug("Skipping extraction cache eviction: %s", exc)
+        return
+    entries.sort(key=lambda item: item[0])
+    total = sum(size for _, size, _ in entries)
+    while entries and (len(entries) > EXTRACTION_CACHE_MAX_ENTRIES or total > EXTRACTION_CACHE_MAX_BYTES):
+        _, size, oldest = entries.pop(0)
+        try:
+            oldest.unlink()
+        except OSError:
+            pass
+        total -= size
+
+
+def _remember_extraction(cache_key: str, document: ExtractedDocument) -> None:
+    with _extraction_cache_lock:
+        _extraction_cache[cache_key] = document
+        _extraction_cache.move_to_end(cache_key)
+        while len(_extraction_cache) > EXTRACTION_CACHE_MEMORY_ENTRIES:
+            _extraction_cache.popitem(last=False)
+
+
+def _assemble_sections(sections: Sequence[Section]) -> Tuple[str, List[DocumentChapter]]:
+    """
+    Join extracted sections into cleaned text, recording exact chapter offsets.
+    Untitled sections before the first chapter are left outside any chapter.
+    """
+    parts: List[str] = []
+    chapters: List[DocumentChapter] = []
+    offset = 0
+    for title, body in sections:
+        cleaned = _clean_extracted_text(body)
+        if not cleaned:
+            continue
+        if parts:
+            offset += 2  # '\n\n' separator
+        start = offset
+        offset += len(cleaned)
+        parts.append(cleaned)
+        if title:
+            chapters.append(DocumentChapter(title=title.strip(), start=start, end=offset))
+        elif chapters:
+            chapters[-1].end = offset
+    return '\n\n'.join(parts), chapters
 
 
 def _clean_extracted_text(text: str) -> str:
@@ -119,21 +307,44 @@ def _extract_pdf(content: bytes) -> str:
     return '\n\n'.join(text_parts)
 
 
-def _extract_docx(content: bytes) -> str:
-    """Extract text from Word .docx file."""
+def _extract_docx_sections(content: bytes) -> List[Section]:
+    """Extract text from Word .docx file, starting a chapter at each top-level heading."""
     try:
         from docx import Document
     except ImportError:
         raise ImportError("python-docx is required for Word document extraction. Install with: pip install python-docx")
     
     doc = Document(io.BytesIO(content))
-    text_parts = []
-    
+    paragraphs = []
     for para in doc.paragraphs:
         if para.text.strip():
-            text_parts.append(para.text)
-    
-    return '\n\n'.join(text_parts)
+            paragraphs.append((_docx_heading_level(para), para.text))
+    
+    levels = [level for level, _ in paragraphs if level is not None]
+    chapter_level = min(levels) if levels else None
+    
+    sections: List[Section] = []
+    current_title: Optional[str] = None
+    current_parts: List[str] = []
+    for level, para_text in paragraphs:
+        if chapter_level is not None and level == chapter_level:
+            if current_parts:
+                sections.append((current_title, '\n\n'.join(current_parts)))
+            current_title = para_text.strip()
+            current_parts = []
+        current_parts.append(para_text)
+    if current_parts:
+        sections.append((current_title, '\n\n'.join(current_parts)))
+    
+    return sections
+
+
+def _docx_heading_level(para) -> Optional[int]:
+    """Return the numeric level of a 'Heading N' styled paragraph, else None."""
+    style = getattr(para, "style", None)
+    style_name = (getattr(style, "name", None) or "").strip().lower()
+    match = re.match(r'heading\s*(\d+)$', style_name)
+    return int(match.group(1)) if match else None
 
 
 def _extract_doc(content: bytes) -> str:
@@ -174,8 +385,8 @@ def _extract_rtf(content: bytes) -> str:
     return rtf_to_text(rtf_content)
 
 
-def _extract_epub(content: bytes) -> str:
-    """Extract text from EPUB file."""
+def _extract_epub_sections(content: bytes) -> List[Section]:
+    """Extract text from EPUB file, one section per spine document."""
     try:
         import ebooklib
         from ebooklib import epub
@@ -184,21 +395,73 @@ def _extract_epub(content: bytes) -> str:
         raise ImportError("ebooklib and beautifulsoup4 are required for EPUB extraction.")
     
     book = epub.read_epub(io.BytesIO(content))
-    text_parts = []
+    documents = _epub_documents_in_reading_order(book, ebooklib.ITEM_DOCUMENT)
     
-    for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
-            soup = BeautifulSoup(item.get_content(), 'html.parser')
-            
-            # Remove script and style elements
-            for script in soup(["script", "style"]):
-                script.decompose()
-            
-            text = soup.get_text(separator='\n')
-            if text.strip():
-                text_parts.append(text.strip())
+    results = [_epub_document_text(html) for _, html in documents]
     
-    return '\n\n'.join(text_parts)
+    # Prefer the table of contents for chapter starts; fall back to in-document headings.
+    toc_titles = _epub_toc_titles(getattr(book, "toc", None) or [])
+    use_toc = any(file_name in toc_titles for file_name, _ in documents)
+    
+    sections: List[Section] = []
+    for (file_name, _), (heading, text) in zip(documents, results):
+        title = toc_titles.get(file_name) if use_toc else heading
+        sections.append((title, text))
+    return sections
+
+
+def _epub_documents_in_reading_order(book, document_type) -> List[Tuple[str, bytes]]:
+    """Return (file name, body) pairs following the spine, falling back to manifest order."""
+    documents: List[Tuple[str, bytes]] = []
+    for entry in getattr(book, "spine", None) or []:
+        idref = entry[0] if isinstance(entry, (tuple, list)) else entry
+        item = book.get_item_with_id(idref)
+        if item is not None and item.get_type() == document_type:
+            documents.append((item.get_name(), item.get_content()))
+    if documents:
+        return documents
+    return [
+        (item.get_name(), item.get_content())
+        for item in book.get_items()
+        if item.get_type() == document_type
+    ]
+
+
+def _epub_toc_titles(toc) -> Dict[str, str]:
+    """Map document file names to the first table-of-contents title pointing at them."""
+    titles: Dict[str, str] = {}
+
+    def visit(entries):
+        for entry in entries:
+            if isinstance(entry, (tuple, list)):
+                section, children = entry[0], entry[1] if len(entry) > 1 else []
+                visit([section])
+                visit(children)
+                continue
+            href = (getattr(entry, "href", None) or "").split('#', 1)[0]
+            title = (getattr(entry, "title", None) or "").strip()
+            if href and title and href not in titles:
+                titles[href] = title
+
+    visit(toc)
+    return titles
+
+
+def _epub_document_text(html: bytes) -> Tuple[Optional[str], str]:
+    """
+    Convert a single EPUB XHTML document to (first heading, plain text).
+    """
+    from bs4 import BeautifulSoup
+    
+    soup = BeautifulSoup(html, 'html.parser')
+    
+    # Remove script and style elements
+    for script in soup(["script", "style"]):
+        script.decompose()
+    
+    heading_tag = soup.find(['h1', 'h2'])
+    heading = heading_tag.get_text(separator=' ').strip() if heading_tag else None
+    return heading or None, soup.get_text(separator='\n').strip()
 
 
 def _extract_odt(content: bytes) -> str:
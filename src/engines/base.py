@@ -3,10 +3,14 @@ Common abstractions for pluggable TTS engines.
 """
 from __future__ import annotations
 
+import gc
+import logging
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, Hashable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
 
 
 @dataclass(frozen=True)
@@ -30,6 +34,111 @@ class VoiceAssignment:
     extra: Dict = field(default_factory=dict)
 
 
+def schedule_chunks(
+    work_items: List[Dict[str, Any]],
+    voice_key: Callable[[Dict[str, Any]], Hashable],
+    group_by_speaker: bool = False,
+) -> List[Dict[str, Any]]:
+    """
+    Return the order in which chunks should be synthesized.
+
+    With ``group_by_speaker`` every chunk sharing a voice key runs consecutively
+    (voices ordered by first appearance, story order kept within a voice) so
+    engines only switch reference prompts once per voice.
+    """
+    if not group_by_speaker:
+        return list(work_items)
+    first_seen: Dict[Hashable, int] = {}
+    for item in work_items:
+        first_seen.setdefault(voice_key(item), len(first_seen))
+    return sorted(work_items, key=lambda item: first_seen[voice_key(item)])
+
+
+class OrderedChunkEmitter:
+    """Releases finished chunks to ``chunk_cb`` in story order, whatever order they finish in."""
+
+    def __init__(self, chunk_cb=None):
+        self.chunk_cb = chunk_cb
+        self.files: List[str] = []
+        self._pending: Dict[int, Tuple[int, Dict[str, Any], str]] = {}
+        self._next = 0
+
+    def complete(self, order_index: int, callback_index: int, chunk_meta: Dict[str, Any], path: str) -> None:
+        self._pending[order_index] = (callback_index, chunk_meta, path)
+        while self._next in self._pending:
+            callback_index, chunk_meta, path = self._pending.pop(self._next)
+            self.files.append(path)
+            if callable(self.chunk_cb):
+                self.chunk_cb(callback_index, chunk_meta, path)
+            self._next += 1
+
+
+def is_out_of_memory_error(exc: BaseException) -> bool:
+    """Return True for CUDA/allocator out-of-memory failures, without importing torch."""
+    if type(exc).__name__ == "OutOfMemoryError":
+        return True
+    return isinstance(exc, (RuntimeError, MemoryError)) and "out of memory" in str(exc).lower()
+
+
+def release_cuda_cache() -> None:
+    """Collect garbage and hand cached CUDA blocks back to the allocator, when torch is loaded."""
+    gc.collect()
+    try:
+        import torch
+    except ImportError:  # pragma: no cover - engines using this always have torch
+        return
+    if torch.cuda.is_available():
+        torch.cuda.empty_cache()
+
+
+class AdaptiveBatcher:
+    """
+    Groups consecutive work items that share a batch key into model-level batches.
+
+    When a batch fails with an out-of-memory error the batch size is halved and
+    the same items are retried; the reduced size sticks for later calls so an
+    engine settles on what fits in memory.
+    """
+
+    def __init__(self, batch_size: int = 1, on_oom: Optional[Callable[[], None]] = None):
+        self.batch_size = max(1, int(batch_size or 1))
+        self.on_oom = on_oom
+
+    def run(
+        self,
+        items: Sequence[Dict[str, Any]],
+        batch_key: Callable[[Dict[str, Any]], Hashable],
+        run_batch: Callable[[List[Dict[str, Any]]], Sequence[Any]],
+    ) -> Iterator[Tuple[Dict[str, Any], Any]]:
+        """Yield ``(item, output)`` pairs in input order as each batch finishes."""
+        start = 0
+        while start < len(items):
+            key = batch_key(items[start])
+            end = start + 1
+            while end < len(items) and end - start < self.batch_size and batch_key(items[end]) == key:
+                end += 1
+            batch = list(items[start:end])
+            try:
+                outputs = run_batch(batch)
+            except Exception as exc:
+                if len(batch) <= 1 or not is_out_of_memory_error(exc):
+                    raise
+                self.batch_size = max(1, len(batch) // 2)
+                logger.warning(
+                    "Out of memory with batch of %s chunks; retrying with batch size %s",
+                    len(batch),
+                    self.batch_size,
+                )
+                if callable(self.on_oom):
+                    self.on_oom()
+                continue
+            if len(outputs) != len(batch):
+                raise RuntimeError(f"Model returned {len(outputs)} outputs for a batch of {len(batch)} chunks")
+            for item, output in zip(batch, outputs):
+                yield item, output
+            start = end
+
+
 class TtsEngineBase(ABC):
     """Base class that every engine adapter must implement."""
 
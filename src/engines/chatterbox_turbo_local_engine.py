@@ -2,21 +2,28 @@
 from __future__ import annotations
 
 import gc
+import hashlib
 import logging
 import os
+import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 import torch
 
-from .base import EngineCapabilities, TtsEngineBase, VoiceAssignment
+from .base import EngineCapabilities, OrderedChunkEmitter, TtsEngineBase, VoiceAssignment, schedule_chunks
 from ..audio_effects import AudioPostProcessor, VoiceFXSettings
 
 logger = logging.getLogger(__name__)
 
 CHATTERBOX_TURBO_SAMPLE_RATE = 24000
+CONDITIONALS_CACHE_SIZE = 16
+CONDITIONALS_CACHE_DIR = Path("data/cache/chatterbox_conditionals")
+CONDITIONALS_CACHE_MAX_BYTES = 512 * 1024 * 1024
+CONDITIONALS_CACHE_MAX_AGE = 30 * 24 * 3600
 
 try:
     from chatterbox.tts_turbo import ChatterboxTurboTTS  # type: ignore
@@ -52,6 +59,8 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
         exaggeration: float = 0.0,
         norm_loudness: bool = True,
         prompt_norm_loudness: bool = True,
+        conditionals_cache_size: int = CONDITIONALS_CACHE_SIZE,
+        persist_conditionals: bool = True,
     ):
         if not CHATTERBOX_TURBO_AVAILABLE:
             raise ImportError(
@@ -81,6 +90,11 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
         self.norm_loudness = bool(norm_loudness)
         self.prompt_norm_loudness = bool(prompt_norm_loudness)
         self.prompt_cache: Dict[str, Path] = {}
+        # Prepared speaker conditioning keyed by (prompt path, mtime, size, exaggeration, norm_loudness)
+        self.conditionals_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.conditionals_cache_size = max(1, int(conditionals_cache_size))
+        self.persist_conditionals = bool(persist_conditionals)
+        self._active_conditionals_key: Optional[Tuple] = None
         self.post_processor = AudioPostProcessor()
 
     def _download_model(self) -> str:
@@ -233,6 +247,7 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
         progress_cb=None,
         chunk_cb=None,
         parallel_workers: int = 1,
+        group_by_speaker: bool = False,
     ) -> List[str]:
         if sample_rate and sample_rate != self.sample_rate:
             logger.warning(
@@ -243,38 +258,51 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        files: List[str] = []
-        chunk_index = 0
+        work_items: List[Dict] = []
         for seg_idx, segment in enumerate(segments):
             speaker = segment["speaker"]
-            chunks = segment["chunks"]
             assignment = self._voice_assignment_for(voice_config, speaker)
-            logger.info(
-                "Chatterbox Turbo segment %s/%s speaker=%s voice=%s",
-                seg_idx + 1,
-                len(segments),
-                speaker,
-                assignment.voice,
+            for chunk_idx, chunk_text in enumerate(segment["chunks"]):
+                work_items.append({
+                    "order": len(work_items),
+                    "segment_index": seg_idx,
+                    "chunk_index": chunk_idx,
+                    "speaker": speaker,
+                    "text": chunk_text,
+                    "assignment": assignment,
+                })
+
+        def voice_key(item: Dict):
+            assignment = item["assignment"]
+            return (
+                assignment.audio_prompt_path or self.default_prompt or "",
+                self._resolve_numeric(assignment.extra, "exaggeration", self.exaggeration),
             )
 
-            for chunk_idx, chunk_text in enumerate(chunks):
-                output_path = output_dir / f"chunk_{chunk_index:04d}.wav"
-                audio, sr = self._synthesize(chunk_text, assignment, speed)
-                sf.write(str(output_path), audio, sr)
-                files.append(str(output_path))
-                chunk_index += 1
-                if callable(progress_cb):
-                    progress_cb()
-                if callable(chunk_cb):
-                    chunk_meta = {
-                        "speaker": speaker,
-                        "text": chunk_text,
-                        "segment_index": seg_idx,
-                        "chunk_index": chunk_idx,
-                    }
-                    chunk_cb(chunk_idx, chunk_meta, str(output_path))
-
-        return files
+        emitter = OrderedChunkEmitter(chunk_cb)
+        for item in schedule_chunks(work_items, voice_key, group_by_speaker):
+            if item["chunk_index"] == 0:
+                logger.info(
+                    "Chatterbox Turbo segment %s/%s speaker=%s voice=%s",
+                    item["segment_index"] + 1,
+                    len(segments),
+                    item["speaker"],
+                    item["assignment"].voice,
+                )
+            output_path = output_dir / f"chunk_{item['order']:04d}.wav"
+            audio, sr = self._synthesize(item["text"], item["assignment"], speed)
+            sf.write(str(output_path), audio, sr)
+            if callable(progress_cb):
+                progress_cb()
+            chunk_meta = {
+                "speaker": item["speaker"],
+                "text": item["text"],
+                "segment_index": item["segment_index"],
+                "chunk_index": item["chunk_index"],
+            }
+            emitter.complete(item["order"], item["chunk_index"], chunk_meta, str(output_path))
+
+        return emitter.files
 
     # ------------------------------------------------------------------ #
     def cleanup(self) -> None:  # pragma: no cover - device cleanup
@@ -294,9 +322,12 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
             except Exception:
                 pass
         
-        # Clear prompt cache
+        # Clear prompt and conditioning caches
         if hasattr(self, 'prompt_cache'):
             self.prompt_cache.clear()
+        if hasattr(self, 'conditionals_cache'):
+            self.conditionals_cache.clear()
+            self._active_conditionals_key = None
         
         # Force garbage collection before emptying CUDA cache
         gc.collect()
@@ -344,24 +375,10 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
                 )
                 prompt_path = None
         if prompt_path:
-            reference_seconds = None
-            try:
-                import soundfile as _sf
-                info = _sf.info(resolved_prompt)
-                reference_seconds = info.frames / float(info.samplerate or 16000)
-            except Exception:  # pragma: no cover - best effort warning
-                reference_seconds = None
-            if reference_seconds is not None and reference_seconds < 5.0:
-                raise ValueError(
-                    f"Reference prompt '{prompt_path}' is only {reference_seconds:.2f}s. "
-                    "Chatterbox Turbo requires clips at least 5 seconds long."
-                )
-            self.model.prepare_conditionals(
-                str(resolved_prompt),
-                exaggeration=self._resolve_numeric(
-                    assignment.extra, "exaggeration", self.exaggeration
-                ),
-                norm_loudness=self.prompt_norm_loudness,
+            self._activate_conditionals(
+                resolved_prompt,
+                prompt_path,
+                self._resolve_numeric(assignment.extra, "exaggeration", self.exaggeration),
             )
         elif self.model.conds is None:
             raise ValueError(
@@ -389,6 +406,117 @@ class ChatterboxTurboLocalEngine(TtsEngineBase):
 
         return audio, self.sample_rate
 
+    # ------------------------------------------------------------------ #
+    def _activate_conditionals(self, resolved_prompt: Path, prompt_path: str, exaggeration: float) -> None:
+        """Point the model at conditioning for this prompt, preparing it only on a cache miss."""
+        key = self._conditionals_key(resolved_prompt, exaggeration)
+        if key == self._active_conditionals_key and self.model.conds is not None:
+            return
+
+        conds = self.conditionals_cache.get(key)
+        if conds is None:
+            conds = self._load_persisted_conditionals(key)
+        if conds is None:
+            self._validate_prompt_duration(resolved_prompt, prompt_path)
+            self.model.prepare_conditionals(
+                str(resolved_prompt),
+                exaggeration=exaggeration,
+                norm_loudness=self.prompt_norm_loudness,
+            )
+            conds = self.model.conds
+            self._persist_conditionals(key, conds)
+        else:
+            self.model.conds = conds
+
+        self.conditionals_cache[key] = conds
+        self.conditionals_cache.move_to_end(key)
+        while len(self.conditionals_cache) > self.conditionals_cache_size:
+            self.conditionals_cache.popitem(last=False)
+        self._active_conditionals_key = key
+
+    def _conditionals_key(self, resolved_prompt: Path, exaggeration: float) -> Tuple:
+        stat = resolved_prompt.stat()
+        return (
+            str(resolved_prompt.resolve()),
+            stat.st_mtime_ns,
+            stat.st_size,
+            round(float(exaggeration), 4),
+            self.prompt_norm_loudness,
+        )
+
+    @staticmethod
+    def _validate_prompt_duration(resolved_prompt: Path, prompt_path: str) -> None:
+        reference_seconds = None
+        try:
+            info = sf.info(str(resolved_prompt))
+            reference_seconds = info.frames / float(info.samplerate or 16000)
+        except Exception:  # pragma: no cover - best effort warning
+            reference_seconds = None
+        if reference_seconds is not None and reference_seconds < 5.0:
+            raise ValueError(
+                f"Reference prompt '{prompt_path}' is only {reference_seconds:.2f}s. "
+                "Chatterbox Turbo requires clips at least 5 seconds long."
+            )
+
+    @staticmethod
+    def _conditionals_file(key: Tuple) -> Path:
+        digest = hashlib.sha1("|".join(str(part) for part in key).encode("utf-8")).hexdigest()
+        return CONDITIONALS_CACHE_DIR / f"{digest}.pt"
+
+    def _load_persisted_conditionals(self, key: Tuple):
+        if not self.persist_conditionals:
+            return None
+        cache_file = self._conditionals_file(key)
+        if not cache_file.exists():
+            return None
+        try:
+            conds_cls = type(self.model.conds) if self.model.conds is not None else None
+            if conds_cls is None:
+                from chatterbox.tts_turbo import Conditionals as conds_cls  # type: ignore
+            conds = conds_cls.load(cache_file, map_location="cpu").to(self.device)
+            os.utime(cache_file)  # mtime doubles as last use for pruning
+            logger.info("Loaded cached Chatterbox conditioning from %s", cache_file)
+            return conds
+        except Exception as exc:  # pragma: no cover - stale or incompatible cache
+            logger.warning("Ignoring cached Chatterbox conditioning %s: %s", cache_file, exc)
+            return None
+
+    def _persist_conditionals(self, key: Tuple, conds) -> None:
+        if not self.persist_conditionals or conds is None or not hasattr(conds, "save"):
+            return
+        cache_file = self._conditionals_file(key)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".pt.tmp")
+            conds.save(tmp_file)
+            os.replace(tmp_file, cache_file)
+        except Exception as exc:  # pragma: no cover - cache is best effort
+            logger.warning("Failed to persist Chatterbox conditioning: %s", exc)
+            return
+        self._prune_persisted_conditionals()
+
+    @staticmethod
+    def _prune_persisted_conditionals() -> None:
+        """Drop conditioning files unused for ``CONDITIONALS_CACHE_MAX_AGE``, then the oldest beyond the size cap."""
+        try:
+            entries = sorted(
+                ((entry.stat(), entry) for entry in CONDITIONALS_CACHE_DIR.glob("*.pt")),
+                key=lambda item: item[0].st_mtime,
+            )
+        except OSError as exc:
+            logger.debug("Skipping Chatterbox conditioning cache pruning: %s", exc)
+            return
+        cutoff = time.time() - CONDITIONALS_CACHE_MAX_AGE
+        total = sum(stat_result.st_size for stat_result, _ in entries)
+        for stat_result, entry in entries:
+            if stat_result.st_mtime >= cutoff and total <= CONDITIONALS_CACHE_MAX_BYTES:
+                break
+            try:
+                entry.unlink()
+            except OSError:
+                continue
+            total -= stat_result.st_size
+
     # ------------------------------------------------------------------ #
     @staticmethod
     def _resolve_numeric(extra: Dict, key: str, default_value: float) -> float:
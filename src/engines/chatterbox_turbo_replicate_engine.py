@@ -1,9 +1,8 @@
 """Chatterbox Turbo engine that streams through Replicate's hosted model."""
 from __future__ import annotations
 
-import io
 import logging
-import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 
@@ -15,6 +14,9 @@ from replicate import Client
 
 from .base import EngineCapabilities, TtsEngineBase, VoiceAssignment
 from ..audio_effects import AudioPostProcessor, VoiceFXSettings
+from ..audio_stream import decode_audio_bytes, decode_audio_stream
+from ..replicate_transport import PredictionRequest, ReplicateTransport
+from ..replicate_uploads import get_upload_cache, is_missing_upload_error
 
 logger = logging.getLogger(__name__)
 
@@ -53,13 +55,16 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
         super().__init__(device="cpu")
         self.client = Client(api_token=api_token)
         self.model_ref = model_version or DEFAULT_CHATTERBOX_TURBO_REPLICATE_MODEL
+        self.transport = ReplicateTransport(api_token, self.model_ref)
+        self.session = requests.Session()
         self.default_voice = default_voice or DEFAULT_CHATTERBOX_TURBO_REPLICATE_VOICE
         self.temperature = float(temperature)
         self.top_p = float(top_p)
         self.top_k = int(top_k)
         self.repetition_penalty = float(repetition_penalty)
         self.seed = seed
-        self.prompt_upload_cache: Dict[str, str] = {}
+        self.api_token = api_token
+        self.upload_cache = get_upload_cache()
         self.post_processor = AudioPostProcessor()
 
     # ------------------------------------------------------------------ #
@@ -78,6 +83,7 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
         progress_cb=None,
         chunk_cb=None,
         parallel_workers: int = 1,
+        max_parallel_workers: Optional[int] = None,
     ) -> List[str]:
         if sample_rate and sample_rate != self.sample_rate:
             logger.warning(
@@ -110,10 +116,10 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
 
         effective_workers = max(1, min(10, parallel_workers))
         
-        # For parallel processing, submit all predictions at once, then poll
+        # For parallel processing, keep parallel_workers predictions in flight
         if effective_workers > 1:
             return self._generate_batch_async(
-                all_chunks, output_dir, effective_workers, progress_cb, chunk_cb
+                all_chunks, output_dir, effective_workers, progress_cb, chunk_cb, max_parallel_workers
             )
         else:
             # Sequential processing
@@ -128,113 +134,87 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
         parallel_workers: int,
         progress_cb,
         chunk_cb,
+        max_parallel_workers: Optional[int] = None,
     ) -> List[str]:
-        """Submit predictions in batches of parallel_workers, then poll for results."""
+        """
+        Run predictions through the async transport, starting with parallel_workers
+        in flight and growing towards max_parallel_workers while Replicate keeps up.
+        """
         
-        logger.info("Processing %d chunks with %d parallel workers", len(all_chunks), parallel_workers)
-        
-        # Parse model string once
-        if ":" in self.model_ref:
-            model_name, version = self.model_ref.split(":", 1)
-        else:
-            model_name = self.model_ref
-            version = None
+        logger.info(
+            "Processing %d chunks with %d parallel workers (ceiling %d)",
+            len(all_chunks),
+            parallel_workers,
+            max(parallel_workers, max_parallel_workers or parallel_workers),
+        )
         
+        # Resolve each distinct reference clip once (uploading in parallel when not cached)
+        prompt_paths = sorted({
+            chunk_info["assignment"].audio_prompt_path
+            for chunk_info in all_chunks
+            if chunk_info["assignment"].audio_prompt_path
+        })
+        reference_urls: Dict[str, str] = {}
+        if prompt_paths:
+            with ThreadPoolExecutor(max_workers=min(4, len(prompt_paths))) as pool:
+                reference_urls = dict(zip(prompt_paths, pool.map(self._upload_reference_audio, prompt_paths)))
+
+        def make_finalize(chunk_info: Dict, output_path: Path):
+            def finalize(data: memoryview) -> str:
+                audio = self._decode_audio(data)
+                fx_settings = VoiceFXSettings.from_payload(chunk_info["assignment"].fx_payload)
+                if fx_settings:
+                    audio = self.post_processor.apply(audio, self.sample_rate, fx_settings)
+                sf.write(str(output_path), audio, self.sample_rate)
+                return str(output_path)
+            return finalize
+
+        def make_request(chunk_info: Dict) -> PredictionRequest:
+            global_idx = chunk_info["global_index"]
+            assignment = chunk_info["assignment"]
+            reference_url = reference_urls.get(assignment.audio_prompt_path) if assignment.audio_prompt_path else None
+            return PredictionRequest(
+                index=global_idx,
+                input=self._build_payload(chunk_info["text"], assignment, reference_url),
+                finalize=make_finalize(chunk_info, output_dir / f"chunk_{global_idx:04d}.wav"),
+                label=f"{global_idx + 1}/{len(all_chunks)} speaker={chunk_info['speaker']}",
+                context=chunk_info,
+                # Key checkpoints by the local clip, not its upload URL, which changes on re-upload
+                checkpoint_input=(
+                    self._build_payload(chunk_info["text"], assignment, assignment.audio_prompt_path)
+                    if reference_url else None
+                ),
+            )
+
         results: Dict[int, str] = {}
-        chunk_queue = list(all_chunks)  # Chunks waiting to be submitted
-        active_predictions = {}  # global_idx -> {prediction, chunk_info}
-        
-        while chunk_queue or active_predictions:
-            # Submit new predictions up to parallel_workers limit
-            while chunk_queue and len(active_predictions) < parallel_workers:
-                chunk_info = chunk_queue.pop(0)
-                global_idx = chunk_info["global_index"]
-                
-                logger.info(
-                    "Submitting chunk %s/%s: speaker=%s (active: %d)",
-                    global_idx + 1,
-                    len(all_chunks),
-                    chunk_info["speaker"],
-                    len(active_predictions) + 1,
-                )
-                
-                try:
-                    # Build params and submit async
-                    reference_url = None
-                    assignment = chunk_info["assignment"]
-                    if assignment.audio_prompt_path:
-                        reference_url = self._upload_reference_audio(assignment.audio_prompt_path)
-                    
-                    params = self._build_payload(chunk_info["text"], assignment, reference_url)
-                    
-                    create_kwargs = {"input": params}
-                    if version:
-                        create_kwargs["version"] = version
-                    else:
-                        create_kwargs["model"] = model_name
-                    
-                    prediction = self.client.predictions.create(**create_kwargs)
-                    active_predictions[global_idx] = {
-                        "prediction": prediction,
-                        "chunk_info": chunk_info,
-                    }
-                except Exception as e:
-                    logger.error("Failed to submit chunk %d: %s", global_idx, e)
-                    raise
-            
-            # Poll active predictions
-            for global_idx in list(active_predictions.keys()):
-                pred_info = active_predictions[global_idx]
-                prediction = pred_info["prediction"]
-                chunk_info = pred_info["chunk_info"]
-                
-                # Reload prediction status
-                prediction.reload()
-                
-                if prediction.status == "succeeded":
-                    output_path = output_dir / f"chunk_{global_idx:04d}.wav"
-                    audio_url = prediction.output
-                    
-                    # Download and process audio
-                    audio = self._download_audio(audio_url)
-                    
-                    # Apply FX if needed
-                    fx_settings = VoiceFXSettings.from_payload(chunk_info["assignment"].fx_payload)
-                    if fx_settings:
-                        audio = self.post_processor.apply(audio, self.sample_rate, fx_settings)
-                    
-                    sf.write(str(output_path), audio, self.sample_rate)
-                    results[global_idx] = str(output_path)
-                    del active_predictions[global_idx]
-                    
-                    logger.info("Chunk %s/%s completed", global_idx + 1, len(all_chunks))
-                    
-                    # Callbacks
-                    if callable(progress_cb):
-                        progress_cb()
-                    if callable(chunk_cb):
-                        chunk_meta = {
-                            "speaker": chunk_info["speaker"],
-                            "text": chunk_info["text"],
-                            "segment_index": chunk_info["seg_idx"],
-                            "chunk_index": chunk_info["chunk_idx"],
-                        }
-                        chunk_cb(global_idx, chunk_meta, str(output_path))
-                        
-                elif prediction.status == "failed":
-                    error_msg = getattr(prediction, "error", "Unknown error")
-                    logger.error("Chunk %d failed: %s", global_idx, error_msg)
-                    del active_predictions[global_idx]
-                    raise RuntimeError(f"Prediction failed for chunk {global_idx}: {error_msg}")
-                    
-                elif prediction.status == "canceled":
-                    logger.error("Chunk %d was canceled", global_idx)
-                    del active_predictions[global_idx]
-                    raise RuntimeError(f"Prediction canceled for chunk {global_idx}")
-            
-            # Small delay before next poll cycle if still have active predictions
-            if active_predictions:
-                time.sleep(0.5)
+
+        def on_complete(request: PredictionRequest, path: str):
+            chunk_info = request.context
+            results[request.index] = path
+            logger.info("Chunk %s/%s completed", request.index + 1, len(all_chunks))
+            if callable(progress_cb):
+                progress_cb()
+            if callable(chunk_cb):
+                chunk_meta = {
+                    "speaker": chunk_info["speaker"],
+                    "text": chunk_info["text"],
+                    "segment_index": chunk_info["seg_idx"],
+                    "chunk_index": chunk_info["chunk_idx"],
+                }
+                chunk_cb(request.index, chunk_meta, path)
+
+        pending = [make_request(chunk_info) for chunk_info in all_chunks]
+        try:
+            self.transport.run_batch(pending, parallel_workers, on_complete, max_parallel_workers)
+        except Exception as exc:
+            # Replicate can drop an upload before its advertised expiry; re-upload once and resume
+            stale = self._invalidate_missing_uploads(exc, reference_urls)
+            if not stale:
+                raise
+            for path_str in stale:
+                reference_urls[path_str] = self._upload_reference_audio(path_str)
+            pending = [make_request(chunk_info) for chunk_info in all_chunks if chunk_info["global_index"] not in results]
+            self.transport.run_batch(pending, parallel_workers, on_complete, max_parallel_workers)
         
         # Return files in order
         return [results[i] for i in range(len(all_chunks))]
@@ -304,7 +284,16 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
 
         params = self._build_payload(text, assignment, reference_url)
         try:
-            output_url = self.client.run(self.model_ref, input=params)
+            try:
+                output_url = self.client.run(self.model_ref, input=params)
+            except Exception as exc:
+                if not reference_url or not self._invalidate_missing_uploads(
+                    exc, {assignment.audio_prompt_path: reference_url}
+                ):
+                    raise
+                reference_url = self._upload_reference_audio(assignment.audio_prompt_path)
+                params = self._build_payload(text, assignment, reference_url)
+                output_url = self.client.run(self.model_ref, input=params)
         except Exception as exc:  # pragma: no cover - API failure
             raise RuntimeError(f"Chatterbox Turbo (Replicate) request failed: {exc}") from exc
 
@@ -353,12 +342,18 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
     # ------------------------------------------------------------------ #
     def _upload_reference_audio(self, path_str: str) -> str:
         resolved = self._resolve_prompt_path(path_str)
-        key = str(resolved.resolve())
-        cached = self.prompt_upload_cache.get(key)
-        if cached:
-            return cached
-
-        file_resource = self.client.files.create(str(resolved))
+        return self.upload_cache.get_or_upload(resolved, self.api_token, self._create_upload)
+
+    def _invalidate_missing_uploads(self, exc: BaseException, reference_urls: Dict[str, str]) -> List[str]:
+        """Drop cached uploads that ``exc`` reports as missing; returns the affected prompt paths."""
+        stale = [path_str for path_str, url in reference_urls.items() if is_missing_upload_error(exc, url)]
+        for path_str in stale:
+            logger.warning("Replicate no longer serves the upload of %s; uploading it again", Path(path_str).name)
+            self.upload_cache.invalidate(self._resolve_prompt_path(path_str), self.api_token)
+        return stale
+
+    def _create_upload(self, path: Path) -> Tuple[str, Optional[object]]:
+        file_resource = self.client.files.create(str(path))
         url = (
             file_resource.urls.get("get")
             or file_resource.urls.get("download")
@@ -366,8 +361,7 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
         )
         if not url:
             raise RuntimeError("Replicate did not return a download URL for uploaded prompt.")
-        self.prompt_upload_cache[key] = url
-        return url
+        return url, getattr(file_resource, "expires_at", None)
 
     # ------------------------------------------------------------------ #
     @staticmethod
@@ -386,15 +380,15 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
     def _download_audio(self, url: str) -> np.ndarray:
         if not url:
             raise RuntimeError("Replicate response did not include an audio URL.")
-        response = requests.get(url, stream=True, timeout=60)
-        response.raise_for_status()
-        buffer = io.BytesIO(response.content)
-        audio_array, sr = sf.read(buffer, dtype="float32")
-        if sr != self.sample_rate:
-            audio_array = self._resample_audio(audio_array, sr)
-        if audio_array.ndim > 1:
-            audio_array = np.mean(audio_array, axis=1)
-        return audio_array.astype("float32")
+        with self.session.get(str(url), stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            audio_array, sr = decode_audio_stream(response.raw)
+        return self._resample_audio(audio_array, sr)
+
+    def _decode_audio(self, data: memoryview) -> np.ndarray:
+        audio_array, sr = decode_audio_bytes(data)
+        return self._resample_audio(audio_array, sr)
 
     # ------------------------------------------------------------------ #
     def _resample_audio(self, audio: np.ndarray, original_sr: int) -> np.ndarray:
@@ -406,7 +400,7 @@ class ChatterboxTurboReplicateEngine(TtsEngineBase):
             raise RuntimeError(
                 "librosa is required to resample Replicate audio output. Install via requirements."
             ) from exc
-        return librosa.resample(audio, orig_sr=original_sr, target_sr=self.sample_rate)
+        return librosa.resample(audio, orig_sr=original_sr, target_sr=self.sample_rate).astype(np.float32, copy=False)
 
 
 __all__ = [
@@ -1,9 +1,20 @@
 """Kokoro-based TTS engine implementation."""
 from __future__ import annotations
 
+import copy
+import hashlib
+import json
 import logging
+import os
+import pickle
+import re
+import sqlite3
+import tempfile
+import threading
+import unicodedata
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Callable, Dict, List, Optional, Tuple, Union
 
 import gc
 
@@ -16,14 +27,315 @@ from ..audio_effects import AudioPostProcessor, VoiceFXSettings
 from ..custom_voice_store import CUSTOM_CODE_PREFIX, get_custom_voice_by_code
 
 DEFAULT_SAMPLE_RATE = 24000
+KOKORO_REPO_ID = "hexgrad/Kokoro-82M"
+CUSTOM_VOICE_PACK_DIR = Path("data/cache/custom_voice_packs")
+G2P_CACHE_SIZE = 8192
+G2P_DISK_CACHE_PATH = Path("data/cache/kokoro_g2p.sqlite3")
+# Chunks rarely repeat whole, but sentences do, so G2P is cached per sentence
+G2P_SENTENCE_SPLIT = re.compile(
+    r"(?<=[.!?\u2026\u3002\uff01\uff1f])\s+|(?<=[.!?\u2026][\"'\u201d\u2019)\]])\s+"
+)
 
 try:
-    from kokoro import KPipeline  # type: ignore
+    from kokoro import KModel, KPipeline  # type: ignore
     KOKORO_AVAILABLE = True
 except ImportError:  # pragma: no cover - handled upstream
     KOKORO_AVAILABLE = False
     logging.warning("Kokoro not installed. Local TTS will not be available.")
 
+try:
+    import psutil  # type: ignore
+except ImportError:  # pragma: no cover - optional, only used for memory reporting
+    psutil = None
+
+
+def _normalize_components(components: List) -> List[Tuple[str, float]]:
+    """Return ``(voice, weight)`` pairs from stored custom voice components."""
+    normalized: List[Tuple[str, float]] = []
+    for component in components or []:
+        comp_voice: Optional[str] = None
+        weight_value: float = 1.0
+
+        if isinstance(component, str):
+            comp_voice = component.strip()
+        elif isinstance(component, dict):
+            comp_voice = (component.get("voice") or component.get("name") or "").strip()
+            weight_value = float(
+                component.get("weight")
+                or component.get("ratio")
+                or component.get("mix")
+                or 1.0
+            )
+        else:
+            continue
+
+        if not comp_voice:
+            continue
+        normalized.append((comp_voice, max(weight_value, 0.0)))
+    return normalized
+
+
+def custom_voice_pack_key(components: List) -> Optional[str]:
+    """Hash of a blend's components and relative weights; identical blends share one pack."""
+    normalized = _normalize_components(components)
+    if not normalized:
+        return None
+    total = sum(weight for _, weight in normalized)
+    if total <= 0:
+        normalized = [(voice, 1.0) for voice, _ in normalized]
+        total = float(len(normalized))
+    canonical = sorted((voice, round(weight / total, 6)) for voice, weight in normalized)
+    payload = json.dumps(canonical, separators=(",", ":"))
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def custom_voice_pack_path(pack_key: str) -> Path:
+    return CUSTOM_VOICE_PACK_DIR / f"{pack_key}.pt"
+
+
+def blend_voice_packs(components: List, load_voice: Callable[[str], torch.FloatTensor]) -> torch.FloatTensor:
+    """Weighted sum of the component voice packs."""
+    normalized = _normalize_components(components)
+    packs = [load_voice(comp_voice) for comp_voice, _ in normalized]
+    weights = [weight for _, weight in normalized]
+
+    if not packs:
+        raise ValueError("No valid component voices could be loaded for blending.")
+
+    stacked = torch.stack(packs)
+    weight_tensor = torch.tensor(weights, dtype=stacked.dtype, device=stacked.device)
+    total = float(weight_tensor.sum().item())
+    if total <= 0:
+        weight_tensor = torch.ones_like(weight_tensor)
+        total = float(weight_tensor.sum().item())
+    weight_tensor = weight_tensor / total
+
+    while len(weight_tensor.shape) < len(stacked.shape):
+        weight_tensor = weight_tensor.unsqueeze(-1)
+
+    return torch.sum(stacked * weight_tensor, dim=0)
+
+
+def load_custom_voice_pack(pack_key: str) -> Optional[torch.FloatTensor]:
+    path = custom_voice_pack_path(pack_key)
+    if not path.exists():
+        return None
+    try:
+        return torch.load(path, map_location="cpu", weights_only=True)
+    except Exception as exc:  # pragma: no cover - stale or corrupt cache file
+        logging.warning("Ignoring cached custom voice pack %s: %s", path.name, exc)
+        return None
+
+
+def save_custom_voice_pack(pack_key: str, pack: torch.FloatTensor) -> None:
+    path = custom_voice_pack_path(pack_key)
+    tmp_path: Optional[Path] = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Unique temp name: the precompute thread and the engine may save the same pack at once
+        with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f"{path.stem}.", suffix=".pt.tmp", delete=False) as handle:
+            tmp_path = Path(handle.name)
+            torch.save(pack.detach().cpu(), handle)
+        os.replace(tmp_path, path)
+    except Exception as exc:  # pragma: no cover - cache is best effort
+        logging.warning("Failed to persist custom voice pack %s: %s", path.name, exc)
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
+
+
+def _module_tensor_bytes(module) -> int:
+    """Bytes held by a torch module's parameters and buffers (0 for anything else)."""
+    if not isinstance(module, torch.nn.Module):
+        return 0
+    tensors = list(module.parameters()) + list(module.buffers())
+    return sum(tensor.nelement() * tensor.element_size() for tensor in tensors)
+
+
+def _download_voice_pack(voice: str) -> torch.FloatTensor:
+    """Load a stock voice pack without building a KPipeline."""
+    if voice.endswith(".pt"):
+        return torch.load(voice, map_location="cpu", weights_only=True)
+    from huggingface_hub import hf_hub_download
+
+    path = hf_hub_download(repo_id=KOKORO_REPO_ID, filename=f"voices/{voice}.pt")
+    return torch.load(path, map_location="cpu", weights_only=True)
+
+
+def precompute_custom_voice_pack(definition: Dict) -> Optional[str]:
+    """Blend and persist a custom voice so its first synthesis skips the blend step."""
+    components = definition.get("components") or []
+    pack_key = custom_voice_pack_key(components)
+    if not pack_key or custom_voice_pack_path(pack_key).exists():
+        return pack_key
+    pack = blend_voice_packs(components, _download_voice_pack)
+    save_custom_voice_pack(pack_key, pack)
+    logging.info("Precomputed custom voice pack %s for '%s'", pack_key, definition.get("name"))
+    return pack_key
+
+
+def remove_custom_voice_pack(components: List, keep_keys: Optional[set] = None) -> bool:
+    """Delete a persisted blend unless another custom voice still uses it."""
+    pack_key = custom_voice_pack_key(components)
+    if not pack_key or (keep_keys and pack_key in keep_keys):
+        return False
+    path = custom_voice_pack_path(pack_key)
+    if not path.exists():
+        return False
+    path.unlink(missing_ok=True)
+    return True
+
+
+class G2PCache:
+    """
+    LRU cache of grapheme-to-phoneme results keyed by (lang_code, NFC sentence).
+
+    Optionally backed by a SQLite file so phonemes survive restarts; hits return
+    copies so callers can never mutate cached tokens.
+    """
+
+    def __init__(self, max_entries: int = G2P_CACHE_SIZE, disk_path: Optional[Path] = None):
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[Tuple[str, str], object]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats: Dict[str, int] = {"hits": 0, "disk_hits": 0, "misses": 0}
+        if disk_path:
+            try:
+                disk_path.parent.mkdir(parents=True, exist_ok=True)
+                self._db = sqlite3.connect(str(disk_path), check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS g2p (lang TEXT, text TEXT, result BLOB, PRIMARY KEY (lang, text))"
+                )
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logging.warning("Kokoro G2P disk cache disabled: %s", exc)
+                self._db = None
+
+    def lookup(self, lang_code: str, text: str, compute: Callable[[str], object]):
+        key = (lang_code, text)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return copy.deepcopy(self._entries[key])
+            result = self._load(key)
+            if result is not None:
+                self.stats["disk_hits"] += 1
+                self._store(key, result, persist=False)
+                return copy.deepcopy(result)
+            self.stats["misses"] += 1
+
+        result = compute(text)
+        with self._lock:
+            self._store(key, copy.deepcopy(result), persist=True)
+        return result
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self.stats["hits"] + self.stats["disk_hits"] + self.stats["misses"]
+            hits = self.stats["hits"] + self.stats["disk_hits"]
+            return {
+                **self.stats,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _store(self, key: Tuple[str, str], result, persist: bool) -> None:
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        if persist and self._db is not None:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO g2p (lang, text, result) VALUES (?, ?, ?)",
+                    (key[0], key[1], pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL)),
+                )
+                self._db.commit()
+            except (sqlite3.Error, pickle.PicklingError, TypeError, AttributeError) as exc:
+                logging.debug("Skipping G2P disk cache write: %s", exc)
+
+    def _load(self, key: Tuple[str, str]):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute(
+                "SELECT result FROM g2p WHERE lang = ? AND text = ?", key
+            ).fetchone()
+            return pickle.loads(row[0]) if row else None
+        except Exception as exc:  # pragma: no cover - stale rows from another misaki version
+            logging.debug("Ignoring G2P disk cache entry: %s", exc)
+            return None
+
+
+def split_g2p_sentences(text: str) -> List[str]:
+    """NFC-normalize, collapse whitespace and split text into the sentences used as G2P cache keys."""
+    normalized = " ".join(unicodedata.normalize("NFC", text).split())
+    return [sentence for sentence in G2P_SENTENCE_SPLIT.split(normalized) if sentence]
+
+
+def join_g2p_results(results: List[object]):
+    """
+    Combine per-sentence G2P outputs into what one call on the whole text returns.
+
+    Handles the ``(phonemes, tokens)`` pairs returned by misaki frontends (tokens
+    may be None) and bare phoneme strings. Returns None for any other shape.
+    """
+    if all(isinstance(result, str) for result in results):
+        return " ".join(result for result in results if result)
+    if not all(isinstance(result, tuple) and len(result) == 2 and isinstance(result[0], str) for result in results):
+        return None
+    phonemes = " ".join(result[0] for result in results if result[0])
+    token_lists = [result[1] for result in results]
+    if all(tokens is None for tokens in token_lists):
+        return phonemes, None
+    if not all(isinstance(tokens, list) for tokens in token_lists):
+        return None
+    joined: List[object] = []
+    for tokens in token_lists:
+        # The space that separated two sentences belongs to the last token before it
+        if joined and tokens and hasattr(joined[-1], "whitespace") and not joined[-1].whitespace:
+            joined[-1].whitespace = " "
+        joined.extend(tokens)
+    return phonemes, joined
+
+
+class CachedG2P:
+    """
+    Drop-in wrapper for a KPipeline's ``g2p`` frontend that consults a G2PCache.
+
+    Text is looked up sentence by sentence, so a chunk that shares sentences with
+    earlier chunks reuses their phonemes even when the chunk as a whole is new.
+    """
+
+    def __init__(self, g2p, lang_code: str, cache: G2PCache):
+        self._g2p = g2p
+        self._lang_code = lang_code
+        self._cache = cache
+
+    def __call__(self, text: str):
+        sentences = split_g2p_sentences(text)
+        if len(sentences) <= 1:
+            return self._cache.lookup(self._lang_code, sentences[0] if sentences else "", self._g2p)
+        results = [self._cache.lookup(self._lang_code, sentence, self._g2p) for sentence in sentences]
+        joined = join_g2p_results(results)
+        if joined is None:
+            return self._cache.lookup(self._lang_code, " ".join(sentences), self._g2p)
+        return joined
+
+    def __getattr__(self, name: str):
+        return getattr(self._g2p, name)
+
 
 class KokoroEngine(TtsEngineBase):
     """Local GPU TTS via Kokoro pipelines."""
@@ -34,7 +346,12 @@ class KokoroEngine(TtsEngineBase):
         supported_languages=None,  # Determined by kokoro pipelines dynamically
     )
 
-    def __init__(self, device: str = "auto"):
+    def __init__(
+        self,
+        device: str = "auto",
+        g2p_cache_size: int = G2P_CACHE_SIZE,
+        g2p_disk_cache: bool = False,
+    ):
         if not KOKORO_AVAILABLE:
             raise ImportError("Kokoro is not installed. Run: pip install kokoro>=0.9.4")
 
@@ -44,7 +361,14 @@ class KokoroEngine(TtsEngineBase):
             self.device = "cuda" if torch.cuda.is_available() else "cpu"
 
         self.pipelines: Dict[str, KPipeline] = {}
+        # One acoustic model shared by every language pipeline; pipelines only add G2P frontends
+        self.model: Optional[KModel] = None
+        self.pipeline_memory: Dict[str, Dict[str, Optional[int]]] = {}
+        self.g2p_cache = G2PCache(g2p_cache_size, G2P_DISK_CACHE_PATH if g2p_disk_cache else None)
+        # Blended packs keyed by component hash; packs are language independent
+        # so every lang pipeline shares them.
         self.custom_voice_cache: Dict[str, torch.FloatTensor] = {}
+        self._custom_voice_keys: Dict[str, str] = {}
         self.post_processor = AudioPostProcessor()
         logging.info("Initializing Kokoro engine on %s", self.device)
 
@@ -146,15 +470,18 @@ class KokoroEngine(TtsEngineBase):
         """Release cached pipelines and GPU memory."""
         logging.info("Cleaning up Kokoro engine resources")
         
-        # Clear pipeline references
-        for lang_code, pipeline in list(self.pipelines.items()):
+        # Clear pipeline references; they all share self.model
+        self.pipelines.clear()
+        self.pipeline_memory.clear()
+        self.g2p_cache.clear()
+        self.g2p_cache.close()
+        if self.model is not None:
             try:
-                # Move pipeline model to CPU before deletion to free VRAM
-                if hasattr(pipeline, 'model') and pipeline.model is not None:
-                    pipeline.model.cpu()
+                # Move the shared model to CPU before deletion to free VRAM
+                self.model.cpu()
             except Exception:
                 pass
-        self.pipelines.clear()
+            self.model = None
         
         # Clear custom voice cache (these are GPU tensors)
         self.custom_voice_cache.clear()
@@ -212,10 +539,54 @@ class KokoroEngine(TtsEngineBase):
     # ------------------------------------------------------------------
     def _get_pipeline(self, lang_code: str) -> KPipeline:
         if lang_code not in self.pipelines:
+            model = self._get_model()
             logging.info("Creating Kokoro pipeline for %s", lang_code)
-            self.pipelines[lang_code] = KPipeline(lang_code=lang_code)
+            self.pipelines[lang_code] = self._measure_memory(
+                lang_code,
+                lambda: KPipeline(lang_code=lang_code, repo_id=KOKORO_REPO_ID, model=model),
+            )
+            pipeline = self.pipelines[lang_code]
+            if callable(getattr(pipeline, "g2p", None)):
+                pipeline.g2p = CachedG2P(pipeline.g2p, lang_code, self.g2p_cache)
         return self.pipelines[lang_code]
 
+    # ------------------------------------------------------------------
+    def _get_model(self) -> KModel:
+        if self.model is None:
+            logging.info("Loading shared Kokoro model on %s", self.device)
+            self.model = self._measure_memory(
+                "model",
+                lambda: KModel(repo_id=KOKORO_REPO_ID).to(self.device).eval(),
+            )
+        return self.model
+
+    # ------------------------------------------------------------------
+    def _measure_memory(self, label: str, factory: Callable):
+        """
+        Build an object and record the memory it added: weight/buffer bytes when it
+        is a torch module, the process RSS delta (when psutil is installed) and GPU
+        allocations. Pipelines share the model, so their tensor_bytes stay at zero.
+        """
+        process = psutil.Process() if psutil is not None else None
+        rss_before = process.memory_info().rss if process is not None else 0
+        cuda = torch.cuda.is_available() and str(self.device).startswith("cuda")
+        gpu_before = torch.cuda.memory_allocated() if cuda else 0
+        result = factory()
+        usage = {
+            "tensor_bytes": _module_tensor_bytes(result),
+            "rss_bytes": max(0, process.memory_info().rss - rss_before) if process is not None else None,
+            "gpu_bytes": max(0, torch.cuda.memory_allocated() - gpu_before) if cuda else 0,
+        }
+        self.pipeline_memory[label] = usage
+        logging.info(
+            "Kokoro %s memory: %.1f MB tensors, %s RSS, %.1f MB GPU",
+            label,
+            usage["tensor_bytes"] / 1024**2,
+            f"{usage['rss_bytes'] / 1024**2:.1f} MB" if usage["rss_bytes"] is not None else "unknown",
+            usage["gpu_bytes"] / 1024**2,
+        )
+        return result
+
     # ------------------------------------------------------------------
     def _resolve_voice_input(
         self, pipeline: KPipeline, voice: str, lang_code: str
@@ -223,89 +594,57 @@ class KokoroEngine(TtsEngineBase):
         if not voice or not voice.startswith(CUSTOM_CODE_PREFIX):
             return voice
 
-        cache_key = f"{lang_code}:{voice}"
-        if cache_key in self.custom_voice_cache:
-            return self.custom_voice_cache[cache_key]
+        pack_key = self._custom_voice_keys.get(voice)
+        if pack_key and pack_key in self.custom_voice_cache:
+            return self.custom_voice_cache[pack_key]
 
         definition = get_custom_voice_by_code(voice)
         if not definition:
             raise ValueError(f"Custom voice '{voice}' does not exist.")
 
         components = definition.get("components") or []
-        if not components:
+        pack_key = custom_voice_pack_key(components)
+        if not pack_key:
             raise ValueError(f"Custom voice '{voice}' has no components.")
-
-        blended_pack = self._blend_custom_voice(pipeline, components)
-        self.custom_voice_cache[cache_key] = blended_pack
+        self._custom_voice_keys[voice] = pack_key
+
+        blended_pack = self.custom_voice_cache.get(pack_key)
+        if blended_pack is None:
+            blended_pack = load_custom_voice_pack(pack_key)
+        if blended_pack is None:
+            blended_pack = self._blend_custom_voice(pipeline, components)
+            save_custom_voice_pack(pack_key, blended_pack)
+        self.custom_voice_cache[pack_key] = blended_pack
         return blended_pack
 
     # ------------------------------------------------------------------
     def _blend_custom_voice(self, pipeline: KPipeline, components: List) -> torch.FloatTensor:
-        packs: List[torch.FloatTensor] = []
-        weights: List[float] = []
-
-        for component in components:
-            comp_voice: Optional[str] = None
-            weight_value: float = 1.0
-
-            if isinstance(component, str):
-                comp_voice = component.strip()
-            elif isinstance(component, dict):
-                comp_voice = (component.get("voice") or component.get("name") or "").strip()
-                weight_value = float(
-                    component.get("weight")
-                    or component.get("ratio")
-                    or component.get("mix")
-                    or 1.0
-                )
-            else:
-                continue
-
-            if not comp_voice:
-                continue
-
-            pack = pipeline.load_voice(comp_voice)
-            packs.append(pack)
-            weights.append(max(weight_value, 0.0))
-
-        if not packs:
-            raise ValueError("No valid component voices could be loaded for blending.")
-
-        stacked = torch.stack(packs)
-        weight_tensor = torch.tensor(weights, dtype=stacked.dtype, device=stacked.device)
-        total = float(weight_tensor.sum().item())
-        if total <= 0:
-            weight_tensor = torch.ones_like(weight_tensor)
-            total = float(weight_tensor.sum().item())
-        weight_tensor = weight_tensor / total
-
-        while len(weight_tensor.shape) < len(stacked.shape):
-            weight_tensor = weight_tensor.unsqueeze(-1)
-
-        return torch.sum(stacked * weight_tensor, dim=0)
+        return blend_voice_packs(components, pipeline.load_voice)
 
     # ------------------------------------------------------------------
     def clear_custom_voice_cache(self, voice_code: Optional[str] = None) -> int:
-        if not self.custom_voice_cache:
-            return 0
-
         if not voice_code:
             removed = len(self.custom_voice_cache)
             self.custom_voice_cache.clear()
+            self._custom_voice_keys.clear()
             return removed
 
-        suffix = f":{voice_code}"
-        original = len(self.custom_voice_cache)
-        self.custom_voice_cache = {
-            key: value for key, value in self.custom_voice_cache.items() if not key.endswith(suffix)
-        }
-        return original - len(self.custom_voice_cache)
+        pack_key = self._custom_voice_keys.pop(voice_code, None)
+        if not pack_key or pack_key in self._custom_voice_keys.values():
+            return 0
+        return 1 if self.custom_voice_cache.pop(pack_key, None) is not None else 0
+
+    # ------------------------------------------------------------------
+    def get_generation_stats(self) -> Dict:
+        """Return G2P cache hit/miss counters."""
+        return {"g2p_cache": self.g2p_cache.snapshot()}
 
     # ------------------------------------------------------------------
     def get_device_info(self) -> Dict:
         info = {
             "device": self.device,
             "cuda_available": torch.cuda.is_available(),
+            "pipeline_memory": dict(self.pipeline_memory),
         }
         if torch.cuda.is_available():
             info["cuda_device_name"] = torch.cuda.get_device_name(0)
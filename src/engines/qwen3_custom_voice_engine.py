@@ -12,11 +12,13 @@ import numpy as np
 import soundfile as sf
 import torch
 
-from .base import EngineCapabilities, TtsEngineBase, VoiceAssignment
+from .base import AdaptiveBatcher, EngineCapabilities, TtsEngineBase, VoiceAssignment, release_cuda_cache
 from ..audio_effects import AudioPostProcessor, VoiceFXSettings
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 4
+
 # Disable HuggingFace Hub symlinks warning on Windows
 os.environ.setdefault("HF_HUB_DISABLE_SYMLINKS_WARNING", "1")
 
@@ -49,6 +51,7 @@ class Qwen3CustomVoiceEngine(TtsEngineBase):
         attn_implementation: str = "flash_attention_2",
         default_language: str = "Auto",
         default_instruct: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
     ):
         if not QWEN3_AVAILABLE:
             raise ImportError("qwen-tts is not installed. Run setup to enable Qwen3-TTS local mode.")
@@ -85,6 +88,7 @@ class Qwen3CustomVoiceEngine(TtsEngineBase):
         self.default_language = default_language or "Auto"
         self.default_instruct = default_instruct
         self.post_processor = AudioPostProcessor()
+        self.batcher = AdaptiveBatcher(batch_size, on_oom=release_cuda_cache)
 
         self._sample_rate = None
         self._supported_speakers = self._safe_supported_list("speakers")
@@ -123,11 +127,9 @@ class Qwen3CustomVoiceEngine(TtsEngineBase):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        files: List[str] = []
-        chunk_index = 0
+        work_items: List[Dict] = []
         for seg_idx, segment in enumerate(segments):
             speaker = segment["speaker"]
-            chunks = segment["chunks"]
             assignment = self._voice_assignment_for(voice_config, speaker)
             voice_name = assignment.voice or self._fallback_speaker()
             language = (assignment.extra.get("language") if assignment.extra else None) or self.default_language
@@ -143,35 +145,62 @@ class Qwen3CustomVoiceEngine(TtsEngineBase):
             if not voice_name:
                 raise ValueError("Qwen3 CustomVoice requires a speaker selection.")
 
-            logger.info(
-                "Qwen3 CustomVoice segment %s/%s speaker=%s language=%s instruct=%s",
-                seg_idx + 1,
-                len(segments),
-                voice_name,
-                language,
-                instruct[:50] + "..." if instruct and len(instruct) > 50 else instruct,
+            for chunk_idx, chunk_text in enumerate(segment["chunks"]):
+                work_items.append({
+                    "order": len(work_items),
+                    "segment_index": seg_idx,
+                    "chunk_index": chunk_idx,
+                    "speaker": speaker,
+                    "text": chunk_text,
+                    "assignment": assignment,
+                    "voice_name": voice_name,
+                    "language": language,
+                    "instruct": instruct,
+                })
+
+        def batch_key(item: Dict):
+            return (item["voice_name"], item["language"], item["instruct"])
+
+        def run_batch(batch: List[Dict]) -> List[np.ndarray]:
+            first = batch[0]
+            wavs, sr = self._synthesize_many(
+                [item["text"] for item in batch],
+                first["voice_name"],
+                first["language"],
+                first["instruct"],
             )
+            self._sample_rate = sr
+            return wavs
 
-            for chunk_idx, chunk_text in enumerate(chunks):
-                output_path = output_dir / f"chunk_{chunk_index:04d}.wav"
-                audio, sr = self._synthesize(chunk_text, voice_name, language, instruct)
-                self._sample_rate = sr
-                fx_settings = VoiceFXSettings.from_payload(assignment.fx_payload)
-                if fx_settings:
-                    audio = self.post_processor.apply(audio, sr, fx_settings)
-                sf.write(str(output_path), audio, sr)
-                files.append(str(output_path))
-                chunk_index += 1
-                if callable(progress_cb):
-                    progress_cb()
-                if callable(chunk_cb):
-                    chunk_meta = {
-                        "speaker": speaker,
-                        "text": chunk_text,
-                        "segment_index": seg_idx,
-                        "chunk_index": chunk_idx,
-                    }
-                    chunk_cb(chunk_idx, chunk_meta, str(output_path))
+        files: List[str] = []
+        for item, audio in self.batcher.run(work_items, batch_key, run_batch):
+            if item["chunk_index"] == 0:
+                instruct = item["instruct"]
+                logger.info(
+                    "Qwen3 CustomVoice segment %s/%s speaker=%s language=%s instruct=%s",
+                    item["segment_index"] + 1,
+                    len(segments),
+                    item["voice_name"],
+                    item["language"],
+                    instruct[:50] + "..." if instruct and len(instruct) > 50 else instruct,
+                )
+            sr = self.sample_rate
+            output_path = output_dir / f"chunk_{item['order']:04d}.wav"
+            fx_settings = VoiceFXSettings.from_payload(item["assignment"].fx_payload)
+            if fx_settings:
+                audio = self.post_processor.apply(audio, sr, fx_settings)
+            sf.write(str(output_path), audio, sr)
+            files.append(str(output_path))
+            if callable(progress_cb):
+                progress_cb()
+            if callable(chunk_cb):
+                chunk_meta = {
+                    "speaker": item["speaker"],
+                    "text": item["text"],
+                    "segment_index": item["segment_index"],
+                    "chunk_index": item["chunk_index"],
+                }
+                chunk_cb(item["chunk_index"], chunk_meta, str(output_path))
 
         return files
 
@@ -233,6 +262,26 @@ class Qwen3CustomVoiceEngine(TtsEngineBase):
         audio = np.asarray(wavs[0], dtype=np.float32)
         return audio, int(sr)
 
+    def _synthesize_many(
+        self,
+        texts: List[str],
+        speaker: str,
+        language: str,
+        instruct: Optional[str],
+    ) -> tuple[List[np.ndarray], int]:
+        """Synthesize several chunks for one speaker in a single model call."""
+        if len(texts) == 1:
+            audio, sr = self._synthesize(texts[0], speaker, language, instruct)
+            return [audio], sr
+        count = len(texts)
+        wavs, sr = self.model.generate_custom_voice(
+            text=list(texts),
+            language=[language or "Auto"] * count,
+            speaker=[speaker] * count,
+            instruct=[instruct or ""] * count,
+        )
+        return [np.asarray(wav, dtype=np.float32) for wav in wavs], int(sr)
+
     def _ensure_model(self, model_id: str) -> Path:
         local_model_dir = Path(__file__).parent.parent.parent / "models" / "qwen3"
         local_model_dir.mkdir(parents=True, exist_ok=True)
@@ -1,24 +1,40 @@
 """Local Qwen3-TTS Voice Clone engine adapter."""
 from __future__ import annotations
 
+import dataclasses
 import gc
 import hashlib
-import json
+import importlib
 import logging
 import os
-import re
+from collections import OrderedDict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 import torch
 
-from .base import EngineCapabilities, TtsEngineBase, VoiceAssignment
+from .base import (
+    AdaptiveBatcher,
+    EngineCapabilities,
+    OrderedChunkEmitter,
+    TtsEngineBase,
+    VoiceAssignment,
+    release_cuda_cache,
+    schedule_chunks,
+)
 from ..audio_effects import AudioPostProcessor, VoiceFXSettings
+from ..transcription_service import get_transcription_service
 
 logger = logging.getLogger(__name__)
 
+DEFAULT_BATCH_SIZE = 4
+VOICE_PROMPT_CACHE_SIZE = 16
+VOICE_PROMPT_CACHE_DIR = Path(__file__).parent.parent.parent / "data" / "voice_prompts" / "clone_prompts"
+# Persisted prompts may only be rebuilt into dataclasses from this package
+VOICE_PROMPT_MODULE_PREFIX = "qwen_tts"
+
 # Disable HuggingFace Hub symlinks warning on Windows
 os.environ.setdefault("HF_HUB_DISABLE_SYMLINKS_WARNING", "1")
 
@@ -32,15 +48,49 @@ except ImportError:  # pragma: no cover - optional dependency
     snapshot_download = None  # type: ignore[assignment]
     QWEN3_AVAILABLE = False
 
-# Try to import SenseVoice for automatic transcription
-try:
-    from funasr import AutoModel as FunASRAutoModel
 
-    SENSEVOICE_AVAILABLE = True
-except ImportError:
-    FunASRAutoModel = None  # type: ignore[assignment]
-    SENSEVOICE_AVAILABLE = False
+def _is_plain_prompt_value(value: Any) -> bool:
+    if value is None or isinstance(value, (torch.Tensor, str, bool, int, float)):
+        return True
+    if isinstance(value, (list, tuple)):
+        return all(_is_plain_prompt_value(item) for item in value)
+    return False
+
+
+def _voice_prompt_to_state(prompt: Any) -> Optional[Dict[str, Any]]:
+    """Flatten a clone prompt (a dataclass or list of them) into tensors and plain values.
 
+    The result loads with ``torch.load(weights_only=True)``. Returns None for
+    prompt types that cannot be flattened that way; those stay memory-only.
+    """
+    items = prompt if isinstance(prompt, list) else [prompt]
+    if not items or not all(dataclasses.is_dataclass(item) and not isinstance(item, type) for item in items):
+        return None
+    item_type = type(items[0])
+    if any(type(item) is not item_type for item in items):
+        return None
+    fields = [{field.name: getattr(item, field.name) for field in dataclasses.fields(item)} for item in items]
+    if not all(_is_plain_prompt_value(value) for item_fields in fields for value in item_fields.values()):
+        return None
+    return {
+        "item_type": f"{item_type.__module__}:{item_type.__qualname__}",
+        "is_list": isinstance(prompt, list),
+        "items": fields,
+    }
+
+
+def _voice_prompt_from_state(state: Dict[str, Any]) -> Any:
+    """Rebuild a clone prompt saved by :func:`_voice_prompt_to_state`."""
+    module_name, _, qualname = str(state["item_type"]).partition(":")
+    if module_name.split(".")[0] != VOICE_PROMPT_MODULE_PREFIX:
+        raise ValueError(f"Refusing to rebuild voice prompt type {state['item_type']!r}")
+    item_type: Any = importlib.import_module(module_name)
+    for part in qualname.split("."):
+        item_type = getattr(item_type, part)
+    if not (isinstance(item_type, type) and dataclasses.is_dataclass(item_type)):
+        raise ValueError(f"Voice prompt type {state['item_type']!r} is not a dataclass")
+    items = [item_type(**fields) for fields in state["items"]]
+    return items if state["is_list"] else items[0]
 
 class Qwen3VoiceCloneEngine(TtsEngineBase):
     """Offline Qwen3-TTS Voice Clone engine (Base model)."""
@@ -61,6 +111,9 @@ class Qwen3VoiceCloneEngine(TtsEngineBase):
         default_language: str = "Auto",
         default_prompt: Optional[str] = None,
         default_prompt_text: Optional[str] = None,
+        voice_prompt_cache_size: int = VOICE_PROMPT_CACHE_SIZE,
+        persist_voice_prompts: bool = True,
+        batch_size: int = DEFAULT_BATCH_SIZE,
     ):
         if not QWEN3_AVAILABLE:
             raise ImportError("qwen-tts is not installed. Run setup to enable Qwen3-TTS local mode.")
@@ -90,14 +143,18 @@ class Qwen3VoiceCloneEngine(TtsEngineBase):
         self.default_prompt = default_prompt
         self.default_prompt_text = default_prompt_text
         self.post_processor = AudioPostProcessor()
+        self.batcher = AdaptiveBatcher(batch_size, on_oom=release_cuda_cache)
 
         self._sample_rate = None
         self._supported_languages = self._safe_supported_list("languages")
 
-        self._asr_model = None
-        self._transcript_cache: Dict[str, str] = {}
-        self._transcripts_file = Path(__file__).parent.parent.parent / "data" / "voice_prompts" / "transcripts.json"
-        self._load_persistent_transcripts()
+        self.transcriber = get_transcription_service()
+        self.transcriber.acquire()
+
+        # Encoded reference prompts, keyed by prompt file identity + transcript + mode
+        self.voice_prompt_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.voice_prompt_cache_size = max(1, int(voice_prompt_cache_size))
+        self.persist_voice_prompts = bool(persist_voice_prompts)
 
     @property
     def sample_rate(self) -> int:
@@ -117,6 +174,7 @@ class Qwen3VoiceCloneEngine(TtsEngineBase):
         progress_cb=None,
         chunk_cb=None,
         parallel_workers: int = 1,
+        group_by_speaker: bool = False,
     ) -> List[str]:
         if sample_rate and sample_rate != self.sample_rate:
             logger.warning(
@@ -128,80 +186,220 @@ class Qwen3VoiceCloneEngine(TtsEngineBase):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        files: List[str] = []
-        chunk_index = 0
+        work_items: List[Dict] = []
         for seg_idx, segment in enumerate(segments):
             speaker = segment["speaker"]
-            chunks = segment["chunks"]
             assignment = self._voice_assignment_for(voice_config, speaker)
-            language = (assignment.extra.get("language") if assignment.extra else None) or self.default_language
-            prompt_path = assignment.audio_prompt_path or self.default_prompt
-            prompt_text = assignment.extra.get("prompt_text") or self.default_prompt_text
-
-            if prompt_path:
-                prompt_path = self._resolve_prompt_path(prompt_path)
+            for chunk_idx, chunk_text in enumerate(segment["chunks"]):
+                work_items.append({
+                    "order": len(work_items),
+                    "segment_index": seg_idx,
+                    "chunk_index": chunk_idx,
+                    "speaker": speaker,
+                    "text": chunk_text,
+                    "assignment": assignment,
+                })
+
+        def voice_key(item: Dict):
+            assignment = item["assignment"]
+            return (
+                assignment.audio_prompt_path or self.default_prompt or "",
+                assignment.extra.get("prompt_text") or self.default_prompt_text or "",
+                (assignment.extra.get("language") if assignment.extra else None) or self.default_language,
+            )
 
-            if prompt_path and not prompt_text:
-                prompt_text = self._transcribe_audio(prompt_path)
+        # Prompt resolution and transcription happen once per voice, not per segment
+        prepared_voices: Dict = {}
 
-            if not prompt_path:
-                raise ValueError("Qwen3 Voice Clone requires a reference audio prompt.")
+        def prepared_voice(item: Dict):
+            key = voice_key(item)
+            if key not in prepared_voices:
+                prepared_voices[key] = self._prepare_clone_voice(item["assignment"])
+            return prepared_voices[key]
 
-            x_vector_only_mode = False
-            if not prompt_text:
-                logger.warning(
-                    "No transcript available for %s. Using x_vector_only_mode=True (quality may be reduced).",
-                    Path(prompt_path).name if prompt_path else "unknown",
+        def run_batch(batch: List[Dict]) -> List[np.ndarray]:
+            language, prompt_path, prompt_text, x_vector_only_mode = prepared_voice(batch[0])
+            wavs, sr = self._synthesize_many(
+                [item["text"] for item in batch],
+                language,
+                prompt_path,
+                prompt_text,
+                x_vector_only_mode,
+            )
+            self._sample_rate = sr
+            return wavs
+
+        emitter = OrderedChunkEmitter(chunk_cb)
+        scheduled = schedule_chunks(work_items, voice_key, group_by_speaker)
+        for item, audio in self.batcher.run(scheduled, voice_key, run_batch):
+            if item["chunk_index"] == 0:
+                language, prompt_path, _, _ = prepared_voice(item)
+                logger.info(
+                    "Qwen3 Voice Clone segment %s/%s speaker=%s language=%s prompt=%s",
+                    item["segment_index"] + 1,
+                    len(segments),
+                    item["speaker"],
+                    language,
+                    Path(prompt_path).name if prompt_path else None,
                 )
-                x_vector_only_mode = True
 
-            logger.info(
-                "Qwen3 Voice Clone segment %s/%s speaker=%s language=%s prompt=%s",
-                seg_idx + 1,
-                len(segments),
-                speaker,
-                language,
-                Path(prompt_path).name if prompt_path else None,
+            sr = self.sample_rate
+            output_path = output_dir / f"chunk_{item['order']:04d}.wav"
+            fx_settings = VoiceFXSettings.from_payload(item["assignment"].fx_payload)
+            if fx_settings:
+                audio = self.post_processor.apply(audio, sr, fx_settings)
+            sf.write(str(output_path), audio, sr)
+            if callable(progress_cb):
+                progress_cb()
+            chunk_meta = {
+                "speaker": item["speaker"],
+                "text": item["text"],
+                "segment_index": item["segment_index"],
+                "chunk_index": item["chunk_index"],
+            }
+            emitter.complete(item["order"], item["chunk_index"], chunk_meta, str(output_path))
+
+        return emitter.files
+
+    def _synthesize_many(
+        self,
+        texts: List[str],
+        language: Optional[str],
+        prompt_path: str,
+        prompt_text: Optional[str],
+        x_vector_only_mode: bool,
+    ) -> Tuple[List[np.ndarray], int]:
+        """Clone one reference voice for several chunks in a single model call."""
+        count = len(texts)
+        batched = count > 1
+        clone_prompt = self._get_voice_clone_prompt(prompt_path, prompt_text, x_vector_only_mode)
+        if clone_prompt is not None:
+            if batched and isinstance(clone_prompt, list) and len(clone_prompt) == 1:
+                clone_prompt = clone_prompt * count
+            wavs, sr = self.model.generate_voice_clone(
+                text=list(texts) if batched else texts[0],
+                language=[language or "Auto"] * count if batched else language or "Auto",
+                voice_clone_prompt=clone_prompt,
+            )
+        else:
+            wavs, sr = self.model.generate_voice_clone(
+                text=list(texts) if batched else texts[0],
+                language=[language or "Auto"] * count if batched else language or "Auto",
+                ref_audio=[prompt_path] * count if batched else prompt_path,
+                ref_text=[prompt_text or ""] * count if batched else prompt_text or "",
+                x_vector_only_mode=[x_vector_only_mode] * count if batched else x_vector_only_mode,
             )
+        return [np.asarray(wav, dtype=np.float32) for wav in wavs], int(sr)
 
-            for chunk_idx, chunk_text in enumerate(chunks):
-                output_path = output_dir / f"chunk_{chunk_index:04d}.wav"
-                wavs, sr = self.model.generate_voice_clone(
-                    text=chunk_text,
-                    language=language or "Auto",
-                    ref_audio=prompt_path,
-                    ref_text=prompt_text or "",
-                    x_vector_only_mode=x_vector_only_mode,
-                )
-                audio = np.asarray(wavs[0], dtype=np.float32)
-                self._sample_rate = int(sr)
-                fx_settings = VoiceFXSettings.from_payload(assignment.fx_payload)
-                if fx_settings:
-                    audio = self.post_processor.apply(audio, int(sr), fx_settings)
-                sf.write(str(output_path), audio, int(sr))
-                files.append(str(output_path))
-                chunk_index += 1
-                if callable(progress_cb):
-                    progress_cb()
-                if callable(chunk_cb):
-                    chunk_meta = {
-                        "speaker": speaker,
-                        "text": chunk_text,
-                        "segment_index": seg_idx,
-                        "chunk_index": chunk_idx,
-                    }
-                    chunk_cb(chunk_idx, chunk_meta, str(output_path))
-
-        return files
+    def _prepare_clone_voice(self, assignment: VoiceAssignment):
+        """Resolve language, prompt path, transcript and x-vector mode for a voice."""
+        language = (assignment.extra.get("language") if assignment.extra else None) or self.default_language
+        prompt_path = assignment.audio_prompt_path or self.default_prompt
+        prompt_text = assignment.extra.get("prompt_text") or self.default_prompt_text
+
+        if prompt_path:
+            prompt_path = self._resolve_prompt_path(prompt_path)
+
+        if prompt_path and not prompt_text:
+            prompt_text = self._transcribe_audio(prompt_path)
+
+        if not prompt_path:
+            raise ValueError("Qwen3 Voice Clone requires a reference audio prompt.")
+
+        x_vector_only_mode = False
+        if not prompt_text:
+            logger.warning(
+                "No transcript available for %s. Using x_vector_only_mode=True (quality may be reduced).",
+                Path(prompt_path).name if prompt_path else "unknown",
+            )
+            x_vector_only_mode = True
+
+        return language, prompt_path, prompt_text, x_vector_only_mode
+
+    def _get_voice_clone_prompt(self, prompt_path: str, prompt_text: Optional[str], x_vector_only_mode: bool):
+        """Return the encoded clone prompt for a reference clip, building it at most once.
+
+        Returns None when the installed qwen-tts cannot build reusable prompts, in
+        which case callers pass the reference audio on every call as before.
+        """
+        builder = getattr(self.model, "create_voice_clone_prompt", None)
+        if not callable(builder):
+            return None
+
+        key = self._voice_prompt_key(prompt_path, prompt_text, x_vector_only_mode)
+        prompt = self.voice_prompt_cache.get(key)
+        if prompt is None:
+            prompt = self._load_persisted_voice_prompt(key)
+        if prompt is None:
+            logger.info("Encoding Qwen3 voice clone prompt for %s", Path(prompt_path).name)
+            prompt = builder(
+                ref_audio=prompt_path,
+                ref_text=prompt_text or "",
+                x_vector_only_mode=x_vector_only_mode,
+            )
+            self._persist_voice_prompt(key, prompt)
+
+        self.voice_prompt_cache[key] = prompt
+        self.voice_prompt_cache.move_to_end(key)
+        while len(self.voice_prompt_cache) > self.voice_prompt_cache_size:
+            self.voice_prompt_cache.popitem(last=False)
+        return prompt
+
+    def _voice_prompt_key(self, prompt_path: str, prompt_text: Optional[str], x_vector_only_mode: bool) -> Tuple:
+        resolved = Path(prompt_path).resolve()
+        stat = resolved.stat()
+        return (
+            self.model_id,
+            str(resolved),
+            stat.st_mtime_ns,
+            stat.st_size,
+            prompt_text or "",
+            bool(x_vector_only_mode),
+        )
+
+    @staticmethod
+    def _voice_prompt_file(key: Tuple) -> Path:
+        digest = hashlib.sha1("|".join(str(part) for part in key).encode("utf-8")).hexdigest()
+        return VOICE_PROMPT_CACHE_DIR / f"{digest}.pt"
+
+    def _load_persisted_voice_prompt(self, key: Tuple):
+        if not self.persist_voice_prompts:
+            return None
+        cache_file = self._voice_prompt_file(key)
+        if not cache_file.exists():
+            return None
+        try:
+            state = torch.load(cache_file, map_location=self.device, weights_only=True)
+            prompt = _voice_prompt_from_state(state)
+            logger.info("Loaded cached Qwen3 voice clone prompt from %s", cache_file.name)
+            return prompt
+        except Exception as exc:  # pragma: no cover - stale or incompatible cache
+            logger.warning("Ignoring cached Qwen3 voice clone prompt %s: %s", cache_file, exc)
+            return None
+
+    def _persist_voice_prompt(self, key: Tuple, prompt) -> None:
+        if not self.persist_voice_prompts or prompt is None:
+            return
+        state = _voice_prompt_to_state(prompt)
+        if state is None:
+            logger.debug("Qwen3 voice clone prompt of type %s is not persisted", type(prompt).__name__)
+            return
+        cache_file = self._voice_prompt_file(key)
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_suffix(".pt.tmp")
+            torch.save(state, tmp_file)
+            os.replace(tmp_file, cache_file)
+        except Exception as exc:  # pragma: no cover - cache is best effort
+            logger.warning("Failed to persist Qwen3 voice clone prompt: %s", exc)
 
     def cleanup(self) -> None:  # pragma: no cover
         logger.info("Cleaning up Qwen3 Voice Clone engine resources")
-        try:
-            if hasattr(self, "_asr_model") and self._asr_model is not None:
-                del self._asr_model
-                self._asr_model = None
-        except Exception:
-            pass
+        if hasattr(self, "voice_prompt_cache"):
+            self.voice_prompt_cache.clear()
+        if getattr(self, "transcriber", None) is not None:
+            self.transcriber.release()
+            self.transcriber = None
         try:
             if hasattr(self, "model") and self.model is not None:
                 del self.model
@@ -234,66 +432,8 @@ class Qwen3VoiceCloneEngine(TtsEngineBase):
             return str(fallback)
         return str(resolved)
 
-    def _get_audio_hash(self, audio_path: str) -> str:
-        path = Path(audio_path)
-        stat = path.stat()
-        key_data = f"{path.name}:{stat.st_size}:{stat.st_mtime}"
-        return hashlib.md5(key_data.encode()).hexdigest()[:16]
-
-    def _load_persistent_transcripts(self) -> None:
-        if self._transcripts_file.exists():
-            try:
-                with open(self._transcripts_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self._transcript_cache = data.get("transcripts", {})
-                    logger.info(
-                        "Loaded %d cached transcripts from %s",
-                        len(self._transcript_cache),
-                        self._transcripts_file.name,
-                    )
-            except Exception as exc:
-                logger.warning("Failed to load transcripts file: %s", exc)
-                self._transcript_cache = {}
-
-    def _save_persistent_transcripts(self) -> None:
-        try:
-            self._transcripts_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._transcripts_file, "w", encoding="utf-8") as f:
-                json.dump({"transcripts": self._transcript_cache}, f, indent=2, ensure_ascii=False)
-        except Exception as exc:
-            logger.warning("Failed to save transcripts file: %s", exc)
-
     def _transcribe_audio(self, audio_path: Optional[str]) -> Optional[str]:
-        if not audio_path:
-            return None
-        cache_key = self._get_audio_hash(audio_path)
-        if cache_key in self._transcript_cache:
-            return self._transcript_cache[cache_key]
-        if not SENSEVOICE_AVAILABLE:
-            logger.warning("SenseVoice (funasr) not available for automatic transcription.")
-            return None
-        try:
-            if self._asr_model is None:
-                logger.info("Loading SenseVoice ASR model for Qwen3 voice clone transcription...")
-                self._asr_model = FunASRAutoModel(
-                    model="iic/SenseVoiceSmall",
-                    trust_remote_code=True,
-                    device=self.device,
-                    disable_update=True,
-                )
-            result = self._asr_model.generate(input=audio_path, batch_size_s=0)
-            if result and len(result) > 0:
-                transcript = result[0].get("text", "").strip()
-                if transcript:
-                    transcript = re.sub(r"<\|[^|]+\|>", "", transcript).strip()
-                if transcript:
-                    self._transcript_cache[cache_key] = transcript
-                    self._save_persistent_transcripts()
-                    logger.info("Auto-transcribed and cached: %s -> %r", Path(audio_path).name, transcript[:80])
-                    return transcript
-        except Exception as exc:
-            logger.warning("Failed to auto-transcribe reference audio: %s", exc)
-        return None
+        return self.transcriber.transcribe(audio_path, device=self.device)
 
     def _ensure_model(self, model_id: str) -> Path:
         local_model_dir = Path(__file__).parent.parent.parent / "models" / "qwen3"
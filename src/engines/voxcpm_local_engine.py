@@ -2,23 +2,38 @@
 from __future__ import annotations
 
 import gc
-import hashlib
-import json
+import inspect
 import logging
 import os
 import re
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import numpy as np
 import soundfile as sf
 import torch
 
-from .base import EngineCapabilities, TtsEngineBase, VoiceAssignment
+from .base import EngineCapabilities, OrderedChunkEmitter, TtsEngineBase, VoiceAssignment, schedule_chunks
 from ..audio_effects import AudioPostProcessor, VoiceFXSettings
+from ..transcription_service import get_transcription_service
 
 logger = logging.getLogger(__name__)
 
+PROMPT_CACHE_SIZE = 8
+MAX_GENERATE_LENGTH = 4096
+BADCASE_MAX_RETRIES = 3
+BADCASE_RATIO_THRESHOLD = 6.0
+# The public generate() hides its token counts, so badcases there are judged by duration
+BADCASE_SECONDS_PER_CHAR = 0.4
+BADCASE_MIN_SECONDS = 4.0
+# Keyword arguments _generate_with_prompt_cache passes to the private voxcpm API
+PROMPT_CACHE_GENERATE_PARAMS = frozenset(
+    {"target_text", "prompt_cache", "min_len", "max_len", "inference_timesteps", "cfg_value", "retry_badcase"}
+)
+
 # Disable HuggingFace Hub symlinks warning on Windows
 os.environ.setdefault("HF_HUB_DISABLE_SYMLINKS_WARNING", "1")
 
@@ -32,14 +47,6 @@ except ImportError:  # pragma: no cover - optional dependency
     snapshot_download = None  # type: ignore[assignment]
     VOXCPM_AVAILABLE = False
 
-# Try to import SenseVoice for automatic transcription
-try:
-    from funasr import AutoModel as FunASRAutoModel
-    SENSEVOICE_AVAILABLE = True
-except ImportError:
-    FunASRAutoModel = None  # type: ignore[assignment]
-    SENSEVOICE_AVAILABLE = False
-
 
 class VoxCPMLocalEngine(TtsEngineBase):
     """Offline VoxCPM engine with voice cloning support."""
@@ -62,6 +69,7 @@ class VoxCPMLocalEngine(TtsEngineBase):
         inference_timesteps: int = 32,  # More steps = smoother audio, fewer artifacts
         normalize: bool = True,  # Enable text normalization for numbers/abbreviations
         denoise: bool = False,
+        prompt_cache_size: int = PROMPT_CACHE_SIZE,
     ):
         if not VOXCPM_AVAILABLE:
             raise ImportError("voxcpm is not installed. Run setup to enable VoxCPM local mode.")
@@ -96,13 +104,21 @@ class VoxCPMLocalEngine(TtsEngineBase):
         self.denoise = bool(denoise)
         self.post_processor = AudioPostProcessor()
 
-        # Initialize ASR model for automatic transcription (lazy loaded)
-        self._asr_model = None
-        self._transcript_cache: Dict[str, str] = {}  # In-memory cache
-        
-        # Persistent transcript storage in data/voice_prompts/transcripts.json
-        self._transcripts_file = Path(__file__).parent.parent.parent / "data" / "voice_prompts" / "transcripts.json"
-        self._load_persistent_transcripts()
+        # Encoded prompt features, keyed by prompt file identity + transcript + denoise
+        self.prompt_cache: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self.prompt_cache_size = max(1, int(prompt_cache_size))
+        self._prompt_cache_supported = True
+        self.generation_stats: Dict[str, int] = {
+            "chunks": 0,
+            "badcase_retries": 0,
+            "badcase_exhausted": 0,
+            "prompt_cache_hits": 0,
+            "prompt_cache_misses": 0,
+        }
+
+        # Reference transcripts come from the shared ASR service (one model, one store)
+        self.transcriber = get_transcription_service()
+        self.transcriber.acquire()
 
     @property
     def sample_rate(self) -> int:
@@ -121,6 +137,7 @@ class VoxCPMLocalEngine(TtsEngineBase):
         progress_cb=None,
         chunk_cb=None,
         parallel_workers: int = 1,
+        group_by_speaker: bool = False,
     ) -> List[str]:
         if sample_rate and sample_rate != self.sample_rate:
             logger.warning(
@@ -131,52 +148,94 @@ class VoxCPMLocalEngine(TtsEngineBase):
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        files: List[str] = []
-        chunk_index = 0
+        work_items: List[Dict] = []
         for seg_idx, segment in enumerate(segments):
             speaker = segment["speaker"]
-            chunks = segment["chunks"]
             assignment = self._voice_assignment_for(voice_config, speaker)
-            logger.info(
-                "VoxCPM segment %s/%s speaker=%s voice_prompt=%s",
-                seg_idx + 1,
-                len(segments),
-                speaker,
-                assignment.audio_prompt_path,
+            for chunk_idx, chunk_text in enumerate(segment["chunks"]):
+                work_items.append({
+                    "order": len(work_items),
+                    "segment_index": seg_idx,
+                    "chunk_index": chunk_idx,
+                    "speaker": speaker,
+                    "text": chunk_text,
+                    "assignment": assignment,
+                })
+
+        def voice_key(item: Dict):
+            assignment = item["assignment"]
+            return (
+                assignment.audio_prompt_path or self.default_prompt or "",
+                (assignment.extra or {}).get("prompt_text") or "",
             )
 
-            for chunk_idx, chunk_text in enumerate(chunks):
-                output_path = output_dir / f"chunk_{chunk_index:04d}.wav"
-                audio = self._synthesize(chunk_text, assignment)
-                fx_settings = VoiceFXSettings.from_payload(assignment.fx_payload)
-                if fx_settings:
-                    audio = self.post_processor.apply(audio, self.sample_rate, fx_settings)
-                sf.write(str(output_path), audio, self.sample_rate)
-                files.append(str(output_path))
-                chunk_index += 1
-                if callable(progress_cb):
-                    progress_cb()
-                if callable(chunk_cb):
-                    chunk_meta = {
-                        "speaker": speaker,
-                        "text": chunk_text,
-                        "segment_index": seg_idx,
-                        "chunk_index": chunk_idx,
-                    }
-                    chunk_cb(chunk_idx, chunk_meta, str(output_path))
-
-        return files
+        # Prompt resolution and transcription happen once per voice, not per chunk
+        prepared_prompts: Dict = {}
+        emitter = OrderedChunkEmitter(chunk_cb)
+        retries_before = self.generation_stats["badcase_retries"]
+
+        def finalize(audio: np.ndarray, assignment: VoiceAssignment, output_path: Path) -> str:
+            fx_settings = VoiceFXSettings.from_payload(assignment.fx_payload)
+            if fx_settings:
+                audio = self.post_processor.apply(audio, self.sample_rate, fx_settings)
+            sf.write(str(output_path), audio, self.sample_rate)
+            return str(output_path)
+
+        def release(pending_item: Dict, future) -> None:
+            path = future.result()
+            if callable(progress_cb):
+                progress_cb()
+            chunk_meta = {
+                "speaker": pending_item["speaker"],
+                "text": pending_item["text"],
+                "segment_index": pending_item["segment_index"],
+                "chunk_index": pending_item["chunk_index"],
+            }
+            emitter.complete(pending_item["order"], pending_item["chunk_index"], chunk_meta, path)
+
+        # FX and WAV writing for one chunk overlap with generation of the next
+        pending = None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="voxcpm_write") as writer:
+            for item in schedule_chunks(work_items, voice_key, group_by_speaker):
+                assignment = item["assignment"]
+                key = voice_key(item)
+                if key not in prepared_prompts:
+                    prepared_prompts[key] = self._prepare_prompt(assignment)
+                prompt_path, prompt_text = prepared_prompts[key]
+                if item["chunk_index"] == 0:
+                    logger.info(
+                        "VoxCPM segment %s/%s speaker=%s voice_prompt=%s",
+                        item["segment_index"] + 1,
+                        len(segments),
+                        item["speaker"],
+                        assignment.audio_prompt_path,
+                    )
+                output_path = output_dir / f"chunk_{item['order']:04d}.wav"
+                audio = self._generate(item["text"], prompt_path, prompt_text)
+                future = writer.submit(finalize, audio, assignment, output_path)
+                if pending is not None:
+                    release(*pending)
+                pending = (item, future)
+            if pending is not None:
+                release(*pending)
+
+        retries = self.generation_stats["badcase_retries"] - retries_before
+        if retries:
+            logger.info("VoxCPM batch finished with %s badcase retries over %s chunks", retries, len(work_items))
+        return emitter.files
+
+    def get_generation_stats(self) -> Dict[str, int]:
+        """Return cumulative chunk, badcase retry and prompt cache counters."""
+        return dict(self.generation_stats)
 
     def cleanup(self) -> None:  # pragma: no cover
         logger.info("Cleaning up VoxCPM Local engine resources")
-        try:
-            # Unload ASR model first (SenseVoice)
-            if hasattr(self, "_asr_model") and self._asr_model is not None:
-                logger.info("Unloading SenseVoice ASR model")
-                del self._asr_model
-                self._asr_model = None
-        except Exception:
-            pass
+        if hasattr(self, "prompt_cache"):
+            self.prompt_cache.clear()
+        # The shared ASR model unloads once no other engine still holds it
+        if getattr(self, "transcriber", None) is not None:
+            self.transcriber.release()
+            self.transcriber = None
         try:
             # Unload main VoxCPM model
             if hasattr(self, "model") and self.model is not None:
@@ -236,83 +295,15 @@ class VoxCPMLocalEngine(TtsEngineBase):
         
         return final_path
 
-    def _get_audio_hash(self, audio_path: str) -> str:
-        """Get a hash key for an audio file based on filename and modification time."""
-        path = Path(audio_path)
-        # Use filename + file size + mtime for a quick unique key
-        stat = path.stat()
-        key_data = f"{path.name}:{stat.st_size}:{stat.st_mtime}"
-        return hashlib.md5(key_data.encode()).hexdigest()[:16]
-
-    def _load_persistent_transcripts(self) -> None:
-        """Load transcripts from JSON file."""
-        if self._transcripts_file.exists():
-            try:
-                with open(self._transcripts_file, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self._transcript_cache = data.get("transcripts", {})
-                    logger.info("Loaded %d cached transcripts from %s", 
-                               len(self._transcript_cache), self._transcripts_file.name)
-            except Exception as e:
-                logger.warning("Failed to load transcripts file: %s", e)
-                self._transcript_cache = {}
-
-    def _save_persistent_transcripts(self) -> None:
-        """Save transcripts to JSON file."""
-        try:
-            self._transcripts_file.parent.mkdir(parents=True, exist_ok=True)
-            with open(self._transcripts_file, "w", encoding="utf-8") as f:
-                json.dump({"transcripts": self._transcript_cache}, f, indent=2, ensure_ascii=False)
-            logger.debug("Saved %d transcripts to %s", len(self._transcript_cache), self._transcripts_file.name)
-        except Exception as e:
-            logger.warning("Failed to save transcripts file: %s", e)
-
     def _transcribe_audio(self, audio_path: str) -> Optional[str]:
-        """Automatically transcribe reference audio using SenseVoice ASR."""
-        # Use a hash key that includes file metadata for cache lookup
-        cache_key = self._get_audio_hash(audio_path)
-        
-        # Check persistent cache first
-        if cache_key in self._transcript_cache:
-            logger.info("Using cached transcript for %s", Path(audio_path).name)
-            return self._transcript_cache[cache_key]
-
-        if not SENSEVOICE_AVAILABLE:
-            logger.warning("SenseVoice (funasr) not available for automatic transcription. "
-                          "Install with: pip install funasr")
-            return None
-
-        try:
-            # Lazy load ASR model
-            if self._asr_model is None:
-                logger.info("Loading SenseVoice ASR model for automatic transcription...")
-                self._asr_model = FunASRAutoModel(
-                    model="iic/SenseVoiceSmall",
-                    trust_remote_code=True,
-                    device=self.device,
-                    disable_update=True,  # Prevent network check on every load
-                )
-
-            # Transcribe the audio
-            result = self._asr_model.generate(input=audio_path, batch_size_s=0)
-            if result and len(result) > 0:
-                # SenseVoice returns list of dicts with 'text' key
-                transcript = result[0].get("text", "").strip()
-                if transcript:
-                    # Clean SenseVoice special tags like <|en|><|NEUTRAL|><|Speech|><|woitn|>
-                    transcript = re.sub(r'<\|[^|]+\|>', '', transcript).strip()
-                    if transcript:
-                        # Cache the result persistently
-                        self._transcript_cache[cache_key] = transcript
-                        self._save_persistent_transcripts()
-                        logger.info("Auto-transcribed and cached: %s -> %r", Path(audio_path).name, transcript[:80])
-                        return transcript
-        except Exception as e:
-            logger.warning("Failed to auto-transcribe reference audio: %s", e)
-
-        return None
+        """Automatically transcribe reference audio using the shared SenseVoice service."""
+        return self.transcriber.transcribe(audio_path, device=self.device)
 
     def _synthesize(self, text: str, assignment: VoiceAssignment) -> np.ndarray:
+        prompt_path, prompt_text = self._prepare_prompt(assignment)
+        return self._generate(text, prompt_path, prompt_text)
+
+    def _prepare_prompt(self, assignment: VoiceAssignment) -> Tuple[Optional[str], Optional[str]]:
         prompt_path = assignment.audio_prompt_path or self.default_prompt
         prompt_text = assignment.extra.get("prompt_text") or self.default_prompt_text
 
@@ -330,31 +321,196 @@ class VoxCPMLocalEngine(TtsEngineBase):
                     "Auto-transcription failed. Falling back to no voice cloning."
                 )
                 prompt_path = None
+        return prompt_path, prompt_text
 
+    def _generate(self, text: str, prompt_path: Optional[str], prompt_text: Optional[str]) -> np.ndarray:
         logger.info("VoxCPM generating: text=%r prompt_path=%s prompt_text=%s",
                     text[:50], prompt_path, prompt_text[:30] if prompt_text else None)
-        wav = self.model.generate(
-            text=text,
-            prompt_wav_path=prompt_path,
-            prompt_text=prompt_text,
-            cfg_value=self.cfg_value,
-            inference_timesteps=self.inference_timesteps,
-            normalize=self.normalize,
-            denoise=self.denoise,
-            retry_badcase=True,
-            retry_badcase_max_times=3,
-            retry_badcase_ratio_threshold=6.0,
-        )
+        wav = None
+        prompt_cache = self._get_prompt_cache(prompt_path, prompt_text) if prompt_path else None
+        if prompt_cache is not None:
+            wav = self._generate_with_prompt_cache(text, prompt_cache)
+        if wav is None:
+            wav = self._generate_public(text, prompt_path, prompt_text)
+        self.generation_stats["chunks"] += 1
         audio = np.asarray(wav, dtype=np.float32)
-        
-        # Normalize audio to prevent clipping and reduce artifacts
-        max_val = np.abs(audio).max()
-        if max_val > 0:
-            # Normalize to 0.95 to leave headroom and prevent clipping
-            audio = audio / max_val * 0.95
-        
+        if not audio.flags.writeable:
+            audio = audio.copy()
+
+        # Normalize audio to 0.95 peak to leave headroom and prevent clipping
+        if audio.size:
+            peak = max(float(audio.max()), -float(audio.min()))
+            if peak > 0:
+                audio *= 0.95 / peak
+
         return audio
 
+    def _get_prompt_cache(self, prompt_path: str, prompt_text: Optional[str]):
+        """Return encoded prompt features for a reference clip, building them at most once.
+
+        Returns None when the installed voxcpm does not expose the prompt cache API,
+        in which case generation goes through ``model.generate`` as before.
+        """
+        if not self._prompt_cache_supported:
+            return None
+        tts_model = getattr(self.model, "tts_model", None)
+        builder = getattr(tts_model, "build_prompt_cache", None)
+        if not callable(builder) or not self._supports_prompt_cache_generate(tts_model):
+            logger.info("Installed voxcpm has no compatible prompt cache API; encoding prompt per chunk")
+            self._prompt_cache_supported = False
+            return None
+        if self.normalize and self._get_text_normalizer() is None:
+            return None
+        denoiser = getattr(self.model, "denoiser", None)
+        if self.denoise and denoiser is None:
+            return None
+
+        stat = Path(prompt_path).stat()
+        key = (str(Path(prompt_path).resolve()), stat.st_mtime_ns, stat.st_size, prompt_text or "", self.denoise)
+        cached = self.prompt_cache.get(key)
+        if cached is not None:
+            self.prompt_cache.move_to_end(key)
+            self.generation_stats["prompt_cache_hits"] += 1
+            return cached
+
+        self.generation_stats["prompt_cache_misses"] += 1
+        wav_path = prompt_path
+        denoised_path = None
+        try:
+            if self.denoise:
+                fd, denoised_path = tempfile.mkstemp(prefix="voxcpm_prompt_", suffix=".wav")
+                os.close(fd)
+                denoiser.enhance(prompt_path, output_path=denoised_path)
+                wav_path = denoised_path
+            prompt_cache = builder(
+                prompt_text=self._clean_text(prompt_text or ""),
+                prompt_wav_path=wav_path,
+            )
+        except Exception as exc:
+            logger.warning("VoxCPM prompt cache unavailable (%s); encoding prompt per chunk", exc)
+            self._prompt_cache_supported = False
+            return None
+        finally:
+            if denoised_path and os.path.exists(denoised_path):
+                os.unlink(denoised_path)
+
+        self.prompt_cache[key] = prompt_cache
+        while len(self.prompt_cache) > self.prompt_cache_size:
+            self.prompt_cache.popitem(last=False)
+        return prompt_cache
+
+    @staticmethod
+    def _supports_prompt_cache_generate(tts_model) -> bool:
+        """Check the private ``generate_with_prompt_cache`` still takes the arguments used here."""
+        generator = getattr(tts_model, "generate_with_prompt_cache", None)
+        if not callable(generator) or inspect.isgeneratorfunction(generator):
+            return False
+        try:
+            parameters = inspect.signature(generator).parameters
+        except (TypeError, ValueError):
+            return False
+        if any(param.kind is inspect.Parameter.VAR_KEYWORD for param in parameters.values()):
+            return True
+        return PROMPT_CACHE_GENERATE_PARAMS <= set(parameters)
+
+    def _retry_badcases(self, attempt: Callable[[], Tuple[Any, float]]) -> Any:
+        """
+        Call ``attempt`` until it returns a take whose badcase score is below 1.0,
+        retrying at most ``BADCASE_MAX_RETRIES`` times. Both generation paths go
+        through here so retries are counted whichever one runs.
+        """
+        score = 0.0
+        for retry in range(BADCASE_MAX_RETRIES + 1):
+            if retry:
+                self.generation_stats["badcase_retries"] += 1
+                logger.info(
+                    "VoxCPM badcase (%.1fx the allowed length); retry %s/%s",
+                    score,
+                    retry,
+                    BADCASE_MAX_RETRIES,
+                )
+            wav, score = attempt()
+            if score < 1.0:
+                return wav
+        self.generation_stats["badcase_exhausted"] += 1
+        logger.warning("VoxCPM badcase persisted after %s retries; keeping last take", BADCASE_MAX_RETRIES)
+        return wav
+
+    def _generate_public(self, text: str, prompt_path: Optional[str], prompt_text: Optional[str]) -> np.ndarray:
+        """Generate through the public ``VoxCPM.generate``, judging badcases by audio duration."""
+        max_seconds = max(BADCASE_MIN_SECONDS, len(text) * BADCASE_SECONDS_PER_CHAR)
+
+        def attempt() -> Tuple[np.ndarray, float]:
+            wav = self.model.generate(
+                text=text,
+                prompt_wav_path=prompt_path,
+                prompt_text=prompt_text,
+                cfg_value=self.cfg_value,
+                inference_timesteps=self.inference_timesteps,
+                normalize=self.normalize,
+                denoise=self.denoise,
+                retry_badcase=False,
+            )
+            seconds = np.asarray(wav).size / self.sample_rate
+            return wav, seconds / max_seconds
+
+        return self._retry_badcases(attempt)
+
+    def _generate_with_prompt_cache(self, text: str, prompt_cache) -> Optional[np.ndarray]:
+        """
+        Generate from cached prompt features with the library's token-ratio badcase
+        check. Returns None when the private API rejects the call, after which the
+        engine uses the public path for good.
+        """
+        target_text = self._clean_text(text)
+        if self.normalize:
+            target_text = self._get_text_normalizer().normalize(target_text)
+
+        tts_model = self.model.tts_model
+
+        def attempt() -> Tuple[Any, float]:
+            result = tts_model.generate_with_prompt_cache(
+                target_text=target_text,
+                prompt_cache=prompt_cache,
+                min_len=2,
+                max_len=MAX_GENERATE_LENGTH,
+                inference_timesteps=self.inference_timesteps,
+                cfg_value=self.cfg_value,
+                retry_badcase=False,
+            )
+            if not isinstance(result, tuple) or len(result) != 3:
+                raise TypeError(f"unexpected result type {type(result).__name__}")
+            wav, text_token, audio_feat = result
+            ratio = len(audio_feat) / max(1, len(text_token))
+            return wav, ratio / BADCASE_RATIO_THRESHOLD
+
+        try:
+            wav = self._retry_badcases(attempt)
+        except TypeError as exc:
+            logger.warning("VoxCPM prompt cache API mismatch (%s); encoding prompt per chunk", exc)
+            self._prompt_cache_supported = False
+            return None
+
+        if hasattr(wav, "detach"):
+            wav = wav.detach().squeeze(0).float().cpu().numpy()
+        return np.asarray(wav, dtype=np.float32).reshape(-1)
+
+    def _get_text_normalizer(self):
+        normalizer = getattr(self.model, "text_normalizer", None)
+        if normalizer is None:
+            try:
+                from voxcpm.utils.text_normalize import TextNormalizer  # type: ignore
+
+                normalizer = TextNormalizer()
+                self.model.text_normalizer = normalizer
+            except Exception:
+                return None
+        return normalizer
+
+    @staticmethod
+    def _clean_text(text: str) -> str:
+        return re.sub(r"\s+", " ", text.replace("\n", " ")).strip()
+
     def _resolve_device(self, device: str) -> str:
         device = (device or "auto").strip().lower()
         if device == "auto":
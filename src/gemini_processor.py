@@ -3,7 +3,10 @@
 from __future__ import annotations
 
 import logging
-from typing import Optional
+from typing import Iterator, Optional
+
+from .llm_cache import get_llm_cache
+from .llm_clients import get_client, with_legacy_gemini_key
 
 # Try new SDK first, fall back to deprecated one
 try:  # pragma: no cover - optional dependency checked at runtime
@@ -25,7 +28,7 @@ class GeminiProcessorError(RuntimeError):
 class GeminiProcessor:
     """Wrapper around the Google Gemini SDK."""
 
-    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash"):
+    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash", use_cache: bool = True):
         if genai is None:
             raise GeminiProcessorError(
                 "google-genai is not installed. Please install it to use Gemini features: pip install google-genai"
@@ -36,26 +39,60 @@ class GeminiProcessor:
 
         self.model_name = model_name or "gemini-1.5-flash"
         self.api_key = api_key
+        self.use_cache = use_cache
         self._configure(api_key)
 
     def _configure(self, api_key: str) -> None:
-        """Configure SDK and initialize client."""
+        """Attach the shared SDK client for this key (built once per process), or a legacy model of our own."""
         try:
             if USING_NEW_SDK:
-                self.client = genai.Client(api_key=api_key)
+                self.client = get_client("gemini", api_key, lambda: genai.Client(api_key=api_key))
             else:
-                genai.configure(api_key=api_key)
+                # Legacy models use the SDK's global key, so each processor keeps its own
                 self.model = genai.GenerativeModel(self.model_name)
         except Exception as exc:  # pragma: no cover - network failure
             logging.error("Failed to initialize Gemini: %s", exc, exc_info=True)
             raise GeminiProcessorError(f"Failed to initialize Gemini: {exc}") from exc
 
-    def generate_text(self, prompt: str) -> str:
-        """Send prompt to Gemini and return the text response."""
+    def generate_text(self, prompt: str, use_cache: Optional[bool] = None) -> str:
+        """Send prompt to Gemini and return the text response (served from the response cache when possible)."""
+
+        if not prompt.strip():
+            raise GeminiProcessorError("Prompt must not be empty")
+
+        # Bypassing the cache skips the lookup but still stores the fresh response
+        refresh = not (self.use_cache if use_cache is None else use_cache)
+        return get_llm_cache().get_or_generate("gemini", self.model_name, prompt, self._generate, refresh=refresh)
+
+    def stream_text(self, prompt: str, use_cache: Optional[bool] = None) -> Iterator[str]:
+        """Yield the response as text deltas while Gemini is still generating."""
 
         if not prompt.strip():
             raise GeminiProcessorError("Prompt must not be empty")
 
+        refresh = not (self.use_cache if use_cache is None else use_cache)
+        return get_llm_cache().get_or_stream("gemini", self.model_name, prompt, self._stream, refresh=refresh)
+
+    def _stream(self, prompt: str) -> Iterator[str]:
+        try:
+            if USING_NEW_SDK:
+                chunks = self.client.models.generate_content_stream(
+                    model=self.model_name,
+                    contents=prompt
+                )
+            else:
+                chunks = with_legacy_gemini_key(
+                    genai, self.api_key, lambda: self.model.generate_content(prompt, stream=True)
+                )
+            for chunk in chunks:
+                text = self._extract_text(chunk)
+                if text:
+                    yield text
+        except Exception as exc:  # pragma: no cover - network failure
+            logging.error("Gemini API error: %s", exc, exc_info=True)
+            raise GeminiProcessorError(f"Gemini API error: {exc}") from exc
+
+    def _generate(self, prompt: str) -> str:
         try:
             if USING_NEW_SDK:
                 response = self.client.models.generate_content(
@@ -63,7 +100,9 @@ class GeminiProcessor:
                     contents=prompt
                 )
             else:
-                response = self.model.generate_content(prompt)
+                response = with_legacy_gemini_key(
+                    genai, self.api_key, lambda: self.model.generate_content(prompt)
+                )
         except Exception as exc:  # pragma: no cover - network failure
             logging.error("Gemini API error: %s", exc, exc_info=True)
             raise GeminiProcessorError(f"Gemini API error: {exc}") from exc
@@ -112,7 +151,7 @@ class GeminiProcessor:
 
         try:
             if USING_NEW_SDK:
-                client = genai.Client(api_key=api_key)
+                client = get_client("gemini", api_key, lambda: genai.Client(api_key=api_key))
                 models = client.models.list()
                 available = []
                 for model in models:
@@ -121,8 +160,7 @@ class GeminiProcessor:
                     if name:
                         available.append(name)
             else:
-                genai.configure(api_key=api_key)
-                models = genai.list_models()
+                models = with_legacy_gemini_key(genai, api_key, lambda: list(genai.list_models()))
                 available = []
                 for model in models:
                     supported = getattr(model, "supported_generation_methods", []) or []
@@ -0,0 +1,196 @@
+"""
+Persistent cache of LLM responses.
+
+Responses are stored in data/cache/llm_responses.sqlite3 keyed by a sha256 of
+(provider, model, prompt), so re-running speaker tagging after editing one
+chapter only sends the changed sections to the provider. The file is capped by
+entry count and total size, evicting the least recently used responses.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "llm_responses.sqlite3"
+LLM_CACHE_MAX_ENTRIES = 5000
+LLM_CACHE_MAX_BYTES = 64 * 1024 * 1024
+
+
+def prompt_key(provider: str, model: str, prompt: str) -> str:
+    digest = hashlib.sha256()
+    for part in (provider or "", model or "", prompt or ""):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class LLMResponseCache:
+    """Size-capped SQLite store of prompt -> response text."""
+
+    def __init__(
+        self,
+        path: Path = LLM_CACHE_PATH,
+        *,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+    ):
+        self.path = Path(path)
+        self.max_entries = max(1, int(max_entries))
+        self.max_bytes = max(1, int(max_bytes))
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, provider TEXT, model TEXT, response TEXT, "
+                "size INTEGER, created REAL, last_used REAL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)")
+            self._db.commit()
+        except sqlite3.Error as exc:
+            logger.warning("LLM response cache disabled: %s", exc)
+            self._db = None
+
+    def get_or_generate(
+        self,
+        provider: str,
+        model: str,
+        prompt: str,
+        generate: Callable[[str], str],
+        *,
+        refresh: bool = False,
+    ) -> str:
+        """Return the cached response, or generate and store one. ``refresh`` skips the lookup but still stores."""
+        key = prompt_key(provider, model, prompt)
+        cached = None if refresh else self.get(key)
+        if cached is not None:
+            return cached
+        response = generate(prompt)
+        self.put(key, provider, model, response)
+        return response
+
+    def get_or_stream(
+        self,
+        provider: str,
+        model: str,
+        prompt: str,
+        stream: Callable[[str], Iterator[str]],
+        *,
+        refresh: bool = False,
+    ) -> Iterator[str]:
+        """Replay a cached response as one delta, or pass a live stream through and cache the result."""
+        key = prompt_key(provider, model, prompt)
+        cached = None if refresh else self.get(key)
+        if cached is not None:
+            yield cached
+            return
+        parts = []
+        for delta in stream(prompt):
+            parts.append(delta)
+            yield delta
+        self.put(key, provider, model, "".join(parts).strip())
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    self.stats["misses"] += 1
+                    return None
+                self._db.execute("UPDATE responses SET last_used = ? WHERE key = ?", (time.time(), key))
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.debug("LLM cache lookup failed: %s", exc)
+                return None
+            self.stats["hits"] += 1
+            return row[0]
+
+    def put(self, key: str, provider: str, model: str, response: str) -> None:
+        if not response:
+            return
+        with self._lock:
+            if self._db is None:
+                return
+            now = time.time()
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO responses (key, provider, model, response, size, created, last_used) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, provider, model, response, len(response.encode("utf-8")), now, now),
+                )
+                self._evict()
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.debug("Skipping LLM cache write: %s", exc)
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            entries, total = 0, 0
+            if self._db is not None:
+                try:
+                    entries, total = self._db.execute(
+                        "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+                    ).fetchone()
+                except sqlite3.Error:
+                    pass
+            lookups = self.stats["hits"] + self.stats["misses"]
+            return {
+                **self.stats,
+                "entries": entries,
+                "bytes": total,
+                "hit_rate": round(self.stats["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            if self._db is not None:
+                self._db.execute("DELETE FROM responses")
+                self._db.commit()
+
+    def _evict(self) -> None:
+        entries, total = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if entries <= self.max_entries and total <= self.max_bytes:
+            return
+        evicted = 0
+        rows = self._db.execute("SELECT key, size FROM responses ORDER BY last_used ASC").fetchall()
+        for key, size in rows:
+            if entries <= self.max_entries and total <= self.max_bytes:
+                break
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+            entries -= 1
+            total -= size or 0
+            evicted += 1
+        self.stats["evictions"] += evicted
+
+
+_cache: Optional[LLMResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMResponseCache:
+    """Return the process-wide LLM response cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = LLMResponseCache()
+    return _cache
+
+
+__all__ = [
+    "LLMResponseCache",
+    "get_llm_cache",
+    "prompt_key",
+]
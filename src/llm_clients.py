@@ -0,0 +1,87 @@
+"""
+Process-wide registry of LLM SDK clients.
+
+SDK clients such as ``genai.Client`` own an HTTP connection pool and are safe
+to share between threads, so building one per request only throws away warm
+keep-alive connections. Clients are created once per (provider, API key, model)
+and reused by every processor instance. The registry keeps the most recently
+used few and is cleared when the saved API key changes. Dropped clients are not
+closed, since a request may still be using one; they are released once the
+last processor holding them goes away.
+"""
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+MAX_CLIENTS = 8
+
+_clients: "OrderedDict[Tuple[str, str, str], object]" = OrderedDict()
+_lock = threading.Lock()
+_creating: Dict[Tuple[str, str, str], threading.Lock] = {}
+_legacy_gemini_lock = threading.Lock()
+
+
+def _fingerprint(api_key: str) -> str:
+    return hashlib.sha256((api_key or "").encode("utf-8")).hexdigest()[:16]
+
+
+def get_client(provider: str, api_key: str, factory: Callable[[], T], model: Optional[str] = None) -> T:
+    """
+    Return the shared client for ``provider``/``api_key`` (and ``model`` when the
+    SDK binds clients to a model), building it with ``factory`` on first use.
+    """
+    key = (provider, _fingerprint(api_key), model or "")
+    with _lock:
+        client = _clients.get(key)
+        if client is not None:
+            _clients.move_to_end(key)
+            return client  # type: ignore[return-value]
+        create_lock = _creating.setdefault(key, threading.Lock())
+    with create_lock:
+        with _lock:
+            client = _clients.get(key)
+        if client is None:
+            client = factory()
+            logger.info("Created shared %s client%s", provider, f" for {model}" if model else "")
+            with _lock:
+                _clients[key] = client
+                _creating.pop(key, None)
+                while len(_clients) > MAX_CLIENTS:
+                    _clients.popitem(last=False)
+    return client  # type: ignore[return-value]
+
+
+def with_legacy_gemini_key(genai_module, api_key: str, call: Callable[[], T]) -> T:
+    """
+    Run ``call`` with the legacy ``google.generativeai`` SDK configured for ``api_key``.
+
+    That SDK keeps one process-wide key, so the key is set under a lock right
+    before the request it is for; legacy models are never shared across keys.
+    """
+    with _legacy_gemini_lock:
+        genai_module.configure(api_key=api_key)
+        return call()
+
+
+def clear_clients() -> None:
+    """Forget every shared client, e.g. after the API key changed."""
+    with _lock:
+        count = len(_clients)
+        _clients.clear()
+    if count:
+        logger.info("Dropped %d shared LLM client(s)", count)
+
+
+__all__ = [
+    "clear_clients",
+    "get_client",
+    "with_legacy_gemini_key",
+]
@@ -5,6 +5,8 @@ from __future__ import annotations
 import logging
 from typing import List, Optional
 
+from .llm_clients import with_legacy_gemini_key
+
 # Provider constants
 LLM_PROVIDER_GEMINI = "gemini"
 LLM_PROVIDER_OPENAI = "openai"
@@ -74,7 +76,6 @@ class LLMProcessor:
                 "google-generativeai is not installed. Run: pip install google-generativeai"
             )
         try:
-            genai.configure(api_key=self.api_key)
             self._model = genai.GenerativeModel(self.model_name)
         except Exception as exc:
             logging.error("Failed to initialize Gemini: %s", exc, exc_info=True)
@@ -121,7 +122,7 @@ class LLMProcessor:
     def _generate_gemini(self, prompt: str) -> str:
         """Generate text using Gemini."""
         try:
-            response = self._model.generate_content(prompt)
+            response = with_legacy_gemini_key(genai, self.api_key, lambda: self._model.generate_content(prompt))
         except Exception as exc:
             logging.error("Gemini API error: %s", exc, exc_info=True)
             raise LLMProcessorError(f"Gemini API error: {exc}") from exc
@@ -219,8 +220,7 @@ class LLMProcessor:
             raise LLMProcessorError("Gemini API key is required")
 
         try:
-            genai.configure(api_key=api_key)
-            models = genai.list_models()
+            models = with_legacy_gemini_key(genai, api_key, lambda: list(genai.list_models()))
         except Exception as exc:
             logging.error("Failed to list Gemini models: %s", exc, exc_info=True)
             raise LLMProcessorError(f"Failed to list Gemini models: {exc}") from exc
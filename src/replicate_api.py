@@ -2,17 +2,16 @@
 Replicate API  - Cloud-based TTS using Replicate
 """
 import logging
-import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from threading import Lock
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, List, Optional
 
 import replicate
 import requests
 import soundfile as sf
 
 from .audio_effects import AudioPostProcessor, VoiceFXSettings
+from .audio_stream import decode_audio_bytes, decode_audio_stream
+from .replicate_transport import PredictionRequest, ReplicateTransport
 
 
 class ReplicateAPI:
@@ -33,6 +32,8 @@ class ReplicateAPI:
         # Use jaaari's model with specific version hash
         self.model = "jaaari/kokoro-82m:f559560eb822dc509045f3921a1921234918b91739db4bf3daab2169b71c7a13"
         self.post_processor = AudioPostProcessor()
+        self.transport = ReplicateTransport(api_key, self.model)
+        self.session = requests.Session()
         
         logging.info("Replicate API client initialized")
         
@@ -74,9 +75,12 @@ class ReplicateAPI:
             
             # Download if output path specified
             if output_path:
-                self._download_audio(audio_url, output_path)
                 if fx_settings:
-                    self._apply_fx_to_file(output_path, fx_settings)
+                    # Decode straight from the response and write the processed WAV once
+                    audio, sample_rate = self._download_decoded(audio_url)
+                    self._write_with_fx(output_path, audio, sample_rate, fx_settings)
+                else:
+                    self._download_audio(audio_url, output_path)
                 return output_path
             else:
                 return audio_url
@@ -95,17 +99,22 @@ class ReplicateAPI:
         """
         logging.debug(f"Downloading audio from {url}")
         
-        response = requests.get(url, stream=True)
-        response.raise_for_status()
-        
-        with open(output_path, 'wb') as f:
-            for chunk in response.iter_content(chunk_size=8192):
-                f.write(chunk)
+        with self.session.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            with open(output_path, 'wb') as f:
+                for chunk in response.iter_content(chunk_size=8192):
+                    f.write(chunk)
                 
         logging.debug(f"Audio downloaded to {output_path}")
 
-    def _apply_fx_to_file(self, file_path: str, fx_settings: VoiceFXSettings):
-        audio, sample_rate = sf.read(file_path, dtype='float32')
+    def _download_decoded(self, url: str):
+        """Download audio and decode it from the response stream without touching disk."""
+        with self.session.get(url, stream=True, timeout=60) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            return decode_audio_stream(response.raw)
+
+    def _write_with_fx(self, file_path: str, audio, sample_rate: int, fx_settings: VoiceFXSettings):
         processed = self.post_processor.apply(audio, sample_rate, fx_settings)
         sf.write(file_path, processed, sample_rate)
         
@@ -119,6 +128,7 @@ class ReplicateAPI:
         progress_cb=None,
         chunk_cb=None,
         parallel_workers: int = 1,
+        max_parallel_workers: Optional[int] = None,
     ) -> List[str]:
         """
         Generate audio for multiple segments using async predictions.
@@ -133,6 +143,8 @@ class ReplicateAPI:
             speed: Speech speed
             max_concurrent: Maximum concurrent API calls (deprecated, use parallel_workers)
             parallel_workers: Number of chunks to process simultaneously (1-10)
+            max_parallel_workers: Ceiling the in-flight count may grow to while
+                Replicate keeps up (defaults to parallel_workers)
             
         Returns:
             List of output file paths
@@ -180,7 +192,7 @@ class ReplicateAPI:
         # For parallel processing, submit all predictions at once, then poll
         if effective_workers > 1:
             return self._generate_batch_async(
-                all_chunks, output_dir, speed, effective_workers, progress_cb, chunk_cb
+                all_chunks, output_dir, speed, effective_workers, progress_cb, chunk_cb, max_parallel_workers
             )
         else:
             # Sequential processing - use blocking API
@@ -196,105 +208,60 @@ class ReplicateAPI:
         parallel_workers: int,
         progress_cb,
         chunk_cb,
+        max_parallel_workers: Optional[int] = None,
     ) -> List[str]:
-        """Submit predictions in batches of parallel_workers, then poll for results."""
+        """
+        Run predictions through the async transport, starting with parallel_workers
+        in flight and growing towards max_parallel_workers while Replicate keeps up.
+        """
         
         logging.info(f"Processing {len(all_chunks)} chunks with {parallel_workers} parallel workers")
         
-        # Parse model string once
-        if ":" in self.model:
-            model_name, version = self.model.split(":", 1)
-        else:
-            model_name = self.model
-            version = None
+        def make_finalize(chunk_info: Dict, output_path: Path):
+            def finalize(data: memoryview) -> str:
+                if chunk_info["fx_settings"]:
+                    audio, sample_rate = decode_audio_bytes(data)
+                    self._write_with_fx(str(output_path), audio, sample_rate, chunk_info["fx_settings"])
+                else:
+                    with open(output_path, 'wb') as f:
+                        f.write(data)
+                return str(output_path)
+            return finalize
+
+        requests_batch: List[PredictionRequest] = []
+        for chunk_info in all_chunks:
+            global_idx = chunk_info["global_index"]
+            output_path = output_dir / f"chunk_{global_idx:04d}.wav"
+            requests_batch.append(PredictionRequest(
+                index=global_idx,
+                input={
+                    "text": chunk_info["text"],
+                    "voice": chunk_info["voice"],
+                    "speed": speed
+                },
+                finalize=make_finalize(chunk_info, output_path),
+                label=f"{global_idx + 1}/{len(all_chunks)} speaker={chunk_info['speaker']}",
+                context=chunk_info,
+            ))
         
         results: Dict[int, str] = {}
-        chunk_queue = list(all_chunks)  # Chunks waiting to be submitted
-        active_predictions = {}  # global_idx -> {prediction, chunk_info}
-        
-        while chunk_queue or active_predictions:
-            # Submit new predictions up to parallel_workers limit
-            while chunk_queue and len(active_predictions) < parallel_workers:
-                chunk_info = chunk_queue.pop(0)
-                global_idx = chunk_info["global_index"]
-                
-                logging.info(f"Submitting chunk {global_idx + 1}/{len(all_chunks)}: "
-                            f"speaker={chunk_info['speaker']} (active: {len(active_predictions) + 1})")
-                
-                try:
-                    create_kwargs = {
-                        "input": {
-                            "text": chunk_info["text"],
-                            "voice": chunk_info["voice"],
-                            "speed": speed
-                        }
-                    }
-                    
-                    if version:
-                        create_kwargs["version"] = version
-                    else:
-                        create_kwargs["model"] = model_name
-                    
-                    prediction = self.client.predictions.create(**create_kwargs)
-                    active_predictions[global_idx] = {
-                        "prediction": prediction,
-                        "chunk_info": chunk_info,
-                    }
-                except Exception as e:
-                    logging.error(f"Failed to submit chunk {global_idx}: {e}")
-                    raise
-            
-            # Poll active predictions
-            for global_idx in list(active_predictions.keys()):
-                pred_info = active_predictions[global_idx]
-                prediction = pred_info["prediction"]
-                chunk_info = pred_info["chunk_info"]
-                
-                # Reload prediction status
-                prediction.reload()
-                
-                if prediction.status == "succeeded":
-                    output_path = output_dir / f"chunk_{global_idx:04d}.wav"
-                    audio_url = prediction.output
-                    
-                    # Download the audio
-                    self._download_audio(audio_url, str(output_path))
-                    
-                    # Apply FX if needed
-                    if chunk_info["fx_settings"]:
-                        self._apply_fx_to_file(str(output_path), chunk_info["fx_settings"])
-                    
-                    results[global_idx] = str(output_path)
-                    del active_predictions[global_idx]
-                    
-                    logging.info(f"Chunk {global_idx + 1}/{len(all_chunks)} completed")
-                    
-                    # Callbacks
-                    if callable(progress_cb):
-                        progress_cb()
-                    if callable(chunk_cb):
-                        chunk_meta = {
-                            "speaker": chunk_info["speaker"],
-                            "text": chunk_info["text"],
-                            "segment_index": chunk_info["seg_idx"],
-                            "chunk_index": chunk_info["chunk_idx"],
-                        }
-                        chunk_cb(global_idx, chunk_meta, str(output_path))
-                        
-                elif prediction.status == "failed":
-                    error_msg = getattr(prediction, "error", "Unknown error")
-                    logging.error(f"Chunk {global_idx} failed: {error_msg}")
-                    del active_predictions[global_idx]
-                    raise RuntimeError(f"Prediction failed for chunk {global_idx}: {error_msg}")
-                    
-                elif prediction.status == "canceled":
-                    logging.error(f"Chunk {global_idx} was canceled")
-                    del active_predictions[global_idx]
-                    raise RuntimeError(f"Prediction canceled for chunk {global_idx}")
-            
-            # Small delay before next poll cycle if still have active predictions
-            if active_predictions:
-                time.sleep(0.5)
+
+        def on_complete(request: PredictionRequest, path: str):
+            chunk_info = request.context
+            results[request.index] = path
+            logging.info(f"Chunk {request.index + 1}/{len(all_chunks)} completed")
+            if callable(progress_cb):
+                progress_cb()
+            if callable(chunk_cb):
+                chunk_meta = {
+                    "speaker": chunk_info["speaker"],
+                    "text": chunk_info["text"],
+                    "segment_index": chunk_info["seg_idx"],
+                    "chunk_index": chunk_info["chunk_idx"],
+                }
+                chunk_cb(request.index, chunk_meta, path)
+
+        self.transport.run_batch(requests_batch, parallel_workers, on_complete, max_parallel_workers)
         
         # Return files in order
         output_files = [results[i] for i in range(len(all_chunks))]
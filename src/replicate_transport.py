@@ -0,0 +1,496 @@
+"""
+Asyncio transport for batches of Replicate predictions.
+
+All predictions of a batch share one pooled HTTP client. A new prediction is
+submitted as soon as a slot frees, predictions are created with Replicate's
+``Prefer: wait`` long-poll (with a short backoff poll only for long-running
+ones), and outputs download concurrently while other predictions run.
+
+The number of slots adapts while the batch runs: it starts at the configured
+``parallel_workers``, is cut back on throttling (HTTP 429) or server errors and
+grows while latency stays healthy, never above the batch's ``max_workers``. Throttling, server and network
+errors are retried with jittered exponential backoff until the batch's error
+budget is spent; failed predictions are not retried, since Replicate bills
+each attempt and a rejected input fails the same way again.
+
+Raw outputs are checkpointed to data/cache/replicate_outputs as they finish,
+so a job restarted after a failure skips every chunk Replicate already
+produced. A batch's checkpoints are dropped once the whole batch succeeds.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import math
+import os
+import random
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_API_BASE_URL = "https://api.replicate.com/v1"
+LONG_POLL_SECONDS = 60
+POLL_INITIAL_DELAY = 0.25
+POLL_MAX_DELAY = 2.0
+TERMINAL_STATUSES = {"succeeded", "failed", "canceled"}
+MAX_ATTEMPTS_PER_PREDICTION = 5
+ERROR_BUDGET_RATIO = 0.05
+MIN_ERROR_BUDGET = 10
+BACKOFF_BASE_DELAY = 1.0
+BACKOFF_MAX_DELAY = 30.0
+OUTPUT_CHECKPOINT_DIR = Path(__file__).resolve().parent.parent / "data" / "cache" / "replicate_outputs"
+OUTPUT_CHECKPOINT_MAX_BYTES = 2 * 1024 * 1024 * 1024
+OUTPUT_CHECKPOINT_MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+
+
+@dataclass
+class PredictionRequest:
+    """
+    One prediction in a batch. ``finalize`` turns the downloaded output bytes into a
+    result. ``checkpoint_input`` replaces ``input`` when keying the output checkpoint,
+    for inputs that carry short-lived values such as uploaded file URLs.
+    """
+
+    index: int
+    input: Dict[str, Any]
+    finalize: Callable[[memoryview], Any]
+    label: str = ""
+    context: Dict[str, Any] = field(default_factory=dict)
+    checkpoint_input: Optional[Dict[str, Any]] = None
+
+
+class ReplicatePredictionError(RuntimeError):
+    """Raised when a prediction fails, is canceled, or returns no output."""
+
+    def __init__(self, message: str, *, retryable: bool = False):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class ErrorBudgetExceeded(RuntimeError):
+    """Raised when a batch has retried more failures than its budget allows."""
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD limiter for in-flight predictions.
+
+    The limit is halved on throttling or server errors (at most once per
+    ``cooldown`` seconds) and grows back by one after a full window of successes
+    whose latency stays within ``latency_tolerance`` of the best latency seen.
+    ``maximum`` (the initial limit unless given) is a hard ceiling.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        *,
+        minimum: int = 1,
+        maximum: Optional[int] = None,
+        latency_tolerance: float = 1.5,
+        cooldown: float = 2.0,
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum if maximum is not None else initial)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.latency_tolerance = latency_tolerance
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._healthy = 0
+        self._best_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.in_flight < self.limit)
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    async def record_success(self, latency: float) -> None:
+        if self._best_latency is None or latency < self._best_latency:
+            self._best_latency = latency
+        if latency > self._best_latency * self.latency_tolerance:
+            self._healthy = 0
+            return
+        self._healthy += 1
+        if self._healthy >= self.limit and self.limit < self.maximum:
+            self._healthy = 0
+            async with self._condition:
+                self.limit += 1
+                self._condition.notify_all()
+            logger.info("Replicate concurrency raised to %d", self.limit)
+
+    def record_backoff(self) -> None:
+        self._healthy = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown or self.limit <= self.minimum:
+            return
+        self._last_decrease = now
+        self.limit = max(self.minimum, self.limit // 2)
+        logger.warning("Replicate throttling/errors detected; concurrency lowered to %d", self.limit)
+
+
+class ErrorBudget:
+    """Caps retries per prediction and across a whole batch."""
+
+    def __init__(self, total_requests: int, *, max_attempts: int = MAX_ATTEMPTS_PER_PREDICTION):
+        self.max_attempts = max(1, max_attempts)
+        self.max_failures = max(MIN_ERROR_BUDGET, math.ceil(total_requests * ERROR_BUDGET_RATIO))
+        self.failures = 0
+
+    def consume(self, attempt: int, exc: BaseException) -> None:
+        """Record a failed attempt, raising once this prediction or the batch is out of retries."""
+        self.failures += 1
+        if attempt >= self.max_attempts:
+            raise ErrorBudgetExceeded(f"Giving up after {attempt} attempts: {exc}") from exc
+        if self.failures > self.max_failures:
+            raise ErrorBudgetExceeded(
+                f"Replicate error budget exhausted ({self.failures} failures, budget {self.max_failures}): {exc}"
+            ) from exc
+
+
+def _retry_after(exc: BaseException) -> Optional[float]:
+    if isinstance(exc, httpx.HTTPStatusError):
+        value = exc.response.headers.get("Retry-After")
+        if value:
+            try:
+                return max(0.0, float(value))
+            except ValueError:
+                return None
+    return None
+
+
+def _is_throttle(exc: BaseException) -> bool:
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TimeoutException)
+
+
+def _is_retryable(exc: BaseException) -> bool:
+    """Only throttling, server and network errors; a failed prediction would be billed again."""
+    if isinstance(exc, ReplicatePredictionError):
+        return exc.retryable
+    if isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+        return status == 429 or status >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    """Full-jitter exponential backoff, never shorter than a server-provided Retry-After."""
+    ceiling = min(BACKOFF_MAX_DELAY, BACKOFF_BASE_DELAY * (2 ** (attempt - 1)))
+    delay = random.uniform(0, ceiling)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class OutputCheckpoint:
+    """
+    Raw prediction outputs on disk, keyed by model and input, so chunks that
+    finished before a batch failed are not paid for again when the job restarts.
+    """
+
+    def __init__(
+        self,
+        path: Path = OUTPUT_CHECKPOINT_DIR,
+        *,
+        max_bytes: int = OUTPUT_CHECKPOINT_MAX_BYTES,
+        max_age: float = OUTPUT_CHECKPOINT_MAX_AGE_SECONDS,
+    ):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+
+    @staticmethod
+    def key(model_ref: str, payload: Dict[str, Any]) -> str:
+        encoded = json.dumps({"model": model_ref, "input": payload}, sort_keys=True, default=str)
+        return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+    def load(self, key: str) -> Optional[memoryview]:
+        try:
+            return memoryview((self.path / key).read_bytes())
+        except OSError:
+            return None
+
+    def save(self, key: str, data: memoryview) -> None:
+        tmp_path: Optional[Path] = None
+        try:
+            self.path.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=self.path, prefix=f"{key}.", suffix=".tmp", delete=False) as handle:
+                tmp_path = Path(handle.name)
+                handle.write(data)
+            os.replace(tmp_path, self.path / key)
+        except OSError as exc:
+            logger.warning("Failed to checkpoint Replicate output: %s", exc)
+            if tmp_path is not None:
+                tmp_path.unlink(missing_ok=True)
+
+    def discard(self, keys: List[str]) -> None:
+        for key in keys:
+            (self.path / key).unlink(missing_ok=True)
+
+    def prune(self) -> None:
+        """Drop checkpoints older than ``max_age``, then the oldest ones beyond ``max_bytes``."""
+        try:
+            entries = sorted(
+                ((entry.stat(), entry) for entry in self.path.iterdir() if entry.is_file()),
+                key=lambda item: item[0].st_mtime,
+            )
+        except OSError:
+            return
+        cutoff = time.time() - self.max_age
+        total = sum(stat_result.st_size for stat_result, _ in entries)
+        for stat_result, entry in entries:
+            if stat_result.st_mtime >= cutoff and total <= self.max_bytes:
+                break
+            entry.unlink(missing_ok=True)
+            total -= stat_result.st_size
+
+
+class ReplicateTransport:
+    """Runs batches of predictions for one model with bounded concurrency."""
+
+    def __init__(
+        self,
+        api_token: str,
+        model_ref: str,
+        *,
+        base_url: Optional[str] = None,
+        timeout: float = 120.0,
+        max_attempts: int = MAX_ATTEMPTS_PER_PREDICTION,
+        checkpoint: Optional[OutputCheckpoint] = None,
+    ):
+        if not api_token:
+            raise ValueError("Replicate API token is required")
+        self.api_token = api_token
+        self.model_ref = model_ref
+        self.base_url = (base_url or os.environ.get("REPLICATE_API_BASE_URL") or DEFAULT_API_BASE_URL).rstrip("/")
+        self.timeout = timeout
+        self.max_attempts = max(1, max_attempts)
+        self.checkpoint = checkpoint or OutputCheckpoint()
+
+    # ------------------------------------------------------------------ #
+    def run_batch(
+        self,
+        requests: List[PredictionRequest],
+        parallel_workers: int,
+        on_complete: Callable[[PredictionRequest, Any], None],
+        max_workers: Optional[int] = None,
+    ) -> None:
+        """
+        Run every request, calling ``on_complete(request, result)`` on the calling
+        thread as each one finishes. ``parallel_workers`` is the starting
+        concurrency; healthy batches grow it up to ``max_workers`` (by default the
+        starting value, i.e. fixed). Raises once a prediction fails permanently or
+        the batch's error budget is spent; outputs finished by then stay
+        checkpointed for the next attempt.
+        """
+        if not requests:
+            return
+        keys = [
+            self.checkpoint.key(self.model_ref, request.checkpoint_input or request.input)
+            for request in requests
+        ]
+        self.checkpoint.prune()
+        initial = max(1, parallel_workers)
+        ceiling = max(initial, max_workers or initial)
+        asyncio.run(self._run_batch(requests, keys, initial, ceiling, on_complete))
+        self.checkpoint.discard(keys)
+
+    async def _run_batch(
+        self,
+        requests: List[PredictionRequest],
+        keys: List[str],
+        initial_slots: int,
+        max_slots: int,
+        on_complete: Callable[[PredictionRequest, Any], None],
+    ) -> None:
+        limits = httpx.Limits(
+            max_connections=max_slots * 2 + 2,
+            max_keepalive_connections=max_slots * 2 + 2,
+        )
+        slots = AdaptiveConcurrency(initial_slots, maximum=max_slots)
+        budget = ErrorBudget(len(requests), max_attempts=self.max_attempts)
+        loop = asyncio.get_running_loop()
+        headers = {"Authorization": f"Bearer {self.api_token}"}
+
+        async with httpx.AsyncClient(
+            headers=headers,
+            limits=limits,
+            timeout=httpx.Timeout(self.timeout, connect=15.0),
+            follow_redirects=True,
+        ) as http:
+            with ThreadPoolExecutor(max_workers=max_slots, thread_name_prefix="replicate_finalize") as pool:
+
+                async def predict(request: PredictionRequest) -> str:
+                    await slots.acquire()
+                    try:
+                        started = time.monotonic()
+                        prediction = await self._create(http, request)
+                        try:
+                            prediction = await self._wait(http, prediction)
+                        except BaseException:
+                            # Don't leave an orphaned prediction running (and billing) behind a retry
+                            await self._cancel(http, prediction)
+                            raise
+                        output_url = self._output_url(prediction, request)
+                        await slots.record_success(time.monotonic() - started)
+                        return output_url
+                    finally:
+                        await slots.release()
+
+                async def with_retries(request: PredictionRequest, step, *args):
+                    attempt = 0
+                    while True:
+                        attempt += 1
+                        try:
+                            return await step(*args)
+                        except asyncio.CancelledError:
+                            raise
+                        except Exception as exc:
+                            if not _is_retryable(exc):
+                                raise
+                            if _is_throttle(exc):
+                                slots.record_backoff()
+                            budget.consume(attempt, exc)
+                            delay = backoff_delay(attempt, _retry_after(exc))
+                            logger.warning(
+                                "Replicate chunk %s failed (attempt %d/%d): %s; retrying in %.1fs",
+                                request.label or request.index + 1,
+                                attempt,
+                                budget.max_attempts,
+                                exc,
+                                delay,
+                            )
+                            await asyncio.sleep(delay)
+
+                async def run_one(request: PredictionRequest, key: str) -> None:
+                    data = await loop.run_in_executor(pool, self.checkpoint.load, key)
+                    if data is not None:
+                        logger.info("Reusing checkpointed Replicate output for chunk %s", request.label or request.index + 1)
+                    else:
+                        # Downloads retry on their own so a flaky fetch never re-runs a finished prediction
+                        output_url = await with_retries(request, predict, request)
+                        data = await with_retries(request, self._download, http, output_url)
+                        await loop.run_in_executor(pool, self.checkpoint.save, key, data)
+                    result = await loop.run_in_executor(pool, request.finalize, data)
+                    on_complete(request, result)
+
+                tasks = [asyncio.create_task(run_one(request, key)) for request, key in zip(requests, keys)]
+                try:
+                    await asyncio.gather(*tasks)
+                except BaseException:
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+
+    # ------------------------------------------------------------------ #
+    async def _create(self, http: httpx.AsyncClient, request: PredictionRequest) -> Dict[str, Any]:
+        if ":" in self.model_ref:
+            _, version = self.model_ref.split(":", 1)
+            url = f"{self.base_url}/predictions"
+            body: Dict[str, Any] = {"version": version, "input": request.input}
+        else:
+            url = f"{self.base_url}/models/{self.model_ref}/predictions"
+            body = {"input": request.input}
+        logger.info("Submitting Replicate prediction %s", request.label or request.index + 1)
+        response = await http.post(
+            url,
+            json=body,
+            headers={"Prefer": f"wait={LONG_POLL_SECONDS}"},
+            timeout=httpx.Timeout(LONG_POLL_SECONDS + 30.0, connect=15.0),
+        )
+        response.raise_for_status()
+        return response.json()
+
+    async def _wait(self, http: httpx.AsyncClient, prediction: Dict[str, Any]) -> Dict[str, Any]:
+        delay = POLL_INITIAL_DELAY
+        while prediction.get("status") not in TERMINAL_STATUSES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 1.5, POLL_MAX_DELAY)
+            poll_url = (prediction.get("urls") or {}).get("get") or f"{self.base_url}/predictions/{prediction['id']}"
+            response = await http.get(poll_url)
+            response.raise_for_status()
+            prediction = response.json()
+        return prediction
+
+    async def _cancel(self, http: httpx.AsyncClient, prediction: Dict[str, Any]) -> None:
+        cancel_url = (prediction.get("urls") or {}).get("cancel")
+        if not cancel_url or prediction.get("status") in TERMINAL_STATUSES:
+            return
+        try:
+            await http.post(cancel_url)
+        except Exception:  # pragma: no cover - best effort
+            logger.debug("Failed to cancel Replicate prediction %s", prediction.get("id"), exc_info=True)
+
+    @staticmethod
+    def _output_url(prediction: Dict[str, Any], request: PredictionRequest) -> str:
+        status = prediction.get("status")
+        label = request.label or request.index
+        if status == "failed":
+            raise ReplicatePredictionError(
+                f"Prediction failed for chunk {label}: {prediction.get('error') or 'Unknown error'}"
+            )
+        if status == "canceled":
+            raise ReplicatePredictionError(f"Prediction canceled for chunk {label}")
+        output = prediction.get("output")
+        if isinstance(output, list):
+            output = output[0] if output else None
+        if isinstance(output, dict):
+            output = output.get("audio") or output.get("url")
+        if not output:
+            raise ReplicatePredictionError(f"Replicate response did not include an audio URL for chunk {label}")
+        return str(output)
+
+    @staticmethod
+    async def _download(http: httpx.AsyncClient, url: str) -> memoryview:
+        """Stream the output into a buffer sized from Content-Length when the server sends one."""
+        async with http.stream("GET", url) as response:
+            response.raise_for_status()
+            try:
+                expected = int(response.headers.get("Content-Length") or 0)
+            except ValueError:
+                expected = 0
+            if response.headers.get("Content-Encoding") or expected <= 0:
+                return memoryview(await response.aread())
+            buffer = bytearray(expected)
+            view = memoryview(buffer)
+            filled = 0
+            async for block in response.aiter_raw():
+                end = filled + len(block)
+                if end > expected:
+                    view.release()
+                    buffer.extend(bytes(end - expected))
+                    view = memoryview(buffer)
+                    expected = end
+                view[filled:end] = block
+                filled = end
+            return view[:filled]
+
+
+__all__ = [
+    "AdaptiveConcurrency",
+    "ErrorBudget",
+    "ErrorBudgetExceeded",
+    "OutputCheckpoint",
+    "PredictionRequest",
+    "ReplicatePredictionError",
+    "ReplicateTransport",
+]
@@ -0,0 +1,198 @@
+"""
+Persistent cache of reference clips uploaded to Replicate's Files API.
+
+Uploads are keyed by a hash of the clip's content (and of the API token, since
+files belong to one account), survive engine re-creation and restarts via
+data/cache/replicate_uploads.json, and are dropped shortly before Replicate
+expires them. Concurrent requests for the same clip share one upload.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_CACHE_PATH = Path(__file__).resolve().parent.parent / "data" / "cache" / "replicate_uploads.json"
+DEFAULT_UPLOAD_TTL_SECONDS = 24 * 60 * 60
+EXPIRY_MARGIN_SECONDS = 60 * 60
+MISSING_UPLOAD_PATTERN = re.compile(r"\b(?:404|410)\b|not found|gone|expired", re.IGNORECASE)
+
+
+def _parse_expiry(value) -> Optional[float]:
+    if not value:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        return value.timestamp()
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+def is_missing_upload_error(exc: BaseException, url: str) -> bool:
+    """True when an error reports that Replicate could not fetch the uploaded file at ``url`` (404/410)."""
+    details = str(exc)
+    response = getattr(exc, "response", None)
+    status = getattr(response, "status_code", None)
+    if status is not None:
+        details = f"{status} {details}"
+    try:
+        details += f" {response.text}" if response is not None else ""
+    except Exception:  # noqa: BLE001 - streamed bodies may be unreadable
+        pass
+    file_id = url.rstrip("/").rsplit("/", 1)[-1]
+    if url not in details and file_id not in details:
+        return False
+    return bool(MISSING_UPLOAD_PATTERN.search(details))
+
+
+class ReplicateUploadCache:
+    """Thread-safe map of content hash -> uploaded file URL with expiry tracking."""
+
+    def __init__(self, path: Path = UPLOAD_CACHE_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict]] = None
+        self._inflight: Dict[str, threading.Lock] = {}
+        # (resolved path, size, mtime_ns) -> content digest, so unchanged clips are hashed once
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+        self.stats = {"hits": 0, "uploads": 0, "expired": 0}
+
+    def get_or_upload(
+        self,
+        path: Path,
+        api_token: str,
+        upload: Callable[[Path], Tuple[str, Optional[object]]],
+    ) -> str:
+        """
+        Return a live URL for ``path``, calling ``upload(path) -> (url, expires_at)``
+        only when no unexpired upload of the same content exists.
+        """
+        key = self._key(Path(path), api_token)
+        cached = self._lookup(key)
+        if cached:
+            return cached
+
+        with self._lock:
+            key_lock = self._inflight.setdefault(key, threading.Lock())
+        with key_lock:
+            # Another thread may have finished the same upload while we waited
+            cached = self._lookup(key)
+            if cached:
+                return cached
+            url, expires_at = upload(Path(path))
+            expiry = _parse_expiry(expires_at) or time.time() + DEFAULT_UPLOAD_TTL_SECONDS
+            with self._lock:
+                self._load()[key] = {
+                    "url": url,
+                    "expires_at": expiry,
+                    "name": Path(path).name,
+                    "uploaded_at": time.time(),
+                }
+                self.stats["uploads"] += 1
+                self._inflight.pop(key, None)
+                self._save()
+            logger.info("Uploaded reference clip %s to Replicate", Path(path).name)
+            return url
+
+    def invalidate(self, path: Path, api_token: str) -> None:
+        """Forget the upload of ``path`` so the next request uploads it again."""
+        key = self._key(Path(path), api_token)
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._save()
+
+    def snapshot(self) -> Dict[str, int]:
+        with self._lock:
+            return {**self.stats, "entries": len(self._load())}
+
+    # ------------------------------------------------------------------ #
+    def _key(self, path: Path, api_token: str) -> str:
+        stat = path.stat()
+        stat_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(stat_key)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with path.open("rb") as handle:
+                for block in iter(lambda: handle.read(1024 * 1024), b""):
+                    hasher.update(block)
+            digest = hasher.hexdigest()[:32]
+            with self._lock:
+                self._digests[stat_key] = digest
+        account = hashlib.sha256(api_token.encode("utf-8")).hexdigest()[:12]
+        return f"{account}:sha256:{digest}"
+
+    def _lookup(self, key: str) -> Optional[str]:
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(key)
+            if not entry:
+                return None
+            if float(entry.get("expires_at") or 0) - EXPIRY_MARGIN_SECONDS <= time.time():
+                entries.pop(key, None)
+                self.stats["expired"] += 1
+                self._save()
+                return None
+            self.stats["hits"] += 1
+            return entry.get("url")
+
+    def _load(self) -> Dict[str, Dict]:
+        if self._entries is not None:
+            return self._entries
+        self._entries = {}
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+                now = time.time()
+                self._entries = {
+                    key: entry
+                    for key, entry in dict(data.get("uploads", {})).items()
+                    if float(entry.get("expires_at") or 0) - EXPIRY_MARGIN_SECONDS > now
+                }
+            except Exception as exc:
+                logger.warning("Failed to load Replicate upload cache: %s", exc)
+        return self._entries
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump({"uploads": self._entries or {}}, handle, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as exc:
+            logger.warning("Failed to save Replicate upload cache: %s", exc)
+
+
+_cache: Optional[ReplicateUploadCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_upload_cache() -> ReplicateUploadCache:
+    """Return the process-wide upload cache shared by every Replicate engine instance."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ReplicateUploadCache()
+    return _cache
+
+
+__all__ = [
+    "ReplicateUploadCache",
+    "get_upload_cache",
+    "is_missing_upload_error",
+]
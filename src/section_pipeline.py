@@ -0,0 +1,377 @@
+"""
+Concurrent and streaming LLM preprocessing of book sections.
+
+Sections used to be sent one at a time so each prompt could carry the speaker
+tags found so far. This pipeline gets the same consistency without the
+serial dependency:
+
+1. a single discovery call lists the book's speakers, and the other names
+   each one goes by, from short excerpts,
+2. every section is processed in parallel with that shared speaker list,
+3. a reconciliation pass rewrites tags the discovery call listed as aliases
+   onto their speaker's tag. Speakers already tagged in the input are kept
+   exactly as written; nothing is merged on a guess.
+
+``ParagraphAssembler`` splits a streamed response into finished paragraphs so
+callers can act on them before the section completes, and ``pack_sections``
+sizes sections by an estimated token budget rather than by TTS chunk size.
+"""
+from __future__ import annotations
+
+import logging
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+from .text_processor import TextProcessor
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 4
+DISCOVERY_EXCERPT_CHARS = 1500
+DISCOVERY_MAX_CHARS = 40000
+DISCOVERY_PROMPT = (
+    "List every character who speaks dialogue in the book excerpts below. "
+    "Reply with one line per character and nothing else: their speaker tag in "
+    "lowercase with underscores instead of spaces, then, only if the excerpts call "
+    "the same character by other names, \" = \" and those names separated by commas "
+    "(for example: john_smith = john, mr_smith). Do not list the narrator."
+)
+
+# Input tokens per section. The model rewrites the section with tags, so output is
+# roughly the same size; this stays under common output limits (~8k tokens).
+DEFAULT_SECTION_TOKEN_BUDGET = 6000
+
+_PARAGRAPH_SPLIT = re.compile(r"\n\s*\n")
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?\u3002\uff01\uff1f])\s+")
+_TAG_PATTERN = re.compile(r"\[(/?)([A-Za-z0-9_\-]+)\]")
+_LIST_MARKER = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s*")
+
+
+def _tag_name(name: str) -> str:
+    """A discovered name as a speaker tag: lowercase, spaces to underscores, hyphens kept."""
+    name = re.sub(r"\s+", "_", (name or "").strip(" \t[]").lower())
+    return re.sub(r"[^a-z0-9_\-]", "", name).strip("_-")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Fast token estimate without a tokenizer: ~4 characters per token for
+    ASCII text and ~1 token per character for CJK and other non-ASCII scripts.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars))
+
+
+def _split_oversized(text: str, budget: int) -> List[str]:
+    """Split one paragraph that exceeds the budget at sentence ends, then hard-wrap."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in _SENTENCE_SPLIT.split(text):
+        candidate = f"{current} {sentence}".strip() if current else sentence
+        if estimate_tokens(candidate) <= budget:
+            current = candidate
+            continue
+        if current:
+            pieces.append(current)
+        if estimate_tokens(sentence) <= budget:
+            current = sentence
+            continue
+        # A single "sentence" over budget: cut by characters proportional to the estimate
+        step = max(1, int(len(sentence) * budget / max(1, estimate_tokens(sentence))))
+        pieces.extend(sentence[start:start + step] for start in range(0, len(sentence) - step, step))
+        current = sentence[(len(sentence) - 1) // step * step:]
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def pack_paragraphs(text: str, budget: int) -> List[str]:
+    """Greedily pack paragraphs into blocks whose estimated size stays within ``budget`` tokens."""
+    budget = max(1, int(budget))
+    blocks: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for paragraph in _PARAGRAPH_SPLIT.split(text or ""):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        tokens = estimate_tokens(paragraph)
+        parts = [paragraph] if tokens <= budget else _split_oversized(paragraph, budget)
+        for part in parts:
+            # +1 for the blank line that joins it to the previous paragraph
+            part_tokens = estimate_tokens(part) + (1 if current else 0)
+            if current and current_tokens + part_tokens > budget:
+                blocks.append("\n\n".join(current))
+                current, current_tokens = [], 0
+                part_tokens -= 1
+            current.append(part)
+            current_tokens += part_tokens
+    if current:
+        blocks.append("\n\n".join(current))
+    return blocks
+
+
+def pack_sections(chapters: Sequence[Dict], budget: int) -> List[Dict]:
+    """
+    Turn chapters (``title``/``content`` dicts) into LLM sections: chapters that
+    fit the budget stay whole, oversized ones are split into titled parts.
+    Untitled input (no chapter headings) is packed into ``chunk`` sections.
+    """
+    sections: List[Dict] = []
+    for chapter in chapters:
+        content = (chapter.get("content") or "").strip()
+        if not content:
+            continue
+        title = chapter.get("title")
+        source = "chapter" if title else "chunk"
+        if estimate_tokens(content) <= budget:
+            sections.append({"title": title, "content": content, "source": source})
+            continue
+        blocks = pack_paragraphs(content, budget)
+        for part, block in enumerate(blocks, start=1):
+            part_title = f"{title} (part {part}/{len(blocks)})" if title and len(blocks) > 1 else title
+            sections.append({"title": part_title, "content": block, "source": source})
+    return sections
+
+
+class SectionPipeline:
+    """Runs sections through an LLM concurrently and reconciles their speaker tags."""
+
+    def __init__(
+        self,
+        processor,
+        prompt_builder: Callable[[Dict, List[str]], str],
+        *,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        discover_speakers: bool = True,
+    ):
+        self.processor = processor
+        self.prompt_builder = prompt_builder
+        self.max_workers = max(1, int(max_workers))
+        self.discover = discover_speakers
+        self.text_processor = TextProcessor()
+
+    # ------------------------------------------------------------------ #
+    def run(
+        self,
+        sections: Sequence[Dict],
+        seed_speakers: Iterable[str] = (),
+        progress_cb: Optional[Callable[[int, int, Dict], None]] = None,
+    ) -> Dict:
+        """
+        Process ``sections`` and return ``{"sections": [...], "speakers": [...], "aliases": {...}}``
+        with sections in their original order.
+        """
+        work = [
+            (index, section)
+            for index, section in enumerate(sections, start=1)
+            if (section.get("content") or "").strip()
+        ]
+        seeds = self._merge_speakers(seed_speakers, ())
+        discovered: Dict[str, List[str]] = {}
+        if self.discover and work:
+            discovered = self.discover_speakers([section for _, section in work])
+        aliases = self.alias_map(discovered, seeds)
+        # Sections are told only the target tags, never the aliases folded into them
+        speakers = self._merge_speakers(seeds, [tag for tag in discovered if tag not in aliases])
+
+        results: Dict[int, Dict] = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, max(1, len(work))),
+                                thread_name_prefix="llm_section") as pool:
+            futures = {
+                pool.submit(self._process_section, index, section, speakers): index
+                for index, section in work
+            }
+            try:
+                for future in as_completed(futures):
+                    result = future.result()
+                    results[result["index"]] = result
+                    if callable(progress_cb):
+                        progress_cb(len(results), len(work), result)
+            except BaseException:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        ordered = [results[index] for index, _ in work]
+        applied = self.reconcile(ordered, aliases)
+        final_speakers: List[str] = []
+        for result in ordered:
+            for speaker in result["speakers"]:
+                if speaker not in final_speakers:
+                    final_speakers.append(speaker)
+        return {"sections": ordered, "speakers": final_speakers, "aliases": applied}
+
+    # ------------------------------------------------------------------ #
+    def discover_speakers(self, sections: Sequence[Dict]) -> Dict[str, List[str]]:
+        """
+        One cheap call over excerpts of every section to agree on speaker tags up
+        front. Returns each speaker tag mapped to the aliases the model listed for it.
+        """
+        excerpts: List[str] = []
+        budget = DISCOVERY_MAX_CHARS
+        for section in sections:
+            excerpt = (section.get("content") or "").strip()[:DISCOVERY_EXCERPT_CHARS]
+            if not excerpt or budget <= 0:
+                continue
+            excerpt = excerpt[:budget]
+            budget -= len(excerpt)
+            excerpts.append(excerpt)
+        if not excerpts:
+            return {}
+
+        prompt = DISCOVERY_PROMPT + "\n\n" + "\n\n---\n\n".join(excerpts)
+        try:
+            response = self.processor.generate_text(prompt)
+        except Exception as exc:
+            logger.warning("Speaker discovery failed; continuing without it: %s", exc)
+            return {}
+
+        discovered: Dict[str, List[str]] = {}
+        for line in (response or "").splitlines():
+            name, _, alias_text = _LIST_MARKER.sub("", line).partition("=")
+            tag = _tag_name(name)
+            if not tag or tag == "narrator":
+                continue
+            aliases = discovered.setdefault(tag, [])
+            for alias in alias_text.split(","):
+                alias = _tag_name(alias)
+                if alias and alias != tag and alias not in aliases:
+                    aliases.append(alias)
+        logger.info("Speaker discovery found %d speakers", len(discovered))
+        return discovered
+
+    def _process_section(self, index: int, section: Dict, speakers: List[str]) -> Dict:
+        prompt = self.prompt_builder(section, speakers)
+        response_text = self.processor.generate_text(prompt)
+        return {
+            "index": index,
+            "title": section.get("title"),
+            "source": section.get("source"),
+            "output": response_text.strip(),
+            "speakers": self.text_processor.extract_speakers(response_text),
+        }
+
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def alias_map(discovered: Dict[str, List[str]], seed_speakers: Sequence[str]) -> Dict[str, str]:
+        """
+        Map each alias listed by discovery onto its speaker's tag. When a seed
+        speaker (already tagged in the input) is part of the group it becomes the
+        target, and seed speakers themselves are never renamed.
+        """
+        seeds = {name.lower(): name for name in seed_speakers}
+        aliases: Dict[str, str] = {}
+        for tag, names in discovered.items():
+            group = [tag, *names]
+            target = next((seeds[name] for name in group if name in seeds), tag)
+            for name in group:
+                if name != target.lower() and name not in seeds and name not in aliases:
+                    aliases[name] = target
+        return aliases
+
+    def reconcile(self, results: List[Dict], aliases: Dict[str, str]) -> Dict[str, str]:
+        """
+        Rewrite speaker tags in ``results`` (in place) using an ``alias -> tag`` map
+        and return the part of the map that was actually applied.
+        """
+        found = {speaker for result in results for speaker in result["speakers"]}
+        changed = {alias: target for alias, target in aliases.items() if alias in found}
+        for result in results:
+            if changed:
+                result["output"] = _TAG_PATTERN.sub(
+                    lambda match: self._rewrite_tag(match, changed), result["output"]
+                )
+            speakers: List[str] = []
+            for speaker in result["speakers"]:
+                target = changed.get(speaker, speaker)
+                if target not in speakers:
+                    speakers.append(target)
+            result["speakers"] = speakers
+        if changed:
+            logger.info("Reconciled speaker tags: %s", changed)
+        return changed
+
+    def _rewrite_tag(self, match: re.Match, changed: Dict[str, str]) -> str:
+        slash, name = match.group(1), match.group(2)
+        normalized = name.strip().lower()
+        if normalized in self.text_processor.RESERVED_TAGS or normalized not in changed:
+            return match.group(0)
+        return f"[{slash}{changed[normalized]}]"
+
+    @staticmethod
+    def _merge_speakers(existing: Iterable[str], extra: Iterable[str]) -> List[str]:
+        """Combine speaker lists in order, comparing case-insensitively but keeping names as written."""
+        merged: List[str] = []
+        seen = set()
+        for name in list(existing) + list(extra):
+            name = (name or "").strip()
+            if name and name.lower() not in seen:
+                seen.add(name.lower())
+                merged.append(name)
+        return merged
+
+
+class ParagraphAssembler:
+    """
+    Collects streamed LLM text and releases paragraphs once they are complete:
+    at a blank line that is not inside an open speaker tag.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._scanned = 0
+        self._open_tags: List[str] = []
+
+    def feed(self, delta: str) -> List[str]:
+        self._buffer += delta or ""
+        completed: List[str] = []
+        start = 0
+        position = self._scanned
+        while True:
+            boundary = self._buffer.find("\n\n", position)
+            if boundary < 0:
+                break
+            self._track_tags(self._buffer[position:boundary])
+            position = boundary + 2
+            if not self._open_tags:
+                paragraph = self._buffer[start:boundary].strip()
+                if paragraph:
+                    completed.append(paragraph)
+                start = position
+        # Keep the unscanned tail (it may end in half a tag) for the next delta
+        self._buffer = self._buffer[start:]
+        self._scanned = position - start
+        return completed
+
+    def finish(self) -> List[str]:
+        remainder = self._buffer.strip()
+        self._buffer = ""
+        self._scanned = 0
+        self._open_tags = []
+        return [remainder] if remainder else []
+
+    def _track_tags(self, text: str) -> None:
+        for match in _TAG_PATTERN.finditer(text):
+            name = match.group(2).lower()
+            if match.group(1):
+                if name in self._open_tags:
+                    # Close the most recent matching tag and anything left open inside it
+                    index = len(self._open_tags) - 1 - self._open_tags[::-1].index(name)
+                    del self._open_tags[index:]
+            else:
+                self._open_tags.append(name)
+
+
+__all__ = [
+    "DEFAULT_SECTION_TOKEN_BUDGET",
+    "ParagraphAssembler",
+    "SectionPipeline",
+    "estimate_tokens",
+    "pack_paragraphs",
+    "pack_sections",
+]
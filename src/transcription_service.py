@@ -0,0 +1,248 @@
+"""
+Shared reference-prompt transcription for voice cloning engines.
+
+One lazily loaded SenseVoice model serves every engine, and transcripts live in
+a single store (data/voice_prompts/transcripts.json) keyed by a hash of the audio
+content, so renamed or re-saved copies of a clip reuse the same transcript.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from funasr import AutoModel as FunASRAutoModel  # type: ignore
+
+    SENSEVOICE_AVAILABLE = True
+except ImportError:  # pragma: no cover - optional dependency
+    FunASRAutoModel = None  # type: ignore[assignment]
+    SENSEVOICE_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+TRANSCRIPTS_PATH = Path(__file__).resolve().parent.parent / "data" / "voice_prompts" / "transcripts.json"
+ASR_MODEL_ID = "iic/SenseVoiceSmall"
+_SENSEVOICE_TAG_PATTERN = re.compile(r"<\|[^|]+\|>")
+
+
+def _legacy_key(path: Path, stat: os.stat_result) -> str:
+    """Key format used before transcripts were content addressed (name/size/mtime)."""
+    key_data = f"{path.name}:{stat.st_size}:{stat.st_mtime}"
+    return hashlib.md5(key_data.encode()).hexdigest()[:16]
+
+
+class TranscriptStore:
+    """Thread-safe transcript cache persisted with atomic writes."""
+
+    def __init__(self, path: Path = TRANSCRIPTS_PATH):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._transcripts: Optional[Dict[str, str]] = None
+        # (resolved path, size, mtime_ns) -> content key, so unchanged files are hashed once
+        self._digests: Dict[Tuple[str, int, int], str] = {}
+
+    def content_key(self, audio_path: str | Path) -> Optional[str]:
+        path = Path(audio_path)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        stat_key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            cached = self._digests.get(stat_key)
+        if cached:
+            return cached
+        digest = hashlib.sha256()
+        with path.open("rb") as handle:
+            for block in iter(lambda: handle.read(1024 * 1024), b""):
+                digest.update(block)
+        key = f"sha256:{digest.hexdigest()[:32]}"
+        with self._lock:
+            self._digests[stat_key] = key
+        return key
+
+    def get(self, audio_path: str | Path) -> Optional[str]:
+        path = Path(audio_path)
+        key = self.content_key(path)
+        if not key:
+            return None
+        with self._lock:
+            transcripts = self._load()
+            transcript = transcripts.get(key)
+            if transcript:
+                return transcript
+            # Migrate entries written by the old name/size/mtime keying
+            legacy = transcripts.get(_legacy_key(path, path.stat()))
+            if legacy:
+                transcripts[key] = legacy
+                self._save()
+            return legacy
+
+    def set(self, audio_path: str | Path, transcript: str) -> None:
+        key = self.content_key(audio_path)
+        if not key or not transcript:
+            return
+        with self._lock:
+            transcripts = self._load()
+            if transcripts.get(key) == transcript:
+                return
+            transcripts[key] = transcript
+            self._save()
+
+    def _load(self) -> Dict[str, str]:
+        if self._transcripts is not None:
+            return self._transcripts
+        self._transcripts = {}
+        if self.path.exists():
+            try:
+                with self.path.open("r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+                self._transcripts = dict(data.get("transcripts", {}))
+                logger.info("Loaded %d cached transcripts from %s", len(self._transcripts), self.path.name)
+            except Exception as exc:
+                logger.warning("Failed to load transcripts file: %s", exc)
+        return self._transcripts
+
+    def _save(self) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".json.tmp")
+            with tmp_path.open("w", encoding="utf-8") as handle:
+                json.dump({"transcripts": self._transcripts or {}}, handle, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except Exception as exc:
+            logger.warning("Failed to save transcripts file: %s", exc)
+
+
+class TranscriptionService:
+    """
+    Single SenseVoice ASR model shared by every engine that needs prompt transcripts.
+
+    Users hold a claim through :meth:`acquire`/:meth:`release`; the model is
+    unloaded when the last claim is released, so one engine's cleanup never
+    pulls the model out from under another.
+    """
+
+    def __init__(self, store: Optional[TranscriptStore] = None):
+        self.store = store or TranscriptStore()
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._users = 0
+        self._users_lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        return SENSEVOICE_AVAILABLE
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def users(self) -> int:
+        return self._users
+
+    def acquire(self) -> None:
+        """Register a user of the shared model."""
+        with self._users_lock:
+            self._users += 1
+
+    def release(self) -> None:
+        """Drop one claim, unloading the model once nobody holds one."""
+        with self._users_lock:
+            if self._users > 0:
+                self._users -= 1
+            last = self._users == 0
+        if last:
+            self.unload()
+
+    def get_cached(self, audio_path: str | Path) -> Optional[str]:
+        return self.store.get(audio_path)
+
+    def set_transcript(self, audio_path: str | Path, transcript: str) -> None:
+        self.store.set(audio_path, transcript)
+
+    def transcribe(self, audio_path: Optional[str | Path], device: str = "auto") -> Optional[str]:
+        """Return the transcript for a clip, running ASR only when none is stored."""
+        if not audio_path:
+            return None
+        cached = self.store.get(audio_path)
+        if cached:
+            logger.info("Using cached transcript for %s", Path(audio_path).name)
+            return cached
+        if not SENSEVOICE_AVAILABLE:
+            logger.warning(
+                "SenseVoice (funasr) not available for automatic transcription. Install with: pip install funasr"
+            )
+            return None
+
+        try:
+            with self._model_lock:
+                model = self._ensure_model(device)
+                result = model.generate(input=str(audio_path), batch_size_s=0)
+        except Exception as exc:
+            logger.warning("Failed to auto-transcribe reference audio: %s", exc)
+            return None
+
+        transcript = ""
+        if result:
+            transcript = _SENSEVOICE_TAG_PATTERN.sub("", result[0].get("text", "")).strip()
+        if not transcript:
+            return None
+        self.store.set(audio_path, transcript)
+        logger.info("Auto-transcribed and cached: %s -> %r", Path(audio_path).name, transcript[:80])
+        return transcript
+
+    def unload(self) -> None:
+        with self._model_lock:
+            if self._model is None:
+                return
+            logger.info("Unloading SenseVoice ASR model")
+            self._model = None
+
+    def _ensure_model(self, device: str):
+        if self._model is None:
+            resolved = (device or "auto").strip().lower()
+            if resolved == "auto":
+                try:
+                    import torch
+
+                    resolved = "cuda" if torch.cuda.is_available() else "cpu"
+                except ImportError:
+                    resolved = "cpu"
+            logger.info("Loading SenseVoice ASR model on %s for prompt transcription...", resolved)
+            self._model = FunASRAutoModel(
+                model=ASR_MODEL_ID,
+                trust_remote_code=True,
+                device=resolved,
+                disable_update=True,  # Prevent network check on every load
+            )
+        return self._model
+
+
+_service: Optional[TranscriptionService] = None
+_service_lock = threading.Lock()
+
+
+def get_transcription_service() -> TranscriptionService:
+    """Return the process-wide transcription service."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = TranscriptionService()
+    return _service
+
+
+__all__ = [
+    "SENSEVOICE_AVAILABLE",
+    "TranscriptStore",
+    "TranscriptionService",
+    "get_transcription_service",
+]
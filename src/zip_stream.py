@@ -0,0 +1,103 @@
+"""
+Streaming ZIP writer for job download bundles.
+
+Entries are written straight into the response as they are read, so memory
+stays flat and the first bytes go out immediately. Already-compressed audio
+(MP3, OGG, M4A/M4B, FLAC, Opus) is stored rather than deflated; WAV and other
+files are deflated. A finished archive can optionally be kept on disk so
+later downloads of the same job are plain (range-capable) file transfers.
+"""
+from __future__ import annotations
+
+import logging
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+STORED_SUFFIXES = {".mp3", ".ogg", ".oga", ".opus", ".m4a", ".m4b", ".aac", ".flac"}
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that collects ZipFile output for the generator."""
+
+    def __init__(self, tee: Optional[BinaryIO] = None):
+        self._chunks: List[bytes] = []
+        self._tee = tee
+
+    def write(self, data) -> int:
+        if data:
+            block = bytes(data)
+            self._chunks.append(block)
+            if self._tee is not None:
+                self._tee.write(block)
+        return len(data)
+
+    def flush(self) -> None:
+        if self._tee is not None:
+            self._tee.flush()
+
+    def drain(self) -> Iterator[bytes]:
+        chunks, self._chunks = self._chunks, []
+        yield from chunks
+
+
+def compression_for(path: Path) -> int:
+    return zipfile.ZIP_STORED if path.suffix.lower() in STORED_SUFFIXES else zipfile.ZIP_DEFLATED
+
+
+def stream_zip(entries: Iterable[Tuple[Path, str]], cache_path: Optional[Path] = None) -> Iterator[bytes]:
+    """
+    Yield a ZIP archive of ``(file_path, arcname)`` entries chunk by chunk.
+
+    When ``cache_path`` is given the archive is also written to a temp file that
+    replaces ``cache_path`` only once the archive is complete. Each call gets its
+    own temp file, so concurrent downloads of one job never share a partial file.
+    """
+    tmp_path: Optional[Path] = None
+    tee = None
+    if cache_path is not None:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tee = tempfile.NamedTemporaryFile(
+                dir=cache_path.parent, prefix=f"{cache_path.name}.", suffix=".partial", delete=False
+            )
+            tmp_path = Path(tee.name)
+        except OSError as exc:
+            logger.warning("ZIP bundle cache disabled for %s: %s", cache_path, exc)
+
+    sink = _ChunkSink(tee)
+    completed = False
+    try:
+        with zipfile.ZipFile(sink, "w", allowZip64=True) as archive:
+            for file_path, arcname in entries:
+                info = zipfile.ZipInfo.from_file(file_path, arcname)
+                info.compress_type = compression_for(file_path)
+                with file_path.open("rb") as source, archive.open(info, "w", force_zip64=True) as dest:
+                    for block in iter(lambda: source.read(READ_BLOCK_SIZE), b""):
+                        dest.write(block)
+                        yield from sink.drain()
+                yield from sink.drain()
+        yield from sink.drain()
+        completed = True
+    finally:
+        if tee is not None:
+            tee.close()
+            try:
+                if completed:
+                    os.replace(tmp_path, cache_path)
+            except OSError as exc:
+                logger.warning("Could not cache ZIP bundle %s: %s", cache_path, exc)
+            finally:
+                # Client disconnected, a file vanished mid-stream, or the replace failed
+                tmp_path.unlink(missing_ok=True)
+
+
+__all__ = [
+    "compression_for",
+    "stream_zip",
+]
@@ -2212,6 +2212,29 @@ async function triggerChunkApplyFx(jobId, chunkId, button) {
     }
 }
 
+async function pollApplyFxTask(jobId, taskId, button) {
+    const start = Date.now();
+    const timeoutMs = 30 * 60 * 1000;
+    while (Date.now() - start < timeoutMs) {
+        const response = await fetch(`/api/jobs/${jobId}/review/fx-tasks/${taskId}`);
+        const data = await response.json();
+        if (!data.success) {
+            throw new Error(data.error || 'Failed to fetch FX task status');
+        }
+        if (data.status === 'completed') {
+            return data.result || {};
+        }
+        if (data.status === 'failed') {
+            throw new Error(data.error || 'Batch FX task failed');
+        }
+        if (button && data.total_chunks) {
+            button.textContent = `Applying ${data.processed_chunks || 0}/${data.total_chunks}...`;
+        }
+        await new Promise(resolve => setTimeout(resolve, 1000));
+    }
+    throw new Error('Timed out waiting for the FX task.');
+}
+
 async function triggerBulkSpeakerApplyFx(jobId, speaker, chunks, button) {
     const card = button.closest('.bulk-speaker-card');
     if (!card) return;
@@ -2248,10 +2271,13 @@ async function triggerBulkSpeakerApplyFx(jobId, speaker, chunks, button) {
             body: JSON.stringify({ chunks: chunksFx }),
         });
         
-        const data = await response.json();
+        let data = await response.json();
         if (!data.success) {
             throw new Error(data.error || 'Failed to apply effects');
         }
+        if (data.task_id) {
+            data = await pollApplyFxTask(jobId, data.task_id, button);
+        }
         
         // Show success feedback
         button.textContent = `Applied to ${data.processed}!`;
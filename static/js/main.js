@@ -1142,8 +1142,45 @@ async function processWithGemini(buttonEl) {
         'info'
     );
 
+    const geminiConcurrency = Math.max(1, parseInt(runtimeSettings?.gemini_max_concurrency, 10) || 1);
+
     try {
-        if (splitByChapter) {
+        if (splitByChapter && geminiConcurrency > 1) {
+            // Server runs chapters in parallel and reconciles speaker tags across them
+            updateGeminiProgress({
+                visible: true,
+                label: `Processing chapters with Gemini (${geminiConcurrency} at a time)…`,
+                count: '',
+                fill: 30
+            });
+
+            const response = await fetch('/api/gemini/process', {
+                method: 'POST',
+                headers: {
+                    'Content-Type': 'application/json'
+                },
+                body: JSON.stringify({
+                    text,
+                    prefer_chapters: true,
+                    concurrency: geminiConcurrency,
+                    prompt_override: promptOverride || undefined
+                })
+            });
+
+            const data = await response.json();
+            if (!data.success) {
+                throw new Error(data.error || 'Gemini processing failed');
+            }
+
+            updateGeminiProgress({
+                visible: true,
+                label: 'Combining Gemini output…',
+                count: `${data.section_count} / ${data.section_count}`,
+                fill: 100
+            });
+
+            inputEl.value = (data.result_text || '').trim();
+        } else if (splitByChapter) {
             updateGeminiProgress({
                 visible: true,
                 label: 'Building chapter list for Gemini…',
@@ -1202,15 +1239,20 @@ async function processWithGemini(buttonEl) {
                     payload.known_speakers = Array.from(knownSpeakers);
                 }
 
-                const sectionResponse = await fetch('/api/gemini/process-section', {
-                    method: 'POST',
-                    headers: {
-                        'Content-Type': 'application/json'
-                    },
-                    body: JSON.stringify(payload)
+                let paragraphCount = 0;
+                const sectionData = await streamGeminiSection(payload, paragraph => {
+                    paragraphCount += 1;
+                    (paragraph.speakers || []).forEach(speaker => {
+                        if (typeof speaker === 'string' && speaker.trim()) {
+                            knownSpeakers.add(speaker.trim().toLowerCase());
+                        }
+                    });
+                    updateGeminiProgress({
+                        visible: true,
+                        label: `Processing chapter ${currentIndex} of ${sections.length}… (${paragraphCount} paragraph${paragraphCount === 1 ? '' : 's'} received)`,
+                        count: `${currentIndex} / ${sections.length}`
+                    });
                 });
-
-                const sectionData = await sectionResponse.json();
                 if (!sectionData.success) {
                     throw new Error(sectionData.error || `Gemini failed on chapter ${currentIndex}`);
                 }
@@ -1282,6 +1324,54 @@ async function processWithGemini(buttonEl) {
     }
 }
 
+async function streamGeminiSection(payload, onParagraph) {
+    // Reads the SSE stream from the section endpoint; resolves with the final result
+    const response = await fetch('/api/gemini/process-section/stream', {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json'
+        },
+        body: JSON.stringify(payload)
+    });
+    if (!response.ok || !response.body) {
+        const errorData = await response.json().catch(() => ({}));
+        return { success: false, error: errorData.error || `Gemini request failed (${response.status})` };
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = { success: false, error: 'Gemini stream ended unexpectedly' };
+
+    while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        let boundary = buffer.indexOf('\n\n');
+        while (boundary >= 0) {
+            const rawEvent = buffer.slice(0, boundary);
+            buffer = buffer.slice(boundary + 2);
+            boundary = buffer.indexOf('\n\n');
+
+            let eventName = 'message';
+            const dataLines = [];
+            rawEvent.split('\n').forEach(line => {
+                if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+            });
+            if (!dataLines.length) continue;
+            const data = JSON.parse(dataLines.join('\n'));
+
+            if (eventName === 'paragraph' && typeof onParagraph === 'function') {
+                onParagraph(data);
+            } else if (eventName === 'done' || eventName === 'error') {
+                result = data;
+            }
+        }
+    }
+    return result;
+}
+
 function updateGeminiProgress({ visible, label, count, fill }) {
     const container = document.getElementById('gemini-progress');
     const textEl = document.getElementById('gemini-progress-text');
@@ -1869,6 +1959,10 @@ async function generateAudio() {
         voice_assignments: voiceAssignments,
         review_mode: true  // Always enabled - chunk review happens in library
     };
+    const chapterOutline = splitByChapter ? getDocumentChapterOutline(text) : null;
+    if (chapterOutline) {
+        payload.chapters = chapterOutline;
+    }
     if (selectedEngine) {
         payload.tts_engine = selectedEngine;
         const overrides = collectEngineOverrides(selectedEngine);
@@ -2433,6 +2527,17 @@ function initDocumentUpload() {
     });
 }
 
+// Chapter offsets reported by document extraction, valid only while the textarea
+// still holds exactly the extracted text.
+let documentChapterOutline = null;
+
+function getDocumentChapterOutline(text) {
+    if (!documentChapterOutline || documentChapterOutline.text !== text) {
+        return null;
+    }
+    return documentChapterOutline.chapters.length ? documentChapterOutline.chapters : null;
+}
+
 async function handleMultipleDocuments(files, statusEl, textarea) {
     const supportedExtensions = ['.txt', '.pdf', '.doc', '.docx', '.rtf', '.epub', '.odt', '.md', '.html', '.htm'];
     
@@ -2465,11 +2570,29 @@ async function handleMultipleDocuments(files, statusEl, textarea) {
             if (result.success) {
                 // Always append
                 const existingText = textarea.value.trim();
+                // Offsets are counted in code points to match the server's string indexing
+                const offset = existingText ? Array.from(existingText).length + 2 : 0;
+                const outlineStillValid = !existingText
+                    || (documentChapterOutline && documentChapterOutline.text === textarea.value);
                 if (existingText) {
                     textarea.value = existingText + '\n\n' + result.text;
                 } else {
                     textarea.value = result.text;
                 }
+                const chapters = Array.isArray(result.chapters) ? result.chapters : [];
+                if (outlineStillValid && chapters.length) {
+                    const previous = existingText ? documentChapterOutline.chapters : [];
+                    documentChapterOutline = {
+                        text: textarea.value,
+                        chapters: previous.concat(chapters.map(chapter => ({
+                            title: chapter.title,
+                            start: chapter.start + offset,
+                            end: chapter.end + offset
+                        })))
+                    };
+                } else {
+                    documentChapterOutline = null;
+                }
                 totalWords += result.word_count;
                 successCount++;
             } else {
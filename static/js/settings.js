@@ -500,12 +500,25 @@ function applySettings(settings) {
 
     // Parallel processing
     setElementValue('parallel-chunks', settings.parallel_chunks ?? 3, 3);
+    setElementValue('replicate-max-parallel-chunks', settings.replicate_max_parallel_chunks ?? 10, 10);
 
     // VRAM cleanup setting
     const cleanupVramCheckbox = document.getElementById('cleanup-vram-after-job');
     if (cleanupVramCheckbox) {
         cleanupVramCheckbox.checked = settings.cleanup_vram_after_job ?? false;
     }
+    const groupBySpeakerCheckbox = document.getElementById('group-chunks-by-speaker');
+    if (groupBySpeakerCheckbox) {
+        groupBySpeakerCheckbox.checked = settings.group_chunks_by_speaker ?? false;
+    }
+    const g2pDiskCacheCheckbox = document.getElementById('kokoro-g2p-disk-cache');
+    if (g2pDiskCacheCheckbox) {
+        g2pDiskCacheCheckbox.checked = settings.kokoro_g2p_disk_cache ?? false;
+    }
+    const zipBundleCacheCheckbox = document.getElementById('cache-zip-bundles');
+    if (zipBundleCacheCheckbox) {
+        zipBundleCacheCheckbox.checked = settings.cache_zip_bundles ?? false;
+    }
 
     // Gemini settings
     setElementValue('gemini-api-key', settings.gemini_api_key || '');
@@ -523,6 +536,8 @@ function applySettings(settings) {
         geminiModelSelect.value = savedGeminiModel;
     }
     setElementValue('gemini-prompt', settings.gemini_prompt || '');
+    setElementValue('gemini-max-concurrency', settings.gemini_max_concurrency ?? 4, 4);
+    setElementValue('gemini-section-token-budget', settings.gemini_section_token_budget ?? 6000, 6000);
     setGeminiPresetState(settings.gemini_prompt_presets || []);
 
     // Engine + Chatterbox settings
@@ -638,6 +653,10 @@ function applySettings(settings) {
     if (qwen3Instruct) {
         qwen3Instruct.value = settings.qwen3_custom_default_instruct || '';
     }
+    const qwen3BatchSize = document.getElementById('qwen3-custom-batch-size');
+    if (qwen3BatchSize) {
+        qwen3BatchSize.value = settings.qwen3_custom_batch_size ?? 4;
+    }
 
     // Qwen3 Voice Clone settings
     const qwen3CloneModel = document.getElementById('qwen3-clone-model-id');
@@ -668,6 +687,10 @@ function applySettings(settings) {
     if (qwen3ClonePromptText) {
         qwen3ClonePromptText.value = settings.qwen3_clone_default_prompt_text || '';
     }
+    const qwen3CloneBatchSize = document.getElementById('qwen3-clone-batch-size');
+    if (qwen3CloneBatchSize) {
+        qwen3CloneBatchSize.value = settings.qwen3_clone_batch_size ?? 4;
+    }
 
     // Chatterbox Replicate settings (uses shared replicate_api_key)
     const turboModelInput = document.getElementById('chatterbox-turbo-replicate-model');
@@ -721,10 +744,16 @@ async function saveSettings() {
         intro_silence_ms: parseInt(document.getElementById('intro-silence').value, 10) || 0,
         inter_chunk_silence_ms: parseInt(document.getElementById('inter-silence').value, 10) || 0,
         parallel_chunks: Math.min(25, Math.max(1, parseInt(document.getElementById('parallel-chunks')?.value, 10) || 3)),
+        replicate_max_parallel_chunks: Math.min(25, Math.max(1, parseInt(document.getElementById('replicate-max-parallel-chunks')?.value, 10) || 10)),
         cleanup_vram_after_job: document.getElementById('cleanup-vram-after-job')?.checked ?? false,
+        group_chunks_by_speaker: document.getElementById('group-chunks-by-speaker')?.checked ?? false,
+        kokoro_g2p_disk_cache: document.getElementById('kokoro-g2p-disk-cache')?.checked ?? false,
+        cache_zip_bundles: document.getElementById('cache-zip-bundles')?.checked ?? false,
         gemini_api_key: document.getElementById('gemini-api-key').value,
         gemini_model: document.getElementById('gemini-model').value,
         gemini_prompt: document.getElementById('gemini-prompt').value,
+        gemini_max_concurrency: Math.min(16, Math.max(1, parseInt(document.getElementById('gemini-max-concurrency')?.value, 10) || 4)),
+        gemini_section_token_budget: Math.min(200000, Math.max(500, parseInt(document.getElementById('gemini-section-token-budget')?.value, 10) || 6000)),
         gemini_prompt_presets: geminiPresetState.list.map(preset => ({ ...preset })),
         tts_engine: document.getElementById('settings-tts-engine').value,
         chatterbox_turbo_local_device: document.getElementById('chatterbox-turbo-local-device').value,
@@ -752,6 +781,7 @@ async function saveSettings() {
         qwen3_custom_attn_implementation: document.getElementById('qwen3-custom-attn').value,
         qwen3_custom_default_language: document.getElementById('qwen3-custom-language').value,
         qwen3_custom_default_instruct: document.getElementById('qwen3-custom-instruct').value,
+        qwen3_custom_batch_size: parseInt(document.getElementById('qwen3-custom-batch-size')?.value, 10) || 4,
         qwen3_clone_model_id: document.getElementById('qwen3-clone-model-id').value,
         qwen3_clone_device: document.getElementById('qwen3-clone-device').value,
         qwen3_clone_dtype: document.getElementById('qwen3-clone-dtype').value,
@@ -759,6 +789,7 @@ async function saveSettings() {
         qwen3_clone_default_language: document.getElementById('qwen3-clone-language').value,
         qwen3_clone_default_prompt: document.getElementById('qwen3-clone-prompt').value,
         qwen3_clone_default_prompt_text: document.getElementById('qwen3-clone-prompt-text').value,
+        qwen3_clone_batch_size: parseInt(document.getElementById('qwen3-clone-batch-size')?.value, 10) || 4,
         chatterbox_turbo_replicate_model: document.getElementById('chatterbox-turbo-replicate-model').value,
         chatterbox_turbo_replicate_voice: document.getElementById('chatterbox-turbo-replicate-voice').value,
         chatterbox_turbo_replicate_temperature: parseFloat(document.getElementById('chatterbox-turbo-replicate-temperature').value) || 0.8,
@@ -826,10 +857,16 @@ async function resetSettings() {
         intro_silence_ms: 0,
         inter_chunk_silence_ms: 0,
         parallel_chunks: 3,
+        replicate_max_parallel_chunks: 10,
         cleanup_vram_after_job: false,
+        group_chunks_by_speaker: false,
+        kokoro_g2p_disk_cache: false,
+        cache_zip_bundles: false,
         gemini_api_key: '',
         gemini_model: 'gemini-1.5-flash',
         gemini_prompt: '',
+        gemini_max_concurrency: 4,
+        gemini_section_token_budget: 6000,
         gemini_prompt_presets: [],
         tts_engine: 'kokoro',
         voxcpm_local_model_id: 'openbmb/VoxCPM1.5',
@@ -846,13 +883,15 @@ async function resetSettings() {
         qwen3_custom_attn_implementation: 'flash_attention_2',
         qwen3_custom_default_language: 'Auto',
         qwen3_custom_default_instruct: '',
+        qwen3_custom_batch_size: 4,
         qwen3_clone_model_id: 'Qwen/Qwen3-TTS-12Hz-1.7B-Base',
         qwen3_clone_device: 'auto',
         qwen3_clone_dtype: 'bfloat16',
         qwen3_clone_attn_implementation: 'flash_attention_2',
         qwen3_clone_default_language: 'Auto',
         qwen3_clone_default_prompt: '',
-        qwen3_clone_default_prompt_text: ''
+        qwen3_clone_default_prompt_text: '',
+        qwen3_clone_batch_size: 4
     };
     
     try {
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+from src.audio_effects import OVERLAP_ADD_BLOCK, ToneFilter, get_tone_filter
+
+
+def _direct(tone_filter: ToneFilter, audio: np.ndarray) -> np.ndarray:
+    full = np.convolve(audio.astype(np.float64), tone_filter.kernel)
+    return full[tone_filter.delay:tone_filter.delay + audio.shape[0]]
+
+
+@pytest.mark.parametrize("profile", ["warm", "bright"])
+@pytest.mark.parametrize("length", [1, 100, 257, OVERLAP_ADD_BLOCK - 1, OVERLAP_ADD_BLOCK * 3 + 17])
+def test_overlap_add_matches_direct_convolution(profile, length):
+    rng = np.random.default_rng(length)
+    audio = rng.uniform(-1.0, 1.0, length).astype(np.float32)
+    tone_filter = ToneFilter(profile, 24000)
+
+    result = tone_filter.apply(audio)
+
+    assert result.shape == audio.shape
+    np.testing.assert_allclose(result, _direct(tone_filter, audio), atol=1e-4)
+
+
+def test_many_groups_match_direct_convolution():
+    rng = np.random.default_rng(0)
+    audio = rng.uniform(-1.0, 1.0, OVERLAP_ADD_BLOCK * 40 + 5).astype(np.float32)
+    tone_filter = ToneFilter("warm", 44100)
+
+    np.testing.assert_allclose(tone_filter.apply(audio), _direct(tone_filter, audio), atol=1e-4)
+
+
+def test_tilt_direction():
+    sample_rate = 24000
+    t = np.arange(sample_rate, dtype=np.float32) / sample_rate
+    high = np.sin(2 * np.pi * 9000 * t).astype(np.float32)
+    middle = slice(1000, -1000)
+
+    warm = ToneFilter("warm", sample_rate).apply(high)
+    bright = ToneFilter("bright", sample_rate).apply(high)
+
+    assert np.abs(warm[middle]).max() < np.abs(high[middle]).max()
+    assert np.abs(bright[middle]).max() > np.abs(high[middle]).max()
+
+
+def test_empty_input_and_odd_taps():
+    tone_filter = ToneFilter("warm", 22050, taps=256)
+    assert tone_filter.taps == 257
+    assert tone_filter.apply(np.zeros(0, dtype=np.float32)).shape == (0,)
+
+
+def test_filters_are_shared_per_profile_and_rate():
+    assert get_tone_filter("warm", 24000) is get_tone_filter("warm", 24000)
+    assert get_tone_filter("warm", 24000) is not get_tone_filter("bright", 24000)
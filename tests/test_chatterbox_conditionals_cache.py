@@ -0,0 +1,32 @@
+import os
+import time
+
+from src.engines import chatterbox_turbo_local_engine as engine_module
+from src.engines.chatterbox_turbo_local_engine import ChatterboxTurboLocalEngine
+
+
+def _write(path, size, age):
+    path.write_bytes(b"\0" * size)
+    stamp = time.time() - age
+    os.utime(path, (stamp, stamp))
+
+
+def test_prune_drops_stale_then_oldest_over_cap(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, "CONDITIONALS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(engine_module, "CONDITIONALS_CACHE_MAX_BYTES", 250)
+    monkeypatch.setattr(engine_module, "CONDITIONALS_CACHE_MAX_AGE", 1000)
+    _write(tmp_path / "stale.pt", 10, 5000)
+    _write(tmp_path / "old.pt", 100, 300)
+    _write(tmp_path / "mid.pt", 100, 200)
+    _write(tmp_path / "new.pt", 100, 100)
+    (tmp_path / "other.tmp").write_bytes(b"\0" * 1000)
+
+    ChatterboxTurboLocalEngine._prune_persisted_conditionals()
+
+    assert sorted(p.name for p in tmp_path.glob("*.pt")) == ["mid.pt", "new.pt"]
+    assert (tmp_path / "other.tmp").exists()
+
+
+def test_prune_missing_directory_is_noop(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, "CONDITIONALS_CACHE_DIR", tmp_path / "missing")
+    ChatterboxTurboLocalEngine._prune_persisted_conditionals()
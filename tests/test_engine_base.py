@@ -0,0 +1,111 @@
+import pytest
+
+from src.engines.base import (
+    AdaptiveBatcher,
+    OrderedChunkEmitter,
+    is_out_of_memory_error,
+    schedule_chunks,
+)
+
+
+class OutOfMemoryError(RuntimeError):
+    pass
+
+
+def _items(*voices):
+    return [{"index": index, "voice": voice} for index, voice in enumerate(voices)]
+
+
+def _voice(item):
+    return item["voice"]
+
+
+def test_batches_consecutive_items_with_same_key():
+    batches = []
+
+    def run_batch(batch):
+        batches.append([item["index"] for item in batch])
+        return [item["index"] * 10 for item in batch]
+
+    results = list(AdaptiveBatcher(2).run(_items("a", "a", "a", "b", "a"), _voice, run_batch))
+
+    assert batches == [[0, 1], [2], [3], [4]]
+    assert [(item["index"], output) for item, output in results] == [(i, i * 10) for i in range(5)]
+
+
+def test_out_of_memory_halves_batch_and_retries_same_items():
+    calls = []
+    released = []
+
+    def run_batch(batch):
+        calls.append(len(batch))
+        if len(batch) > 2:
+            raise OutOfMemoryError("CUDA out of memory")
+        return [None] * len(batch)
+
+    batcher = AdaptiveBatcher(8, on_oom=lambda: released.append(True))
+    results = list(batcher.run(_items(*"aaaaaa"), _voice, run_batch))
+
+    assert calls == [6, 3] + [1] * 6
+    assert len(results) == 6
+    assert batcher.batch_size == 1
+    assert released == [True, True]
+
+
+def test_reduced_batch_size_sticks_between_runs():
+    def run_batch(batch):
+        if len(batch) > 2:
+            raise RuntimeError("out of memory")
+        return [None] * len(batch)
+
+    batcher = AdaptiveBatcher(4)
+    list(batcher.run(_items(*"aaaa"), _voice, run_batch))
+    assert batcher.batch_size == 2
+
+    sizes = []
+    list(batcher.run(_items(*"aaaa"), _voice, lambda batch: sizes.append(len(batch)) or [None] * len(batch)))
+    assert sizes == [2, 2]
+
+
+def test_other_errors_and_single_item_oom_propagate():
+    with pytest.raises(ValueError):
+        list(AdaptiveBatcher(4).run(_items("a", "a"), _voice, lambda batch: (_ for _ in ()).throw(ValueError("bad"))))
+
+    def always_oom(batch):
+        raise OutOfMemoryError("out of memory")
+
+    with pytest.raises(OutOfMemoryError):
+        list(AdaptiveBatcher(1).run(_items("a"), _voice, always_oom))
+
+
+def test_output_count_mismatch_is_an_error():
+    with pytest.raises(RuntimeError, match="outputs"):
+        list(AdaptiveBatcher(2).run(_items("a", "a"), _voice, lambda batch: [None]))
+
+
+def test_is_out_of_memory_error():
+    assert is_out_of_memory_error(OutOfMemoryError("x"))
+    assert is_out_of_memory_error(RuntimeError("CUDA error: out of memory"))
+    assert is_out_of_memory_error(MemoryError("Out Of Memory"))
+    assert not is_out_of_memory_error(RuntimeError("shape mismatch"))
+    assert not is_out_of_memory_error(ValueError("out of memory"))
+
+
+def test_schedule_chunks_groups_by_first_appearance():
+    items = _items("b", "a", "b", "c", "a")
+    assert schedule_chunks(items, _voice) == items
+    grouped = schedule_chunks(items, _voice, group_by_speaker=True)
+    assert [item["index"] for item in grouped] == [0, 2, 1, 4, 3]
+
+
+def test_ordered_emitter_releases_in_story_order():
+    emitted = []
+    emitter = OrderedChunkEmitter(lambda index, meta, path: emitted.append(path))
+
+    emitter.complete(2, 2, {}, "c.wav")
+    emitter.complete(0, 0, {}, "a.wav")
+    assert emitted == ["a.wav"]
+    emitter.complete(1, 1, {}, "b.wav")
+
+    assert emitted == ["a.wav", "b.wav", "c.wav"]
+    assert emitter.files == emitted
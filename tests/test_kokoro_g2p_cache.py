@@ -0,0 +1,78 @@
+from dataclasses import dataclass
+
+from src.engines.kokoro_engine import CachedG2P, G2PCache, join_g2p_results, split_g2p_sentences
+
+
+@dataclass
+class Token:
+    text: str
+    whitespace: str
+
+
+def fake_g2p(calls):
+    def g2p(text):
+        calls.append(text)
+        words = text.split()
+        tokens = [Token(word, " " if index < len(words) - 1 else "") for index, word in enumerate(words)]
+        return " ".join(word.lower() for word in words), tokens
+
+    return g2p
+
+
+def test_split_normalizes_whitespace_and_sentences():
+    assert split_g2p_sentences("  One  two.\nThree?  \"Four.\" Five") == ["One two.", "Three?", "\"Four.\"", "Five"]
+    assert split_g2p_sentences("   ") == []
+
+
+def test_repeated_sentences_hit_the_cache():
+    calls = []
+    cache = G2PCache()
+    g2p = CachedG2P(fake_g2p(calls), "a", cache)
+
+    g2p("The door opened. She waited.")
+    g2p("She waited. The door opened.")
+    g2p("The  door\nopened. Nobody came.")
+
+    assert calls == ["The door opened.", "She waited.", "Nobody came."]
+    stats = cache.snapshot()
+    assert stats["hits"] == 3 and stats["misses"] == 3
+    assert stats["hit_rate"] == 0.5
+
+
+def test_joined_result_matches_one_call_on_the_whole_text():
+    calls = []
+    text = "The door opened. She waited."
+    phonemes, tokens = CachedG2P(fake_g2p(calls), "a", G2PCache())(text)
+    whole_phonemes, whole_tokens = fake_g2p([])(text)
+
+    assert phonemes == whole_phonemes
+    assert tokens == whole_tokens
+
+
+def test_cached_tokens_are_not_mutated_by_joining():
+    cache = G2PCache()
+    g2p = CachedG2P(fake_g2p([]), "a", cache)
+    g2p("Alone. Again.")
+
+    _, tokens = g2p("Alone.")
+    assert tokens[-1].whitespace == ""
+
+
+def test_join_handles_plain_strings_and_missing_tokens():
+    assert join_g2p_results(["a", "", "b"]) == "a b"
+    assert join_g2p_results([("a", None), ("b", None)]) == ("a b", None)
+    assert join_g2p_results([("a", None), ("b", [])]) is None
+    assert join_g2p_results([object(), object()]) is None
+
+
+def test_unjoinable_results_fall_back_to_the_whole_text():
+    calls = []
+
+    def g2p(text):
+        calls.append(text)
+        return {"text": text}
+
+    result = CachedG2P(g2p, "a", G2PCache())("One. Two.")
+
+    assert result == {"text": "One. Two."}
+    assert calls[-1] == "One. Two."
@@ -0,0 +1,104 @@
+import itertools
+
+import pytest
+
+from src import llm_cache
+from src.llm_cache import LLMResponseCache, prompt_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # Strictly increasing timestamps so LRU order never depends on timer resolution
+    ticks = itertools.count(1000)
+    monkeypatch.setattr(llm_cache.time, "time", lambda: float(next(ticks)))
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return LLMResponseCache(tmp_path / "responses.sqlite3")
+
+
+def test_prompt_key_separates_provider_model_and_prompt():
+    assert prompt_key("gemini", "flash", "hi") == prompt_key("gemini", "flash", "hi")
+    assert prompt_key("gemini", "flash", "hi") != prompt_key("openai", "flash", "hi")
+    # Field boundaries are part of the key
+    assert prompt_key("ab", "c", "p") != prompt_key("a", "bc", "p")
+
+
+def test_get_or_generate_calls_the_model_once(cache):
+    calls = []
+
+    def generate(prompt):
+        calls.append(prompt)
+        return f"tagged {prompt}"
+
+    assert cache.get_or_generate("gemini", "flash", "one", generate) == "tagged one"
+    assert cache.get_or_generate("gemini", "flash", "one", generate) == "tagged one"
+    assert cache.get_or_generate("gemini", "pro", "one", generate) == "tagged one"
+
+    assert calls == ["one", "one"]
+    assert cache.snapshot()["hits"] == 1
+
+
+def test_refresh_skips_lookup_but_stores(cache):
+    responses = iter(["old", "new"])
+    generate = lambda prompt: next(responses)
+
+    cache.get_or_generate("gemini", "flash", "p", generate)
+    assert cache.get_or_generate("gemini", "flash", "p", generate, refresh=True) == "new"
+    assert cache.get(prompt_key("gemini", "flash", "p")) == "new"
+
+
+def test_get_or_stream_passes_deltas_through_then_replays(cache):
+    stream = lambda prompt: iter(["[a]Hi", " there[/a]", "\n"])
+
+    assert list(cache.get_or_stream("openai", "gpt", "p", stream)) == ["[a]Hi", " there[/a]", "\n"]
+    assert list(cache.get_or_stream("openai", "gpt", "p", stream)) == ["[a]Hi there[/a]"]
+
+
+def test_abandoned_stream_is_not_cached(cache):
+    stream = lambda prompt: iter(["partial", " rest"])
+
+    deltas = cache.get_or_stream("openai", "gpt", "p", stream)
+    assert next(deltas) == "partial"
+    deltas.close()
+
+    assert cache.get(prompt_key("openai", "gpt", "p")) is None
+
+
+def test_empty_responses_are_not_stored(cache):
+    cache.get_or_generate("gemini", "flash", "p", lambda prompt: "")
+
+    assert cache.snapshot()["entries"] == 0
+
+
+def test_evicts_least_recently_used(tmp_path, clock):
+    cache = LLMResponseCache(tmp_path / "responses.sqlite3", max_entries=2)
+    keys = [prompt_key("p", "m", str(index)) for index in range(3)]
+    cache.put(keys[0], "p", "m", "zero")
+    cache.put(keys[1], "p", "m", "one")
+    cache.get(keys[0])
+    cache.put(keys[2], "p", "m", "two")
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) == "zero"
+    assert cache.get(keys[2]) == "two"
+    assert cache.snapshot()["evictions"] == 1
+
+
+def test_size_cap_evicts_until_under_budget(tmp_path, clock):
+    cache = LLMResponseCache(tmp_path / "responses.sqlite3", max_bytes=10)
+    cache.put(prompt_key("p", "m", "a"), "p", "m", "x" * 6)
+    cache.put(prompt_key("p", "m", "b"), "p", "m", "y" * 6)
+
+    snapshot = cache.snapshot()
+    assert snapshot["entries"] == 1
+    assert snapshot["bytes"] == 6
+    assert cache.get(prompt_key("p", "m", "b")) == "y" * 6
+
+
+def test_entries_survive_reopening(tmp_path, clock):
+    path = tmp_path / "responses.sqlite3"
+    LLMResponseCache(path).put(prompt_key("p", "m", "a"), "p", "m", "kept")
+
+    assert LLMResponseCache(path).get(prompt_key("p", "m", "a")) == "kept"
@@ -0,0 +1,47 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.llm_clients import clear_clients, get_client, with_legacy_gemini_key
+
+
+class FakeLegacySDK:
+    """Mimics google.generativeai: one global key read when a request is sent."""
+
+    def __init__(self):
+        self.api_key = None
+
+    def configure(self, api_key):
+        self.api_key = api_key
+
+    def request(self):
+        key = self.api_key
+        time.sleep(0.001)  # let another thread reconfigure if it can
+        return key
+
+
+def test_get_client_builds_once_per_key_and_model():
+    clear_clients()
+    built = []
+
+    def factory():
+        built.append(object())
+        return built[-1]
+
+    first = get_client("gemini", "key-a", factory)
+    assert get_client("gemini", "key-a", factory) is first
+    assert get_client("gemini", "key-b", factory) is not first
+    assert get_client("gemini", "key-a", factory, model="flash") is not first
+    assert len(built) == 3
+
+    clear_clients()
+    assert get_client("gemini", "key-a", factory) is not first
+
+
+def test_legacy_requests_run_under_their_own_key():
+    sdk = FakeLegacySDK()
+    keys = [f"key-{index % 3}" for index in range(60)]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        used = list(pool.map(lambda key: with_legacy_gemini_key(sdk, key, sdk.request), keys))
+
+    assert used == keys
@@ -0,0 +1,46 @@
+from dataclasses import dataclass
+from typing import Optional
+
+import pytest
+import torch
+
+from src.engines import qwen3_voice_clone_engine as engine_module
+from src.engines.qwen3_voice_clone_engine import _voice_prompt_from_state, _voice_prompt_to_state
+
+
+@dataclass
+class PromptItem:
+    ref_spk_embedding: torch.Tensor
+    ref_code: Optional[torch.Tensor]
+    x_vector_only_mode: bool
+    ref_text: Optional[str]
+
+
+def _prompt():
+    return [PromptItem(torch.arange(4.0), None, True, "hello")]
+
+
+def test_state_round_trips_through_weights_only_load(tmp_path, monkeypatch):
+    monkeypatch.setattr(engine_module, "VOICE_PROMPT_MODULE_PREFIX", __name__.split(".")[0])
+    path = tmp_path / "prompt.pt"
+    torch.save(_voice_prompt_to_state(_prompt()), path)
+
+    restored = _voice_prompt_from_state(torch.load(path, weights_only=True))
+
+    assert isinstance(restored, list) and isinstance(restored[0], PromptItem)
+    assert torch.equal(restored[0].ref_spk_embedding, torch.arange(4.0))
+    assert restored[0].ref_code is None
+    assert restored[0].x_vector_only_mode is True
+    assert restored[0].ref_text == "hello"
+
+
+def test_rebuild_refuses_types_outside_qwen_tts():
+    state = _voice_prompt_to_state(_prompt())
+    with pytest.raises(ValueError):
+        _voice_prompt_from_state(state)
+
+
+def test_unflattenable_prompts_are_not_persisted():
+    assert _voice_prompt_to_state({"ref_code": torch.zeros(1)}) is None
+    assert _voice_prompt_to_state([]) is None
+    assert _voice_prompt_to_state([PromptItem(torch.zeros(1), None, False, object())]) is None
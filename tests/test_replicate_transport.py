@@ -0,0 +1,247 @@
+import asyncio
+import os
+import threading
+import time
+
+import httpx
+import pytest
+
+from scripts.fake_replicate_server import FakeReplicate, serve
+from src import replicate_transport
+from src.replicate_transport import (
+    AdaptiveConcurrency,
+    ErrorBudget,
+    ErrorBudgetExceeded,
+    OutputCheckpoint,
+    PredictionRequest,
+    ReplicatePredictionError,
+    ReplicateTransport,
+    _is_retryable,
+    backoff_delay,
+)
+
+
+def _status_error(status):
+    request = httpx.Request("POST", "http://test/v1/predictions")
+    return httpx.HTTPStatusError("boom", request=request, response=httpx.Response(status, request=request))
+
+
+# --------------------------------------------------------------------------- #
+# Pure logic
+
+
+def test_concurrency_grows_to_ceiling_after_healthy_windows():
+    async def scenario():
+        slots = AdaptiveConcurrency(1, maximum=3)
+        for _ in range(10):
+            await slots.record_success(1.0)
+        return slots.limit
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_concurrency_never_grows_without_headroom_or_on_slow_latency():
+    async def scenario():
+        fixed = AdaptiveConcurrency(2)
+        slow = AdaptiveConcurrency(2, maximum=4)
+        await slow.record_success(1.0)
+        for _ in range(10):
+            await fixed.record_success(1.0)
+            await slow.record_success(5.0)
+        return fixed.limit, slow.limit
+
+    assert asyncio.run(scenario()) == (2, 2)
+
+
+def test_concurrency_halves_on_backoff_with_cooldown():
+    slots = AdaptiveConcurrency(8, cooldown=60.0)
+    slots.record_backoff()
+    slots.record_backoff()
+    assert slots.limit == 4
+
+    slots._last_decrease = time.monotonic() - 61.0
+    slots.record_backoff()
+    assert slots.limit == 2
+
+
+def test_error_budget_limits_attempts_and_batch_failures():
+    budget = ErrorBudget(10, max_attempts=3)
+    budget.consume(1, RuntimeError("x"))
+    with pytest.raises(ErrorBudgetExceeded, match="3 attempts"):
+        budget.consume(3, RuntimeError("x"))
+
+    batch = ErrorBudget(10, max_attempts=100)
+    for _ in range(batch.max_failures):
+        batch.consume(1, RuntimeError("x"))
+    with pytest.raises(ErrorBudgetExceeded, match="budget"):
+        batch.consume(1, RuntimeError("x"))
+
+
+def test_only_transient_errors_are_retryable():
+    assert _is_retryable(_status_error(429))
+    assert _is_retryable(_status_error(503))
+    assert _is_retryable(httpx.ConnectError("refused"))
+    assert not _is_retryable(_status_error(422))
+    assert not _is_retryable(ReplicatePredictionError("failed"))
+    assert _is_retryable(ReplicatePredictionError("flaky", retryable=True))
+
+
+def test_backoff_respects_retry_after_and_cap():
+    for attempt in range(1, 12):
+        assert 0 <= backoff_delay(attempt) <= replicate_transport.BACKOFF_MAX_DELAY
+    assert backoff_delay(1, retry_after=7.0) >= 7.0
+
+
+def test_checkpoint_round_trip_discard_and_prune(tmp_path):
+    checkpoint = OutputCheckpoint(tmp_path, max_bytes=10, max_age=100)
+    key = OutputCheckpoint.key("owner/model", {"text": "hi"})
+    assert key == OutputCheckpoint.key("owner/model", {"text": "hi"})
+    assert key != OutputCheckpoint.key("owner/other", {"text": "hi"})
+
+    checkpoint.save(key, memoryview(b"audio"))
+    assert bytes(checkpoint.load(key)) == b"audio"
+    checkpoint.discard([key])
+    assert checkpoint.load(key) is None
+
+    now = time.time()
+    for name, size, age in (("stale", 1, 500), ("old", 6, 50), ("new", 6, 10)):
+        (tmp_path / name).write_bytes(b"x" * size)
+        os.utime(tmp_path / name, (now - age, now - age))
+    checkpoint.prune()
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new"]
+
+
+# --------------------------------------------------------------------------- #
+# Against the fake server
+
+
+@pytest.fixture
+def fake_replicate(monkeypatch):
+    monkeypatch.setattr(replicate_transport, "BACKOFF_BASE_DELAY", 0.01)
+    monkeypatch.setattr(replicate_transport, "POLL_INITIAL_DELAY", 0.01)
+    state = FakeReplicate(latency=0.05, retry_after="0")
+    server = serve(state)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield state, f"http://127.0.0.1:{server.server_port}"
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def _transport(base_url, tmp_path):
+    return ReplicateTransport(
+        "token",
+        "owner/model",
+        base_url=f"{base_url}/v1",
+        checkpoint=OutputCheckpoint(tmp_path / "checkpoints"),
+    )
+
+
+def _requests(count):
+    return [
+        PredictionRequest(index=index, input={"text": f"chunk {index}"}, finalize=bytes, label=str(index))
+        for index in range(count)
+    ]
+
+
+def _run(transport, requests, parallel_workers=2, max_workers=None):
+    finished = {}
+    transport.run_batch(
+        requests, parallel_workers, lambda request, result: finished.__setitem__(request.index, result), max_workers
+    )
+    return finished
+
+
+def test_run_batch_downloads_every_output(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    finished = _run(_transport(base_url, tmp_path), _requests(6))
+
+    assert sorted(finished) == list(range(6))
+    assert all(data.startswith(b"RIFF") for data in finished.values())
+    assert state.outcomes == ["ok"] * 6
+    assert not list((tmp_path / "checkpoints").iterdir())
+
+
+def test_throttling_and_server_errors_are_replayed_and_retried(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    state.scenario = ["429", "503", "500", "ok", "429", "ok", "ok"]
+
+    finished = _run(_transport(base_url, tmp_path), _requests(4))
+
+    assert sorted(finished) == [0, 1, 2, 3]
+    assert state.outcomes.count("ok") == 4
+    assert len(state.outcomes) == 8
+
+
+def test_failed_prediction_is_not_retried(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    state.scenario = ["failed"]
+
+    with pytest.raises(ReplicatePredictionError, match="Injected prediction failure"):
+        _run(_transport(base_url, tmp_path), _requests(1), parallel_workers=1)
+    assert state.outcomes == ["failed"]
+
+
+def test_error_budget_stops_a_batch_that_keeps_failing(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    state.scenario = ["503"] * 50
+    transport = _transport(base_url, tmp_path)
+    transport.max_attempts = 3
+
+    with pytest.raises(ErrorBudgetExceeded):
+        _run(transport, _requests(1), parallel_workers=1)
+    assert state.outcomes == ["503"] * 3
+
+
+def test_restart_resumes_from_checkpointed_outputs(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    transport = _transport(base_url, tmp_path)
+    requests = _requests(5)
+    state.scenario = ["ok", "ok", "failed"]
+
+    first = {}
+    with pytest.raises(ReplicatePredictionError):
+        transport.run_batch(requests, 1, lambda request, result: first.__setitem__(request.index, result))
+    assert len(first) == 2
+    assert len(list((tmp_path / "checkpoints").iterdir())) == 2
+
+    creates_before = len(state.outcomes)
+    finished = _run(transport, requests, parallel_workers=1)
+
+    assert sorted(finished) == list(range(5))
+    assert len(state.outcomes) - creates_before == 3
+    assert not list((tmp_path / "checkpoints").iterdir())
+
+
+def test_concurrency_grows_towards_the_ceiling(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    _run(_transport(base_url, tmp_path), _requests(40), parallel_workers=1, max_workers=4)
+
+    assert 1 < state.max_active_creates <= 4
+
+
+def test_concurrency_without_a_ceiling_stays_at_parallel_workers(fake_replicate, tmp_path):
+    state, base_url = fake_replicate
+    _run(_transport(base_url, tmp_path), _requests(20), parallel_workers=2)
+
+    assert state.max_active_creates <= 2
+
+
+def test_files_api_accepts_replicate_client_uploads(fake_replicate, tmp_path):
+    replicate = pytest.importorskip("replicate")
+    state, base_url = fake_replicate
+    clip = tmp_path / "voice.wav"
+    clip.write_bytes(b"RIFF reference clip")
+
+    client = replicate.Client(api_token="token", base_url=base_url)
+    uploaded = client.files.create(clip)
+
+    assert uploaded.name == "voice.wav" and uploaded.size == clip.stat().st_size
+    assert uploaded.expires_at
+    download = httpx.get(uploaded.urls["get"])
+    assert download.content == clip.read_bytes()
+    assert client.files.get(uploaded.id).id == uploaded.id
+    client.files.delete(uploaded.id)
+    assert httpx.get(uploaded.urls["get"]).status_code == 404
@@ -0,0 +1,150 @@
+import threading
+
+from src.section_pipeline import (
+    DISCOVERY_PROMPT,
+    SectionPipeline,
+    estimate_tokens,
+    pack_paragraphs,
+    pack_sections,
+)
+
+
+class FakeProcessor:
+    """Answers the discovery prompt with ``discovery`` and each section with ``replies[title]``."""
+
+    def __init__(self, discovery, replies):
+        self.discovery = discovery
+        self.replies = replies
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def generate_text(self, prompt):
+        with self._lock:
+            self.prompts.append(prompt)
+        if prompt.startswith(DISCOVERY_PROMPT):
+            if isinstance(self.discovery, Exception):
+                raise self.discovery
+            return self.discovery
+        title = prompt.split("\n", 1)[0]
+        return self.replies[title]
+
+
+def build_prompt(section, speakers):
+    return f"{section['title']}\nSpeakers: {', '.join(speakers)}\n{section['content']}"
+
+
+def sections(*titles):
+    return [{"title": title, "content": f"{title} text", "source": "chapter"} for title in titles]
+
+
+def test_estimate_tokens_counts_ascii_by_four_and_cjk_by_one():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcd" * 10) == 10
+    assert estimate_tokens("abcde") == 2
+    assert estimate_tokens("\u4f60\u597d\u4e16\u754c") == 4
+    assert estimate_tokens("ab\u4f60") == 2
+
+
+def test_pack_paragraphs_respects_budget_and_keeps_text():
+    paragraphs = [f"Paragraph {index} " + "word " * (index % 7 + 3) for index in range(40)]
+    text = "\n\n".join(paragraphs)
+
+    blocks = pack_paragraphs(text, 50)
+
+    assert len(blocks) > 1
+    assert all(estimate_tokens(block) <= 50 for block in blocks)
+    assert "\n\n".join(blocks).split() == text.split()
+
+
+def test_pack_paragraphs_splits_an_oversized_paragraph():
+    sentence_text = " ".join(f"Sentence number {index} is here." for index in range(30))
+    unbroken = "x" * 500
+
+    assert all(estimate_tokens(block) <= 20 for block in pack_paragraphs(sentence_text, 20))
+    blocks = pack_paragraphs(unbroken, 20)
+    assert all(estimate_tokens(block) <= 20 for block in blocks)
+    assert "".join(block.replace("\n\n", "") for block in blocks) == unbroken
+
+
+def test_pack_sections_keeps_small_chapters_and_titles_parts():
+    big = "\n\n".join("word " * 30 for _ in range(6))
+    chapters = [
+        {"title": "One", "content": "Short chapter."},
+        {"title": "Empty", "content": "  "},
+        {"title": "Two", "content": big},
+    ]
+
+    sections = pack_sections(chapters, 80)
+
+    assert sections[0] == {"title": "One", "content": "Short chapter.", "source": "chapter"}
+    parts = sections[1:]
+    assert len(parts) > 1
+    assert [part["title"] for part in parts] == [f"Two (part {i}/{len(parts)})" for i in range(1, len(parts) + 1)]
+    assert all(part["source"] == "chapter" and estimate_tokens(part["content"]) <= 80 for part in parts)
+
+
+def test_pack_sections_chunks_untitled_text():
+    text = "\n\n".join("word " * 30 for _ in range(6))
+
+    sections = pack_sections([{"title": None, "content": text}], 80)
+
+    assert len(sections) > 1
+    assert all(section["title"] is None and section["source"] == "chunk" for section in sections)
+
+
+def test_discovery_parses_tags_and_aliases():
+    processor = FakeProcessor("- John Smith = John, Mr. Smith\n2. Mary\nNarrator\n\n", {})
+    discovered = SectionPipeline(processor, build_prompt).discover_speakers(sections("One"))
+
+    assert discovered == {"john_smith": ["john", "mr_smith"], "mary": []}
+
+
+def test_discovery_failure_is_not_fatal():
+    processor = FakeProcessor(RuntimeError("quota"), {})
+
+    assert SectionPipeline(processor, build_prompt).discover_speakers(sections("One")) == {}
+
+
+def test_alias_map_never_renames_seed_speakers():
+    discovered = {"john_smith": ["john", "mr_smith"], "mary": ["mary_jane"]}
+
+    aliases = SectionPipeline.alias_map(discovered, ["John", "mary_jane"])
+
+    # A seed speaker in the group becomes the target; the discovered tag folds into it
+    assert aliases == {"john_smith": "John", "mr_smith": "John", "mary": "mary_jane"}
+
+
+def test_run_keeps_section_order_and_reconciles_aliases():
+    replies = {
+        "One": "[narrator]Rain.[/narrator]\n\n[john]Hi.[/john]",
+        "Two": "[john_smith]Again.[/john_smith] [emotion]sad[/emotion]",
+        "Three": "[mary]Hello.[/mary]",
+    }
+    processor = FakeProcessor("john_smith = john\nmary", replies)
+    progress = []
+    pipeline = SectionPipeline(processor, build_prompt, max_workers=3)
+
+    result = pipeline.run(sections("One", "Two", "Three"), progress_cb=lambda done, total, _: progress.append(total))
+
+    assert [section["title"] for section in result["sections"]] == ["One", "Two", "Three"]
+    assert [section["index"] for section in result["sections"]] == [1, 2, 3]
+    assert result["aliases"] == {"john": "john_smith"}
+    assert result["sections"][0]["output"] == "[narrator]Rain.[/narrator]\n\n[john_smith]Hi.[/john_smith]"
+    assert result["sections"][1]["output"] == replies["Two"]
+    assert result["speakers"] == ["narrator", "john_smith", "mary"]
+    assert progress == [3, 3, 3]
+    # Sections only hear about target tags, never the aliases folded into them
+    section_prompts = [prompt for prompt in processor.prompts if not prompt.startswith(DISCOVERY_PROMPT)]
+    assert all("Speakers: john_smith, mary\n" in prompt for prompt in section_prompts)
+
+
+def test_run_without_discovery_skips_the_extra_call_and_empty_sections():
+    processor = FakeProcessor("unused", {"One": "[bob]Hi.[/bob]"})
+    work = sections("One") + [{"title": "Blank", "content": "   ", "source": "chapter"}]
+
+    result = SectionPipeline(processor, build_prompt, discover_speakers=False).run(work, seed_speakers=["Bob"])
+
+    assert len(processor.prompts) == 1
+    assert "Speakers: Bob\n" in processor.prompts[0]
+    assert [section["title"] for section in result["sections"]] == ["One"]
+    assert result["aliases"] == {}
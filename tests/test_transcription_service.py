@@ -0,0 +1,73 @@
+import json
+import os
+
+from src.transcription_service import TranscriptionService, TranscriptStore, _legacy_key
+
+
+def _clip(tmp_path, name, data=b"RIFF-audio"):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return path
+
+
+def test_store_persists_and_reloads(tmp_path):
+    store_path = tmp_path / "transcripts.json"
+    clip = _clip(tmp_path, "a.wav")
+    TranscriptStore(store_path).set(clip, "hello there")
+
+    assert TranscriptStore(store_path).get(clip) == "hello there"
+    assert not store_path.with_suffix(".json.tmp").exists()
+
+
+def test_store_is_keyed_by_content(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.json")
+    original = _clip(tmp_path, "a.wav")
+    store.set(original, "same words")
+
+    assert store.get(_clip(tmp_path, "renamed.wav")) == "same words"
+    assert store.get(_clip(tmp_path, "other.wav", b"different")) is None
+    assert store.get(tmp_path / "missing.wav") is None
+
+
+def test_changed_file_is_rehashed(tmp_path):
+    store = TranscriptStore(tmp_path / "transcripts.json")
+    clip = _clip(tmp_path, "a.wav")
+    first = store.content_key(clip)
+    clip.write_bytes(b"new content, new size")
+
+    assert store.content_key(clip) != first
+
+
+def test_legacy_entries_are_migrated(tmp_path):
+    store_path = tmp_path / "transcripts.json"
+    clip = _clip(tmp_path, "a.wav")
+    legacy = _legacy_key(clip, os.stat(clip))
+    store_path.write_text(json.dumps({"transcripts": {legacy: "old words"}}), encoding="utf-8")
+
+    store = TranscriptStore(store_path)
+    assert store.get(clip) == "old words"
+    saved = json.loads(store_path.read_text(encoding="utf-8"))["transcripts"]
+    assert saved[store.content_key(clip)] == "old words"
+
+
+def test_corrupt_store_is_ignored(tmp_path):
+    store_path = tmp_path / "transcripts.json"
+    store_path.write_text("{not json", encoding="utf-8")
+
+    assert TranscriptStore(store_path).get(_clip(tmp_path, "a.wav")) is None
+
+
+def test_model_unloads_only_after_last_release(tmp_path):
+    service = TranscriptionService(TranscriptStore(tmp_path / "transcripts.json"))
+    service._model = object()
+
+    service.acquire()
+    service.acquire()
+    service.release()
+    assert service.loaded and service.users == 1
+
+    service.release()
+    assert not service.loaded and service.users == 0
+
+    service.release()
+    assert service.users == 0
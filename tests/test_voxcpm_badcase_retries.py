@@ -0,0 +1,110 @@
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.engines.voxcpm_local_engine import BADCASE_MAX_RETRIES, VoxCPMLocalEngine
+
+SAMPLE_RATE = 1000
+
+
+class PublicModel:
+    """Public-API-only model: each call returns the next queued duration in seconds."""
+
+    def __init__(self, durations):
+        self.durations = list(durations)
+        self.calls = []
+        self.tts_model = SimpleNamespace(sample_rate=SAMPLE_RATE)
+
+    def generate(self, **kwargs):
+        self.calls.append(kwargs)
+        return np.full(int(self.durations.pop(0) * SAMPLE_RATE), 0.1, dtype=np.float32)
+
+
+class PromptCacheModel:
+    """Model exposing the private prompt cache API with queued audio/text ratios."""
+
+    def __init__(self, ratios):
+        self.ratios = list(ratios)
+        self.public_calls = 0
+        self.tts_model = SimpleNamespace(
+            sample_rate=SAMPLE_RATE,
+            build_prompt_cache=lambda prompt_text, prompt_wav_path: {"prompt": prompt_text},
+            generate_with_prompt_cache=self._generate_with_prompt_cache,
+        )
+
+    def _generate_with_prompt_cache(
+        self, target_text, prompt_cache, min_len, max_len, inference_timesteps, cfg_value, retry_badcase
+    ):
+        ratio = self.ratios.pop(0)
+        return np.full(100, 0.1, dtype=np.float32), [0] * 10, [0] * int(ratio * 10)
+
+    def generate(self, **kwargs):
+        self.public_calls += 1
+        return np.full(SAMPLE_RATE, 0.1, dtype=np.float32)
+
+
+def _engine(model):
+    engine = VoxCPMLocalEngine.__new__(VoxCPMLocalEngine)
+    engine.model = model
+    engine.cfg_value = 2.0
+    engine.inference_timesteps = 4
+    engine.normalize = False
+    engine.denoise = False
+    engine.prompt_cache = OrderedDict()
+    engine.prompt_cache_size = 4
+    engine._prompt_cache_supported = True
+    engine.generation_stats = dict.fromkeys(
+        ("chunks", "badcase_retries", "badcase_exhausted", "prompt_cache_hits", "prompt_cache_misses"), 0
+    )
+    return engine
+
+
+def test_public_path_counts_duration_badcases():
+    model = PublicModel([60.0, 2.0])
+    engine = _engine(model)
+
+    engine._generate("short line", None, None)
+
+    assert len(model.calls) == 2
+    assert all(call["retry_badcase"] is False for call in model.calls)
+    assert engine.generation_stats["badcase_retries"] == 1
+    assert engine.generation_stats["badcase_exhausted"] == 0
+
+
+def test_public_path_keeps_last_take_when_retries_run_out():
+    engine = _engine(PublicModel([60.0] * (BADCASE_MAX_RETRIES + 1)))
+
+    engine._generate("short line", None, None)
+
+    assert engine.generation_stats["badcase_retries"] == BADCASE_MAX_RETRIES
+    assert engine.generation_stats["badcase_exhausted"] == 1
+
+
+def test_prompt_cache_path_counts_ratio_badcases(tmp_path):
+    prompt = tmp_path / "ref.wav"
+    prompt.write_bytes(b"RIFF")
+    model = PromptCacheModel([9.0, 8.0, 2.0, 1.0])
+    engine = _engine(model)
+
+    engine._generate("hello", str(prompt), "reference words")
+    engine._generate("again", str(prompt), "reference words")
+
+    assert model.public_calls == 0
+    assert engine.generation_stats["badcase_retries"] == 2
+    assert engine.generation_stats["prompt_cache_misses"] == 1
+    assert engine.generation_stats["prompt_cache_hits"] == 1
+
+
+def test_incompatible_private_api_falls_back_to_public_generate(tmp_path):
+    prompt = tmp_path / "ref.wav"
+    prompt.write_bytes(b"RIFF")
+    model = PromptCacheModel([])
+    model.tts_model.generate_with_prompt_cache = lambda target_text, prompt_cache: None
+    engine = _engine(model)
+
+    engine._generate("hello", str(prompt), "reference words")
+
+    assert model.public_calls == 1
+    assert engine._prompt_cache_supported is False
+    assert engine.generation_stats["prompt_cache_misses"] == 0
@@ -0,0 +1,75 @@
+import io
+import os
+import zipfile
+
+import pytest
+
+from src.zip_stream import compression_for, stream_zip
+
+
+@pytest.fixture
+def entries(tmp_path):
+    files = {
+        "chapter_01/chapter_01.mp3": os.urandom(3000),
+        "full_story.wav": b"RIFF" + b"\0" * 20000,
+    }
+    result = []
+    for arcname, data in files.items():
+        path = tmp_path / "job" / arcname
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        result.append((path, arcname))
+    return result
+
+
+def read_archive(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive:
+        assert archive.testzip() is None
+        return {info.filename: (info.compress_type, archive.read(info)) for info in archive.infolist()}
+
+
+def test_archive_round_trips_and_stores_compressed_audio(entries):
+    contents = read_archive(b"".join(stream_zip(entries)))
+
+    assert set(contents) == {arcname for _, arcname in entries}
+    for path, arcname in entries:
+        assert contents[arcname][1] == path.read_bytes()
+    assert contents["chapter_01/chapter_01.mp3"][0] == zipfile.ZIP_STORED
+    assert contents["full_story.wav"][0] == zipfile.ZIP_DEFLATED
+
+
+def test_compression_for_ignores_suffix_case(tmp_path):
+    assert compression_for(tmp_path / "a.M4B") == zipfile.ZIP_STORED
+    assert compression_for(tmp_path / "a.json") == zipfile.ZIP_DEFLATED
+
+
+def test_cache_file_appears_only_when_archive_completes(entries, tmp_path):
+    cache_path = tmp_path / "bundles" / "job-abc.zip"
+    chunks = stream_zip(entries, cache_path)
+
+    first = next(chunks)
+    assert first and not cache_path.exists()
+    data = first + b"".join(chunks)
+
+    assert cache_path.read_bytes() == data
+    assert [path.name for path in cache_path.parent.iterdir()] == ["job-abc.zip"]
+
+
+def test_aborted_stream_leaves_no_partial_file(entries, tmp_path):
+    cache_path = tmp_path / "bundles" / "job-abc.zip"
+    chunks = stream_zip(entries, cache_path)
+    next(chunks)
+
+    chunks.close()  # client disconnected
+
+    assert list(cache_path.parent.iterdir()) == []
+
+
+def test_missing_file_fails_without_caching(entries, tmp_path):
+    cache_path = tmp_path / "bundles" / "job-abc.zip"
+    entries.append((tmp_path / "job" / "gone.mp3", "gone.mp3"))
+
+    with pytest.raises(FileNotFoundError):
+        b"".join(stream_zip(entries, cache_path))
+
+    assert list(cache_path.parent.iterdir()) == []